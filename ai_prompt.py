@@ -27,7 +27,7 @@ Use headers, bullet points, and emphasis where appropriate.
 Keep the language professional, concise, and focused on business impact.
 
 
-Make sure you include the dates that are being compared with all the insights. For example, if we're saying the Case Volume is up 10% from last year, make sure you include the dates that are being compared. The most recent quarter, which is Q4 2024, is the most important and should be the main focus and be compared to past data.
+Make sure you include the dates that are being compared with all the insights. For example, if we're saying the Case Volume is up 10% from last year, make sure you include the dates that are being compared. The most recent quarter is the most important and should be the main focus and be compared to past data.
 
 If you have any insights from publically available sources as to how other hospitals are performing, make sure to include those as well and cite your sources (i.e. comparing against the industry average).
 """
@@ -0,0 +1,171 @@
+"""
+Anomaly detection module for ROI Automation Dashboard.
+This module handles flagging the month-level spikes and drops that quarterly
+sums hide: every location and metric's monthly series is scored with robust
+z-scores (median and median absolute deviation) in one vectorized NumPy pass,
+and the flagged months are passed to the insight prompt as structured rows.
+"""
+
+import numpy as np
+import pandas as pd
+from data_processor import (
+    HIERARCHY_COLUMNS,
+    METRIC_ENGINE,
+    MISSING_HIERARCHY_NAME,
+    format_quarter_key,
+)
+from metric_definitions import METRIC_DEFINITIONS
+
+# Robust z-score (Iglewicz and Hoaglin's modified z-score) worth reporting
+ROBUST_Z_THRESHOLD = 3.5
+
+# Series with fewer months than this are too short to judge
+MIN_MONTHS = 6
+
+# Scale the median and mean absolute deviations to a standard deviation for
+# normally distributed data, so the scores read like ordinary z-scores. The
+# mean deviation is only used when more than half the months equal the median
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+
+def _nanmedian(values):
+    """Median along the last axis, ignoring NaN, for every series at once."""
+    if values.shape[-1] == 0:
+        return np.full(values.shape[:-1], np.nan)
+
+    # NaN sorts last, so each series' values are its first count entries
+    ordered = np.sort(values, axis=-1)
+    counts = np.count_nonzero(~np.isnan(values), axis=-1)
+    low = np.maximum((counts - 1) // 2, 0)[..., None]
+    high = (counts // 2)[..., None]
+    median = (
+        np.take_along_axis(ordered, low, axis=-1)
+        + np.take_along_axis(ordered, high, axis=-1)
+    ) / 2
+    return median[..., 0]
+
+
+def robust_z_scores(values, min_months=MIN_MONTHS):
+    """
+    Return (z_scores, medians) for series along the last axis of values,
+    with NaN for missing months. Series with fewer than min_months values or
+    no spread at all get NaN scores.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.count_nonzero(~np.isnan(values), axis=-1)
+    median = _nanmedian(values)
+    deviation = np.abs(values - median[..., None])
+
+    mad = _nanmedian(deviation)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_ad = np.nansum(deviation, axis=-1) / counts
+        scale = np.where(mad > 0, MAD_SCALE * mad, MEAN_AD_SCALE * mean_ad)
+        scale = np.where((scale > 0) & (counts >= min_months), scale, np.nan)
+        z_scores = (values - median[..., None]) / scale[..., None]
+    return z_scores, median
+
+
+def _level_codes(index, name):
+    """
+    Return (codes, names) for a level of a MultiIndex, with missing names
+    grouped as MISSING_HIERARCHY_NAME like the rollup cube does.
+    """
+    position = index.names.index(name)
+    # Code -1 (a missing name) picks the appended last entry
+    names = np.append(index.levels[position].astype(str), MISSING_HIERARCHY_NAME)
+    name_codes, unique_names = pd.factorize(names)
+    return name_codes[index.codes[position]], np.asarray(unique_names)
+
+
+def monthly_series(monthly_sums, metrics=None):
+    """
+    Turn DataProcessor.monthly_sums into dense series.
+
+    Returns (locations, metrics, month_keys, values): a DataFrame of each
+    location's hierarchy names, the metric names, the sorted month keys and
+    a (location, metric, month) array of metric values. Months a location
+    has no data for, or where a metric is undefined (e.g. a zero
+    denominator), are NaN.
+    """
+    metrics = [
+        name
+        for name in METRIC_ENGINE.resolve(metrics)
+        if set(METRIC_ENGINE.metrics[name].inputs) <= set(monthly_sums.columns)
+    ]
+    index = monthly_sums.index
+    month_keys, month_ids = np.unique(
+        index.get_level_values("month_key").to_numpy(dtype=np.int32),
+        return_inverse=True,
+    )
+
+    # Locations are grouped by the index's integer level codes rather than
+    # by hashing their names row by row
+    levels = [_level_codes(index, column) for column in HIERARCHY_COLUMNS]
+    location_key = np.zeros(len(index), dtype=np.int64)
+    for codes, names in levels:
+        location_key = location_key * len(names) + codes
+    _, first_rows, location_ids = np.unique(
+        location_key, return_index=True, return_inverse=True
+    )
+    locations = pd.DataFrame(
+        {
+            column: names[codes[first_rows]]
+            for column, (codes, names) in zip(HIERARCHY_COLUMNS, levels)
+        }
+    )
+
+    values = np.full((len(locations), len(metrics), len(month_keys)), np.nan)
+    for i, series in enumerate(METRIC_ENGINE.evaluate(monthly_sums, metrics).values()):
+        values[location_ids, i, month_ids] = series
+    values[~np.isfinite(values)] = np.nan
+
+    return locations, metrics, month_keys, values
+
+
+def detect_anomalies(
+    monthly_sums, metrics=None, threshold=ROBUST_Z_THRESHOLD, min_months=MIN_MONTHS
+) -> pd.DataFrame:
+    """
+    Return one row per location, metric and month whose robust z-score
+    against that series' own months is at least threshold in absolute
+    value, most extreme first.
+
+    Each row has the location's names, the metric, the month ("2024-10")
+    and its quarter_year, the month's value and the series median, the
+    robust_z score and a direction from the metric's goal in
+    METRIC_DEFINITIONS (improved/declined, or changed for metrics without
+    one).
+    """
+    locations, metrics, month_keys, values = monthly_series(monthly_sums, metrics)
+    z_scores, medians = robust_z_scores(values, min_months)
+
+    with np.errstate(invalid="ignore"):
+        flagged = np.abs(z_scores) >= threshold
+    location_ids, metric_ids, month_ids = np.nonzero(flagged)
+
+    # Labels are built once per month and metric, then indexed
+    months = np.array([f"{key // 12}-{key % 12 + 1:02d}" for key in month_keys])
+    quarters = np.array(format_quarter_key(month_keys // 3))
+    goals = np.array(
+        [METRIC_DEFINITIONS.get(m, {}).get("goal", "neutral") for m in metrics]
+    )
+
+    anomalies = locations.iloc[location_ids].reset_index(drop=True)
+    anomalies["metric"] = np.array(metrics, dtype=object)[metric_ids]
+    anomalies["month"] = months[month_ids]
+    anomalies["quarter_year"] = quarters[month_ids]
+    anomalies["value"] = values[flagged]
+    anomalies["median"] = medians[location_ids, metric_ids]
+    anomalies["robust_z"] = z_scores[flagged]
+
+    goal = goals[metric_ids]
+    z = anomalies["robust_z"]
+    better = np.where(goal == "lower", z < 0, z > 0)
+    anomalies["direction"] = np.where(
+        goal == "neutral", "changed", np.where(better, "improved", "declined")
+    )
+
+    anomalies["order"] = -z.abs()
+    anomalies = anomalies.sort_values(["order", *HIERARCHY_COLUMNS, "metric", "month"])
+    return anomalies.drop(columns="order").reset_index(drop=True)
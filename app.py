@@ -1,6 +1,9 @@
 import os
+import json
+from io import BytesIO
 from flask import (
     Flask,
+    Response,
     render_template,
     request,
     redirect,
@@ -8,12 +11,29 @@ from flask import (
     flash,
     jsonify,
     send_file,
+    session,
+    stream_with_context,
 )
-import pandas as pd
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-from data_processor import DataProcessor
 from openai_analyzer import OpenAIAnalyzer
-from pdf_generator import PDFGenerator
+from job_queue import JobQueue
+from llm_client import get_shared_rate_limiter
+from llm_cache import get_default_cache
+from chart_renderer import get_shared_chart_renderer, render_report_charts
+from report_cache import get_shared_report_cache, parse_report_filename
+from report_pipeline import render_report, run_report_pipeline
+from session_store import SessionStore
+from data_processor import QOQ_METRICS
+from rollup import parse_quarter_label
+from processed_cache import (
+    file_fingerprint,
+    file_preview,
+    get_default_processed_cache,
+    load_processed_data,
+    load_rollup_cube,
+)
 
 # Load environment variables
 load_dotenv()
@@ -22,15 +42,35 @@ app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-key-for-development")
 app.config["UPLOAD_FOLDER"] = "uploads"
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
-app.config["ALLOWED_EXTENSIONS"] = {"csv"}
+app.config["ALLOWED_EXTENSIONS"] = {"csv", "parquet", "pq", "feather", "arrow"}
 app.config["REPORTS_FOLDER"] = "reports"
 
 # Create uploads and reports directories if they don't exist
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 os.makedirs(app.config["REPORTS_FOLDER"], exist_ok=True)
 
-# Store the current uploaded file path
-current_file_path = None
+# Each browser session's active dataset, shared by every worker on the node
+session_store = SessionStore(
+    app.config["UPLOAD_FOLDER"],
+    app.config["REPORTS_FOLDER"],
+    db_path=os.getenv("SESSION_DB_PATH", os.path.join("cache", "sessions.sqlite3")),
+    ttl_seconds=int(os.getenv("SESSION_TTL_SECONDS", 24 * 60 * 60)),
+)
+
+# Background workers for report generation; job status is kept next to the
+# sessions so any worker can answer a poll
+job_queue = JobQueue(
+    max_workers=int(os.getenv("REPORT_JOB_WORKERS", 4)),
+    db_path=session_store.db_path,
+)
+
+# Chart worker processes are started before any request threads exist
+chart_renderer = get_shared_chart_renderer()
+if chart_renderer is not None:
+    chart_renderer.warm_up()
+
+# Processed aggregates and file previews keyed by file content hash
+processed_cache = get_default_processed_cache()
 
 
 def allowed_file(filename):
@@ -40,6 +80,28 @@ def allowed_file(filename):
     )
 
 
+def current_session_id():
+    """Return this browser's session ID, starting a new session if needed."""
+    session_id = session.get("session_id")
+    if not session_store.is_active(session_id):
+        session_id = session_store.create_session()
+        session["session_id"] = session_id
+        session.permanent = True
+    return session_id
+
+
+def current_dataset_path(session_id):
+    """Return the session's active dataset path, or None if there isn't one."""
+    dataset = session_store.get_dataset(session_id)
+    return dataset[0] if dataset else None
+
+
+@app.before_request
+def cleanup_expired_sessions():
+    """Remove expired sessions' uploads and reports every so often."""
+    session_store.maybe_cleanup()
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -47,9 +109,11 @@ def index():
 
 @app.route("/analyze", methods=["POST"])
 def analyze_data():
-    global current_file_path
+    """Queue report generation for the current file and return a job ID."""
+    session_id = current_session_id()
+    file_path = current_dataset_path(session_id)
 
-    if not current_file_path or not os.path.exists(current_file_path):
+    if not file_path:
         return (
             jsonify(
                 {
@@ -61,61 +125,249 @@ def analyze_data():
         )
 
     try:
-        # Process the metric data
-        dp = DataProcessor(current_file_path)
-        customer_dict, region_dict = dp.process_file()
-
-        # Initialize the AI analyzer
-        openai_analyzer = OpenAIAnalyzer()
-
-        # Multi-source data collection - First source: Meeting notes
-        success_meeting, meeting_insights = openai_analyzer.extract_meeting_insights()
-        if not success_meeting:
-            meeting_insights = "Meeting insights data unavailable. Proceeding with available data sources."
-
-        # Multi-source data collection - Second source: Becker's healthcare news
-        success_beckers, beckers_insights = openai_analyzer.extract_beckers_insights()
-        if not success_beckers:
-            beckers_insights = "Becker's healthcare news unavailable. Proceeding with available data sources."
-
-        # AI synthesis of all data sources into comprehensive insights
-        success, insights = openai_analyzer.generate_insights(
-            (customer_dict, region_dict)
+        # Identical input from the same session that is already queued or
+        # running shares that job
+        job, created = job_queue.submit(
+            f"{session_id}:{file_fingerprint(file_path)}",
+            run_report_pipeline,
+            file_path,
+            session_store.reports_dir(session_id),
         )
 
-        # Generate executive summary PDF with synthesized information
-        success, pdf_content = openai_analyzer.generate_pdf_content(
-            (customer_dict, region_dict)
+        return (
+            jsonify(
+                {
+                    "success": True,
+                    "job_id": job["id"],
+                    "status": job["status"],
+                    "deduplicated": not created,
+                    "status_url": url_for("job_status", job_id=job["id"]),
+                }
+            ),
+            202,
         )
 
-        # Create the downloadable executive summary
-        pdf_generator = PDFGenerator(app.config["REPORTS_FOLDER"])
-        success, pdf_path = pdf_generator.generate_pdf_from_markdown(
-            pdf_content, "executive_summary.pdf"
+    except Exception as e:
+        import traceback
+
+        error_details = traceback.format_exc()
+        print(f"Error queueing analysis: {str(e)}\n{error_details}")
+        return (
+            jsonify({"success": False, "error": f"Error during analysis: {str(e)}"}),
+            500,
+        )
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Return the status, per-stage durations and result of a report job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    return jsonify({"success": True, "job": job})
+
+
+@app.route("/jobs")
+def job_queue_stats():
+    """Return the report job queue depth and job counts."""
+    return jsonify({"success": True, "queue": job_queue.get_stats()})
+
+
+@app.route("/reports/cache")
+def report_cache_stats():
+    """Return in-memory report cache size and hit/miss counters."""
+    report_cache = get_shared_report_cache()
+    if report_cache is None:
+        return jsonify({"success": True, "enabled": False})
+    return jsonify(
+        {"success": True, "enabled": True, "cache": report_cache.get_stats()}
+    )
+
+
+@app.route("/drilldown")
+def drilldown():
+    """
+    Return the metrics of the whole dataset, a ?tenant= or a ?region= for a
+    quarter next to each of its children's, ranked by their contribution to
+    the change in ?metric= if given.
+    """
+    session_id = current_session_id()
+    file_path = current_dataset_path(session_id)
+    if not file_path:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "No file has been uploaded or the file was removed.",
+                }
+            ),
+            400,
         )
-        pdf_filename = os.path.basename(pdf_path)
+
+    metric = request.args.get("metric")
+    if metric and metric not in QOQ_METRICS:
+        return jsonify({"success": False, "error": f"Unknown metric: {metric}"}), 400
+
+    # Defaults to REPORT_FOCUS_QUARTER, then the latest complete quarter
+    quarter = request.args.get("quarter") or os.getenv("REPORT_FOCUS_QUARTER")
+    quarter_key = None
+    if quarter:
+        try:
+            quarter_key = parse_quarter_label(quarter)
+        except (ValueError, IndexError):
+            return (
+                jsonify({"success": False, "error": "quarter must look like Q4 2024"}),
+                400,
+            )
+
+    try:
+        cube = load_rollup_cube(file_path, processed_cache)
+        if quarter_key is None:
+            quarter_key = cube.latest_complete_quarter()
+
+        # Region names are usually unique, so the tenant can be left out
+        tenant = request.args.get("tenant")
+        region = request.args.get("region")
+        if region is None:
+            path = [tenant] if tenant is not None else []
+        elif tenant is not None:
+            path = [tenant, region]
+        else:
+            region_paths = cube.region_paths(region)
+            if len(region_paths) > 1:
+                return (
+                    jsonify(
+                        {
+                            "success": False,
+                            "error": "tenant is required for this region",
+                        }
+                    ),
+                    400,
+                )
+            path = list(region_paths[0]) if region_paths else [region]
+        if tuple(path) not in cube.node_index:
+            return jsonify({"success": False, "error": "Node not found"}), 404
 
         return jsonify(
-            {
-                "success": True,
-                "insights": insights,
-                "meeting_insights": meeting_insights,
-                "beckers_insights": beckers_insights,
-                "pdf_path": pdf_filename,
-            }
+            {"success": True, "drilldown": cube.drilldown(path, quarter_key, metric)}
         )
 
     except Exception as e:
         import traceback
 
         error_details = traceback.format_exc()
-        print(f"Error during analysis: {str(e)}\n{error_details}")
+        print(f"Error building drilldown: {str(e)}\n{error_details}")
         return (
-            jsonify({"success": False, "error": f"Error during analysis: {str(e)}"}),
+            jsonify({"success": False, "error": f"Error building drilldown: {str(e)}"}),
             500,
         )
 
 
+@app.route("/llm/metrics")
+def llm_metrics():
+    """
+    Return LLM call, retry and rate-limit queue-wait counters, and the
+    response cache's hit, miss and eviction counts.
+    """
+    response_cache = get_default_cache()
+    if response_cache is None:
+        cache_stats = {"enabled": False}
+    else:
+        cache_stats = {"enabled": True, **response_cache.get_stats()}
+    return jsonify(
+        {
+            "success": True,
+            "llm": get_shared_rate_limiter().get_metrics(),
+            "cache": cache_stats,
+        }
+    )
+
+
+def format_sse(event, payload):
+    """Format a payload as a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route("/analyze/stream")
+def analyze_stream():
+    """Run the analysis and stream stage events and summary tokens over SSE."""
+    session_id = current_session_id()
+    file_path = current_dataset_path(session_id)
+    reports_folder = session_store.reports_dir(session_id)
+
+    def generate():
+        if not file_path:
+            yield format_sse(
+                "error",
+                {"error": "No file has been uploaded or the file was removed."},
+            )
+            return
+
+        try:
+            # Process the metric data, reusing the stored result if possible
+            customer_dict, region_dict, cube, anomalies = load_processed_data(
+                file_path, processed_cache
+            )
+            yield format_sse("stage", {"stage": "data_processed"})
+
+            # Stream the source extractions and the final synthesis
+            openai_analyzer = OpenAIAnalyzer(
+                customer=cube.customer_name(), cube=cube, anomalies=anomalies
+            )
+            insights = None
+            for event, payload in openai_analyzer.stream_insights(
+                (customer_dict, region_dict)
+            ):
+                if event == "insights":
+                    insights = payload["insights"]
+                    continue
+                yield format_sse(event, payload)
+                if event == "error":
+                    return
+
+            # Create the downloadable executive summary
+            # Trend and region charts, within the chart render-time budget
+            charts = render_report_charts(
+                customer_dict, region_dict, quarter=openai_analyzer.focus_quarter
+            )
+            yield format_sse("stage", {"stage": "charts_rendered"})
+
+            success, pdf_filename = render_report(
+                insights, reports_folder, charts=charts
+            )
+            if not success:
+                yield format_sse("error", {"error": pdf_filename})
+                return
+
+            yield format_sse("stage", {"stage": "pdf_ready", "pdf_path": pdf_filename})
+
+            yield format_sse(
+                "complete",
+                {
+                    "success": True,
+                    "insights": insights,
+                    "meeting_insights": openai_analyzer.meeting_insights,
+                    "beckers_insights": openai_analyzer.beckers_insights,
+                    "pdf_path": pdf_filename,
+                    "timings": openai_analyzer.get_stage_timings(),
+                },
+            )
+
+        except Exception as e:
+            import traceback
+
+            error_details = traceback.format_exc()
+            print(f"Error during streaming analysis: {str(e)}\n{error_details}")
+            yield format_sse("error", {"error": f"Error during analysis: {str(e)}"})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/sample_csv")
 def sample_csv():
     """Provide a sample CSV file for users to test the application."""
@@ -134,8 +386,6 @@ def sample_csv():
 
 @app.route("/use_sample_data", methods=["POST"])
 def use_sample_data():
-    global current_file_path
-
     # Get the customer ID from the request (not used, but included for demo purposes)
     data = request.json
     customer_id = data.get("customer_id", "")
@@ -148,12 +398,13 @@ def use_sample_data():
     if not os.path.exists(sample_file_path):
         return jsonify({"success": False, "error": "Sample data file not found"}), 404
 
-    # Save the path for later analysis
-    current_file_path = sample_file_path
-
     try:
-        # Read the sample data file
-        df = pd.read_csv(sample_file_path)
+        # Row and column counts come from the processed cache after the
+        # first request instead of parsing the file every time
+        if processed_cache is not None:
+            preview = processed_cache.get_preview(sample_file_path)
+        else:
+            preview = file_preview(sample_file_path)
 
         # For demo purposes, we'll add a customer name to the filename
         customer_mapping = {
@@ -163,13 +414,16 @@ def use_sample_data():
         customer_name = customer_mapping.get(customer_id, "Sample Customer")
         filename = f"{customer_name} - Data.csv"
 
+        # Save the path for this session's later analysis
+        session_store.set_dataset(current_session_id(), sample_file_path, filename)
+
         return jsonify(
             {
                 "success": True,
                 "filename": filename,
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": df.columns.tolist(),
+                "rows": preview["rows"],
+                "columns": preview["columns"],
+                "column_names": preview["column_names"],
             }
         )
     except Exception as e:
@@ -181,15 +435,61 @@ def use_sample_data():
         )
 
 
+@app.route("/upload", methods=["POST"])
+def upload_file():
+    """Save an uploaded data file as this session's dataset."""
+    file = request.files.get("file")
+    if file is None or not file.filename:
+        return jsonify({"success": False, "error": "No file was uploaded"}), 400
+    if not allowed_file(file.filename):
+        return jsonify({"success": False, "error": "Unsupported file type"}), 400
+
+    try:
+        session_id = current_session_id()
+        filename = secure_filename(file.filename)
+        file_path = os.path.join(session_store.upload_dir(session_id), filename)
+        file.save(file_path)
+        session_store.set_dataset(session_id, file_path, filename)
+
+        if processed_cache is not None:
+            preview = processed_cache.get_preview(file_path)
+        else:
+            preview = file_preview(file_path)
+
+        return jsonify({"success": True, "filename": filename, **preview})
+    except Exception as e:
+        return (
+            jsonify({"success": False, "error": f"Error processing upload: {str(e)}"}),
+            400,
+        )
+
+
 @app.route("/download/<filename>")
 def download_file(filename):
-    """Download a generated report file."""
+    """Download a generated report from the session's reports."""
     try:
-        file_path = os.path.join(app.config["REPORTS_FOLDER"], filename)
-        if not os.path.exists(file_path):
+        # Only reports in the caller's own session folder can be downloaded
+        reports_folder = session_store.reports_dir(current_session_id())
+        file_path = safe_join(reports_folder, filename)
+        if file_path is None or not os.path.exists(file_path):
             return jsonify({"error": "File not found"}), 404
 
-        return send_file(file_path, as_attachment=True, download_name=filename)
+        # Reports this worker rendered are streamed from memory
+        report_id = parse_report_filename(filename)
+        report_cache = get_shared_report_cache()
+        if report_id and report_cache is not None:
+            pdf_bytes = report_cache.get(report_id)
+            if pdf_bytes is not None:
+                return send_file(
+                    BytesIO(pdf_bytes),
+                    mimetype="application/pdf",
+                    as_attachment=True,
+                    download_name=filename,
+                )
+
+        return send_file(
+            os.path.abspath(file_path), as_attachment=True, download_name=filename
+        )
     except Exception as e:
         return jsonify({"error": f"Error downloading file: {str(e)}"}), 500
 
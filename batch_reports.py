@@ -0,0 +1,255 @@
+"""
+Batch report module for ROI Automation Dashboard.
+This module generates one executive summary PDF per tenant from a single
+multi-tenant extract, for quarterly business reviews across many customers.
+
+Usage: python batch_reports.py extract.csv --output-dir reports/batch [--resume]
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from data_processor import DataProcessor
+from anomaly_detection import detect_anomalies
+from openai_analyzer import OpenAIAnalyzer
+from pdf_generator import PDFGenerator
+from chart_renderer import render_report_charts
+
+MANIFEST_FILENAME = "batch_manifest.json"
+
+
+def tenant_slug(tenant_name):
+    """Return a filesystem-safe name for a tenant."""
+    return re.sub(r"[^A-Za-z0-9]+", "_", tenant_name).strip("_").lower() or "tenant"
+
+
+def load_tenant_partitions(file_path, tenants=None):
+    """Read the extract once and split it by tenant_name in one groupby pass."""
+    # Only the needed columns are read, not the whole file
+    processor = DataProcessor(file_path, tenants=tenants, lazy=True)
+    frame = processor.read_columns(extra_columns=["tenant_name"])
+    if tenants:
+        frame = frame[frame["tenant_name"].isin(tenants)]
+
+    return {
+        str(tenant): tenant_df
+        for tenant, tenant_df in frame.groupby("tenant_name", observed=True)
+    }
+
+
+def process_tenant_frame(tenant_df, start_date=None, end_date=None):
+    """
+    Aggregate one tenant's rows and build its cube and anomaly records.
+    Runs in a worker process.
+    """
+    start = time.perf_counter()
+    processor = DataProcessor(data=tenant_df, start_date=start_date, end_date=end_date)
+    customer_dict, region_dict = processor.process_file()
+    anomalies = detect_anomalies(processor.monthly_sums, processor.metrics)
+    return (
+        customer_dict,
+        region_dict,
+        processor.cube,
+        anomalies.to_dict(orient="records"),
+        round(time.perf_counter() - start, 3),
+    )
+
+
+def generate_tenant_report(
+    tenant_name, customer_dict, region_dict, output_dir, cube=None, anomalies=None
+):
+    """Run the AI analysis and render the PDF for one tenant."""
+    openai_analyzer = OpenAIAnalyzer(
+        customer=tenant_name, cube=cube, anomalies=anomalies
+    )
+    success, insights = openai_analyzer.generate_insights((customer_dict, region_dict))
+    if not success:
+        raise RuntimeError(insights)
+
+    start = time.perf_counter()
+    charts = render_report_charts(
+        customer_dict, region_dict, quarter=openai_analyzer.focus_quarter
+    )
+    chart_seconds = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    pdf_generator = PDFGenerator(output_dir)
+    success, pdf_path = pdf_generator.generate_pdf_from_markdown(
+        insights, f"{tenant_slug(tenant_name)}.pdf", charts
+    )
+    if not success:
+        raise RuntimeError(pdf_path)
+
+    timings = openai_analyzer.get_stage_timings()
+    timings["chart_rendering"] = chart_seconds
+    timings["pdf_rendering"] = round(time.perf_counter() - start, 3)
+    return pdf_path, timings
+
+
+def load_manifest(output_dir):
+    """Return the per-tenant results recorded by a previous run."""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    """Write the manifest atomically so an interrupted run can resume."""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+async def run_batch(
+    file_path,
+    output_dir,
+    tenants=None,
+    workers=None,
+    llm_concurrency=4,
+    resume=False,
+    start_date=None,
+    end_date=None,
+    report_func=generate_tenant_report,
+):
+    """
+    Generate one report per tenant and return the run summary.
+
+    Tenant aggregation runs on a process pool; each tenant's LLM calls and PDF
+    rendering start as soon as its data is ready, with at most
+    llm_concurrency tenants talking to the API at once. With resume=True,
+    tenants that already succeeded (and whose PDF still exists) are skipped.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir) if resume else {}
+    run_start = time.perf_counter()
+
+    partitions = load_tenant_partitions(file_path, tenants)
+    load_seconds = round(time.perf_counter() - run_start, 3)
+    print(f"Loaded {len(partitions)} tenants in {load_seconds}s")
+
+    skipped = [
+        tenant
+        for tenant in partitions
+        if manifest.get(tenant, {}).get("status") == "succeeded"
+        and os.path.exists(manifest[tenant].get("pdf_path", ""))
+    ]
+    pending = [tenant for tenant in partitions if tenant not in skipped]
+    for tenant in skipped:
+        print(f"[skip] {tenant}: already generated")
+
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+
+    async def run_tenant(tenant, pool):
+        tenant_start = time.perf_counter()
+        try:
+            customer_dict, region_dict, cube, anomalies, data_seconds = (
+                await loop.run_in_executor(
+                    pool, process_tenant_frame, partitions[tenant], start_date, end_date
+                )
+            )
+
+            async with llm_slots:
+                pdf_path, timings = await asyncio.to_thread(
+                    report_func,
+                    tenant,
+                    customer_dict,
+                    region_dict,
+                    output_dir,
+                    cube=cube,
+                    anomalies=anomalies,
+                )
+
+            timings["data_processing"] = data_seconds
+            timings["total"] = round(time.perf_counter() - tenant_start, 3)
+            manifest[tenant] = {
+                "status": "succeeded",
+                "pdf_path": pdf_path,
+                "timings": timings,
+            }
+            print(
+                f"[ok]   {tenant}: {timings['total']}s "
+                f"(data {data_seconds}s, pdf {timings.get('pdf_rendering')}s)"
+            )
+        except Exception as e:
+            manifest[tenant] = {
+                "status": "failed",
+                "error": str(e),
+                "timings": {"total": round(time.perf_counter() - tenant_start, 3)},
+            }
+            print(f"[fail] {tenant}: {str(e)}")
+
+        save_manifest(output_dir, manifest)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        await asyncio.gather(*(run_tenant(tenant, pool) for tenant in pending))
+
+    wall_seconds = time.perf_counter() - run_start
+    succeeded = sum(manifest[t]["status"] == "succeeded" for t in pending)
+    summary = {
+        "tenants": len(partitions),
+        "succeeded": succeeded,
+        "failed": len(pending) - succeeded,
+        "skipped": len(skipped),
+        "load_seconds": load_seconds,
+        "wall_seconds": round(wall_seconds, 3),
+        "tenants_per_minute": (
+            round(len(pending) / wall_seconds * 60, 2) if pending else 0.0
+        ),
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate an executive summary PDF for every tenant in an extract."
+    )
+    parser.add_argument("file_path", help="CSV, Parquet, Feather or Arrow extract")
+    parser.add_argument("--output-dir", default=os.path.join("reports", "batch"))
+    parser.add_argument("--tenants", nargs="+", help="Only these tenant names")
+    parser.add_argument("--start-date", help="Only months on or after this date")
+    parser.add_argument("--end-date", help="Only months on or before this date")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processes for the pandas work"
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=4,
+        help="Tenants allowed to call the LLM at the same time",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip tenants that succeeded in a previous run",
+    )
+    args = parser.parse_args()
+
+    summary = asyncio.run(
+        run_batch(
+            args.file_path,
+            args.output_dir,
+            tenants=args.tenants,
+            workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+            resume=args.resume,
+            start_date=args.start_date,
+            end_date=args.end_date,
+        )
+    )
+
+    print("\nBatch summary")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark script for monthly anomaly detection.
+
+Compares a pandas groupby median/MAD over the long (location, metric, month)
+frame with anomaly_detection.detect_anomalies, which scores every location
+and metric series in one NumPy pass, as the number of series grows.
+
+Usage:
+  python bench_anomaly_detection.py [--series 1000 10000 100000] [--months 36]
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from data_processor import HIERARCHY_COLUMNS, METRIC_COLUMNS, METRIC_ENGINE
+from anomaly_detection import (
+    MAD_SCALE,
+    ROBUST_Z_THRESHOLD,
+    detect_anomalies,
+    monthly_series,
+)
+from bench_data_processor import time_call
+
+
+def make_monthly_sums(n_locations, n_months=36, spike_rate=0.002, seed=0):
+    """
+    Build monthly location sums shaped like DataProcessor.monthly_sums: each
+    location has its own level with 5% noise, and a spike_rate share of
+    months is halved.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_locations * n_months
+    location_ids = np.repeat(np.arange(n_locations), n_months)
+    index = pd.MultiIndex.from_arrays(
+        [
+            np.tile(np.arange(2022 * 12, 2022 * 12 + n_months), n_locations),
+            [f"Tenant {i % 20}" for i in location_ids],
+            [f"Region {i % 500}" for i in location_ids],
+            [f"Location {i}" for i in location_ids],
+        ],
+        names=["month_key", *HIERARCHY_COLUMNS],
+    )
+    spikes = np.where(rng.random(n_rows) < spike_rate, 0.5, 1.0)
+    data = {}
+    for col in METRIC_COLUMNS:
+        level = rng.uniform(100, 10000, n_locations)[location_ids]
+        noise = rng.normal(1, 0.05, n_rows)
+        # Denominators stay put so the spikes show up in the ratios too
+        data[col] = level * noise * (1.0 if col.endswith("_den") else spikes)
+    return pd.DataFrame(data, index=index)
+
+
+def pandas_robust_z(monthly_sums):
+    """Per-series median and MAD with pandas groupby, for comparison."""
+    frame = monthly_sums.reset_index()
+    for metric, values in METRIC_ENGINE.evaluate(frame).items():
+        frame[metric] = values
+    long_df = frame.melt(
+        ["month_key", *HIERARCHY_COLUMNS],
+        list(METRIC_ENGINE.metrics),
+        var_name="metric",
+    )
+    series = long_df.groupby([*HIERARCHY_COLUMNS, "metric"], sort=False)["value"]
+    median = series.transform("median")
+    deviation = (long_df["value"] - median).abs()
+    mad = deviation.groupby(
+        [long_df[col] for col in [*HIERARCHY_COLUMNS, "metric"]]
+    ).transform("median")
+    z_scores = (long_df["value"] - median) / (MAD_SCALE * mad)
+    return long_df[z_scores.abs() >= ROBUST_Z_THRESHOLD]
+
+
+def bench(series_counts, n_months):
+    n_metrics = len(METRIC_ENGINE.metrics)
+    print(
+        f"{'series':>8} {'months':>7} {'pandas (s)':>11} {'numpy (s)':>10} "
+        f"{'speedup':>8} {'flagged':>8}"
+    )
+    for n_series in series_counts:
+        monthly_sums = make_monthly_sums(max(1, n_series // n_metrics), n_months)
+        _, _, _, values = monthly_series(monthly_sums)
+
+        grouped = time_call(pandas_robust_z, monthly_sums, repeat=1)
+        vectorized = time_call(detect_anomalies, monthly_sums)
+        flagged = len(detect_anomalies(monthly_sums))
+        print(
+            f"{values.shape[0] * values.shape[1]:>8} {n_months:>7} {grouped:11.3f} "
+            f"{vectorized:10.3f} {grouped / vectorized:7.1f}x {flagged:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--series", type=int, nargs="+", default=[1000, 10_000, 100_000]
+    )
+    parser.add_argument("--months", type=int, default=36)
+    args = parser.parse_args()
+    bench(args.series, args.months)
@@ -0,0 +1,237 @@
+"""
+Benchmark script for DataProcessor.
+
+  qoq  Compares the original per-region QoQ loop with the grouped vectorized
+       pass as the number of regions grows.
+  io   Compares load + aggregate time for the same synthetic extract stored
+       as CSV and as Parquet.
+  trends  Compares a per-group pandas loop for the YoY, rolling and
+          seasonally adjusted columns with trends.add_trend_columns.
+
+Usage:
+  python bench_data_processor.py qoq [--groups 10 100 1000 5000]
+  python bench_data_processor.py io [--rows 10000000]
+  python bench_data_processor.py trends [--groups 10 100 1000 10000]
+"""
+
+import os
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from data_processor import (
+    METRIC_COLUMNS,
+    QOQ_METRICS,
+    DataProcessor,
+    add_qoq_changes,
+)
+from rollup import parse_quarter_label
+from trends import add_trend_columns
+
+
+def make_region_frame(n_groups, n_quarters=8, seed=0):
+    """Build a region-level frame shaped like DataProcessor's aggregates."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_groups * n_quarters
+    data = {
+        "quarter_year": np.tile(
+            [f"Q{q % 4 + 1} {2023 + q // 4}" for q in range(n_quarters)], n_groups
+        ),
+        "region_name": np.repeat([f"Region {i}" for i in range(n_groups)], n_quarters),
+    }
+    for metric, change in QOQ_METRICS.items():
+        if change == "pct_change":
+            data[metric] = rng.uniform(100, 10000, n_rows)
+        else:
+            data[metric] = rng.uniform(0, 1, n_rows)
+    return pd.DataFrame(data)
+
+
+def legacy_region_qoq(region_df):
+    """The original masked-assignment loop, kept here for comparison."""
+    region_df = region_df.copy()
+    for region in region_df["region_name"].unique():
+        mask = region_df["region_name"] == region
+        for metric, change in QOQ_METRICS.items():
+            if change == "pct_change":
+                region_df.loc[mask, f"{metric}_qoq"] = (
+                    region_df.loc[mask, metric].pct_change() * 100
+                )
+            else:
+                region_df.loc[mask, f"{metric}_qoq"] = (
+                    region_df.loc[mask, metric].diff() * 100
+                )
+    return region_df
+
+
+def time_call(func, *args, repeat=3):
+    """Return the best wall-clock time of func(*args) over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_qoq(group_counts, legacy_limit):
+    print(
+        f"{'groups':>8} {'rows':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}"
+    )
+    for n_groups in group_counts:
+        df = make_region_frame(n_groups)
+
+        vectorized = time_call(add_qoq_changes, df, ["region_name"])
+        if n_groups <= legacy_limit:
+            legacy = time_call(legacy_region_qoq, df, repeat=1)
+            legacy_text = f"{legacy:12.4f}"
+            speedup_text = f"{legacy / vectorized:7.1f}x"
+        else:
+            legacy_text = f"{'skipped':>12}"
+            speedup_text = f"{'-':>8}"
+
+        print(
+            f"{n_groups:>8} {len(df):>8} {legacy_text} {vectorized:15.4f} {speedup_text}"
+        )
+
+
+def legacy_region_trends(region_df):
+    """Per-region shift/rolling/expanding loop, kept here for comparison."""
+    region_df = region_df.copy()
+    for region in region_df["region_name"].unique():
+        mask = region_df["region_name"] == region
+        group = region_df[mask]
+        season = group["quarter_key"] % 4
+        for metric, change in QOQ_METRICS.items():
+            values = group[metric]
+            if change == "pct_change":
+                yoy = (values / values.shift(4) - 1) * 100
+            else:
+                yoy = (values - values.shift(4)) * 100
+            qoq = group[f"{metric}_qoq"]
+            seasonal = qoq.groupby(season).transform(
+                lambda s: s.shift().expanding().mean()
+            )
+            region_df.loc[mask, f"{metric}_yoy"] = yoy
+            region_df.loc[mask, f"{metric}_rolling4"] = values.rolling(4).mean()
+            region_df.loc[mask, f"{metric}_qoq_sa"] = qoq - seasonal
+    return region_df
+
+
+def bench_trends(group_counts, legacy_limit):
+    print(
+        f"{'groups':>8} {'rows':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}"
+    )
+    for n_groups in group_counts:
+        df = make_region_frame(n_groups, n_quarters=12)
+        df["quarter_key"] = [parse_quarter_label(q) for q in df["quarter_year"]]
+        df = add_qoq_changes(df, ["region_name"])
+
+        vectorized = time_call(add_trend_columns, df, ["region_name"])
+        if n_groups <= legacy_limit:
+            legacy = time_call(legacy_region_trends, df, repeat=1)
+            legacy_text = f"{legacy:12.4f}"
+            speedup_text = f"{legacy / vectorized:7.1f}x"
+        else:
+            legacy_text = f"{'skipped':>12}"
+            speedup_text = f"{'-':>8}"
+
+        print(
+            f"{n_groups:>8} {len(df):>8} {legacy_text} {vectorized:15.4f} {speedup_text}"
+        )
+
+
+def make_raw_frame(n_rows, n_tenants=20, n_locations=400, seed=0):
+    """Build a raw monthly extract with the same columns as the sample CSV."""
+    rng = np.random.default_rng(seed)
+    location_ids = rng.integers(0, n_locations, n_rows)
+    months = pd.date_range("2022-01-01", periods=36, freq="MS")
+
+    data = {
+        "tenant_name": pd.Categorical.from_codes(
+            location_ids % n_tenants, [f"Tenant {i}" for i in range(n_tenants)]
+        ),
+        "location_name": pd.Categorical.from_codes(
+            location_ids, [f"Location {i}" for i in range(n_locations)]
+        ),
+        "region_name": pd.Categorical.from_codes(
+            location_ids % 50, [f"Region {i}" for i in range(50)]
+        ),
+        "dt_month": months[rng.integers(0, len(months), n_rows)].strftime("%Y-%m-%d"),
+    }
+    for col in METRIC_COLUMNS:
+        data[col] = rng.integers(1, 10000, n_rows).astype(np.float32)
+    return pd.DataFrame(data)
+
+
+def bench_io(n_rows, chunksize):
+    print(f"Generating {n_rows:,} synthetic rows...")
+    df = make_raw_frame(n_rows)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "extract.csv")
+        parquet_path = os.path.join(tmp_dir, "extract.parquet")
+        df.to_csv(csv_path, index=False)
+        df.to_parquet(parquet_path)
+        del df
+
+        filters = {"tenants": ["Tenant 0", "Tenant 1"], "start_date": "2023-01-01"}
+        cases = [
+            ("csv", csv_path, {}),
+            ("parquet", parquet_path, {}),
+            ("csv, 2 tenants + date range", csv_path, filters),
+            ("parquet, 2 tenants + date range", parquet_path, filters),
+        ]
+
+        print(f"{'input':<34} {'size (MB)':>10} {'load + aggregate (s)':>21}")
+        for name, path, kwargs in cases:
+            start = time.perf_counter()
+            DataProcessor(path, chunksize=chunksize, **kwargs).process_file()
+            elapsed = time.perf_counter() - start
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"{name:<34} {size_mb:>10.1f} {elapsed:>21.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    qoq_parser = subparsers.add_parser("qoq")
+    qoq_parser.add_argument(
+        "--groups", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    qoq_parser.add_argument(
+        "--legacy-limit",
+        type=int,
+        default=5000,
+        help="Skip the legacy loop above this many groups",
+    )
+
+    io_parser = subparsers.add_parser("io")
+    io_parser.add_argument("--rows", type=int, default=10_000_000)
+    io_parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=1_000_000,
+        help="Rows per chunk, so the benchmark fits in a small container",
+    )
+
+    trends_parser = subparsers.add_parser("trends")
+    trends_parser.add_argument(
+        "--groups", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    trends_parser.add_argument(
+        "--legacy-limit",
+        type=int,
+        default=1000,
+        help="Skip the legacy loop above this many groups",
+    )
+
+    args = parser.parse_args()
+    if args.benchmark == "qoq":
+        bench_qoq(args.groups, args.legacy_limit)
+    elif args.benchmark == "trends":
+        bench_trends(args.groups, args.legacy_limit)
+    else:
+        bench_io(args.rows, args.chunksize)
@@ -0,0 +1,117 @@
+"""
+Benchmark script for the metric engine.
+
+  compute  Compares the original hard-coded pandas ratios with the compiled
+           METRIC_DEFINITIONS formulas as the number of aggregated rows grows.
+  subset   Compares load + aggregate time for every metric against only the
+           metrics a report needs, whose input columns are all that is read.
+
+Usage:
+  python bench_metric_engine.py compute [--rows 1000 100000 10000000]
+  python bench_metric_engine.py subset [--rows 5000000]
+"""
+
+import os
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from data_processor import METRIC_COLUMNS, METRIC_ENGINE, DataProcessor
+from bench_data_processor import make_raw_frame, time_call
+
+
+def make_sums_frame(n_rows, seed=0):
+    """Build a frame of summed metric columns like DataProcessor's aggregates."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({col: rng.uniform(0, 10000, n_rows) for col in METRIC_COLUMNS})
+
+
+def legacy_process_metrics(data):
+    """The original hard-coded ratios, kept here for comparison."""
+    data = data.copy()
+    data["primetime_utilization_pct"] = data["ptu_num"] / data["ptu_den"]
+    data["add_on_pct"] = data["add_on_num"] / data["add_on_den"]
+    data["turnover_time"] = data["turnover_num"] / data["turnover_den"]
+    data["fcots_pct"] = data["fcots_num"] / data["fcots_den"]
+    data["cancel_rate_pct"] = data["cancel_rate_num"] / data["cancel_rate_den"]
+    return data
+
+
+# The ratios legacy_process_metrics computes, so both do the same work
+LEGACY_METRICS = [
+    "primetime_utilization_pct",
+    "add_on_pct",
+    "turnover_time",
+    "fcots_pct",
+    "cancel_rate_pct",
+]
+
+
+def engine_process_metrics(data):
+    """DataProcessor.process_metrics with the compiled formulas."""
+    data = data.copy()
+    for metric, values in METRIC_ENGINE.evaluate(data, LEGACY_METRICS).items():
+        data[metric] = values
+    return data
+
+
+def bench_compute(row_counts):
+    print(f"{'rows':>10} {'hard-coded (s)':>15} {'compiled (s)':>13} {'ratio':>7}")
+    for n_rows in row_counts:
+        df = make_sums_frame(n_rows)
+        legacy = time_call(legacy_process_metrics, df)
+        compiled = time_call(engine_process_metrics, df)
+        print(f"{n_rows:>10} {legacy:15.4f} {compiled:13.4f} {legacy / compiled:6.2f}x")
+
+
+def bench_subset(n_rows, chunksize):
+    print(f"Generating {n_rows:,} synthetic rows...")
+    df = make_raw_frame(n_rows)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = []
+        for ext in ("csv", "parquet"):
+            path = os.path.join(tmp_dir, f"extract.{ext}")
+            if ext == "csv":
+                df.to_csv(path, index=False)
+            else:
+                df.to_parquet(path)
+            cases.append((f"{ext}, every metric", path, None))
+            cases.append(
+                (f"{ext}, fcots_pct + case_volume", path, ["fcots_pct", "case_volume"])
+            )
+        del df
+
+        print(f"{'input':<34} {'columns read':>13} {'load + aggregate (s)':>21}")
+        for name, path, metrics in cases:
+            start = time.perf_counter()
+            processor = DataProcessor(path, chunksize=chunksize, metrics=metrics)
+            processor.process_file()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<34} {len(processor.metric_columns):>13} {elapsed:>21.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    compute_parser = subparsers.add_parser("compute")
+    compute_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[1000, 100_000, 10_000_000]
+    )
+
+    subset_parser = subparsers.add_parser("subset")
+    subset_parser.add_argument("--rows", type=int, default=5_000_000)
+    subset_parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=1_000_000,
+        help="Rows per chunk, so the benchmark fits in a small container",
+    )
+
+    args = parser.parse_args()
+    if args.benchmark == "compute":
+        bench_compute(args.rows)
+    else:
+        bench_subset(args.rows, args.chunksize)
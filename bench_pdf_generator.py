@@ -0,0 +1,107 @@
+"""
+Benchmark script for markdown-to-PDF rendering.
+
+Builds a long multi-tenant executive summary (headings, paragraphs, nested
+lists and metric tables for every tenant) and reports markdown conversion
+and full PDF render times alongside the page count. 80 tenants is about
+50 pages.
+
+Usage:
+  python bench_pdf_generator.py [--tenants 5 20 80] [--repeat 3]
+"""
+
+import argparse
+import re
+import time
+from pdf_generator import PDFGenerator
+
+METRICS = [
+    ("Turnover Time", "min"),
+    ("First Case On-Time Start", "%"),
+    ("Primetime Utilization", "%"),
+    ("Block Utilization", "%"),
+    ("Case Volume", "cases"),
+]
+
+
+def tenant_section(tenant):
+    """Return one tenant's section of a multi-tenant report."""
+    rows = "\n".join(
+        f"| {name} | {40 + i * 3.1:.1f} | {41 + i * 2.7:.1f} | {i - 2.4:+.1f}% |"
+        for i, (name, _) in enumerate(METRICS)
+    )
+    regions = "\n".join(
+        f"   - **Region {r}**: turnover time changed by *{r * 1.3 - 2:.1f}%* "
+        f"after the `{r}`-room pilot & staffing review."
+        for r in range(1, 5)
+    )
+    return f"""
+## Tenant {tenant}: Key Findings
+
+Tenant {tenant} improved **first case on-time starts** quarter over quarter while
+turnover time rose in two regions. Block release policies and staffing
+shortages remain the main drivers discussed in meeting notes.
+
+| Metric | Q3 2024 | Q4 2024 | QoQ |
+|---|---:|---:|---:|
+{rows}
+
+### Regional Highlights
+
+1. Improvements
+{regions}
+2. Risks
+   - Turnover time increased in the two largest regions.
+   - Cancellation rate is above the network benchmark.
+
+### Recommendations
+
+- Expand the block release pilot to underused rooms.
+- Review staffing for late first cases, especially on Mondays.
+- Track the EHR go-live impact on turnover for two more quarters.
+"""
+
+
+def build_report(tenants):
+    sections = "\n".join(tenant_section(t) for t in range(1, tenants + 1))
+    return f"""# Executive Summary
+
+This report covers {tenants} tenants for **Q4 2024** compared with Q3 2024.
+{sections}"""
+
+
+def bench(tenant_counts, repeat):
+    print(
+        f"{'tenants':>8} {'pages':>6} {'flowables':>10} "
+        f"{'convert (ms)':>13} {'render (ms)':>12}"
+    )
+    for tenants in tenant_counts:
+        markdown_content = build_report(tenants)
+        generator = PDFGenerator("reports")
+        # Warm up the markdown parser and fonts
+        generator.render_pdf_bytes(markdown_content)
+
+        convert_times, render_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            flowables = generator._convert_markdown_to_reportlab(markdown_content)
+            convert_times.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            pdf_bytes = generator.render_pdf_bytes(markdown_content)
+            render_times.append((time.perf_counter() - start) * 1000)
+
+        pages = len(re.findall(rb"/Type /Page\b", pdf_bytes))
+        print(
+            f"{tenants:>8} {pages:>6} {len(flowables):>10} "
+            f"{min(convert_times):>13.1f} {min(render_times):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tenants", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bench(args.tenants, args.repeat)
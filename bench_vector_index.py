@@ -0,0 +1,77 @@
+"""
+Benchmark script for the meeting notes / news vector index.
+
+Builds flat indexes of increasing size from random unit vectors and reports
+open time and single-query search latency, to show when a flat scan stops
+being fast enough.
+
+Usage:
+  python bench_vector_index.py [--sizes 1000 10000 100000 250000] [--dim 1536]
+"""
+
+import argparse
+import tempfile
+import time
+import numpy as np
+from sources import Document
+from vector_index import VectorIndex
+
+
+class RandomEmbedder:
+    """Random unit vectors; search cost doesn't depend on the vector values."""
+
+    def __init__(self, dim, seed=0):
+        self.dim = dim
+        self.name = f"random-{dim}"
+        self.rng = np.random.default_rng(seed)
+
+    def embed(self, texts):
+        vectors = self.rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench(sizes, dim, queries):
+    print(
+        f"{'chunks':>8} {'size (MB)':>10} {'build (s)':>10} {'open (s)':>9} "
+        f"{'p50 query (ms)':>15} {'p95 query (ms)':>15}"
+    )
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            embedder = RandomEmbedder(dim)
+            documents = [Document(f"note_{i}.md", f"note {i}") for i in range(size)]
+
+            start = time.perf_counter()
+            VectorIndex(tmp_dir, embedder).add_documents("meeting_notes", documents)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = VectorIndex(tmp_dir, embedder)
+            index.search(["warm up"], k=5)
+            opened = time.perf_counter() - start
+
+            latencies = []
+            for i in range(queries):
+                start = time.perf_counter()
+                index.search([f"query {i}"], k=5, source="meeting_notes")
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            size_mb = size * dim * 4 / 1024 / 1024
+            print(
+                f"{size:>8} {size_mb:>10.1f} {build:>10.2f} {opened:>9.2f} "
+                f"{np.percentile(latencies, 50):>15.2f} "
+                f"{np.percentile(latencies, 95):>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 250000]
+    )
+    parser.add_argument(
+        "--dim", type=int, default=1536, help="text-embedding-3-small returns 1536"
+    )
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    bench(args.sizes, args.dim, args.queries)
@@ -0,0 +1,429 @@
+"""
+Chart renderer module for ROI Automation Dashboard.
+This module handles building quarter-trend and region-comparison charts from
+the processed metric data, rendering them with matplotlib's Agg backend on a
+process pool and caching the PNGs by a hash of the plotted data.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from io import BytesIO
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from data_processor import QOQ_METRICS
+from metric_definitions import METRIC_DEFINITIONS
+from prompt_serializer import quarter_sort_key
+
+# Bump when the chart styling changes so cached PNGs are re-rendered
+CHART_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "charts")
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_BUDGET_SECONDS = 5.0
+DEFAULT_MAX_TREND_REGIONS = 8
+
+FIGURE_WIDTH = 6.5  # Inches, the PDF's text width
+TREND_HEIGHT = 3.0
+CUSTOMER_LABEL = "All regions"
+
+# A rendered chart; width and height are in inches
+Chart = namedtuple("Chart", ["key", "title", "png", "width", "height"])
+
+
+def metric_title(metric):
+    """Return a readable title for a metric column."""
+    definition = METRIC_DEFINITIONS.get(metric)
+    if definition:
+        return definition["description"]
+    return metric.replace("_pct", " %").replace("_", " ").title()
+
+
+def is_percentage(metric):
+    """Ratio metrics (QoQ change in points) are plotted as percentages."""
+    return QOQ_METRICS.get(metric) == "diff"
+
+
+def _value(record, metric, scale):
+    value = record.get(metric)
+    if value is None or value != value:  # Missing or NaN
+        return None
+    return round(float(value) * scale, 4)
+
+
+def _sort_value(record, metric):
+    value = _value(record, metric, 1)
+    return float("-inf") if value is None else value
+
+
+def build_chart_specs(
+    customer_data,
+    region_data,
+    quarter=None,
+    metrics=None,
+    max_trend_regions=DEFAULT_MAX_TREND_REGIONS,
+):
+    """
+    Return JSON-serializable chart specs for the processed data, most
+    important first: one quarter-trend chart per metric (all regions plus the
+    largest regions by case volume), then one region-comparison chart per
+    metric for the focus quarter against the one before it.
+    """
+    quarters = sorted(
+        {record["quarter_year"] for record in customer_data}, key=quarter_sort_key
+    )
+    if quarter in quarters:
+        # Later quarters may be partial, so trends end at the focus quarter
+        quarters = quarters[: quarters.index(quarter) + 1]
+    if not quarters:
+        return []
+    focus = quarters[-1]
+    previous = quarters[-2] if len(quarters) > 1 else None
+
+    if metrics is None:
+        metrics = [metric for metric in QOQ_METRICS if metric in customer_data[0]]
+
+    customer_by_quarter = {record["quarter_year"]: record for record in customer_data}
+    region_by_key = {
+        (record["region_name"], record["quarter_year"]): record
+        for record in region_data
+    }
+    focus_regions = [
+        record for record in region_data if record["quarter_year"] == focus
+    ]
+    focus_regions.sort(key=lambda record: -(record.get("case_volume") or 0))
+    trend_regions = [record["region_name"] for record in focus_regions]
+    trend_regions = trend_regions[:max_trend_regions]
+
+    trend_specs = []
+    comparison_specs = []
+    for metric in metrics:
+        scale = 100 if is_percentage(metric) else 1
+        series = {
+            CUSTOMER_LABEL: [
+                _value(customer_by_quarter.get(q, {}), metric, scale) for q in quarters
+            ]
+        }
+        for region in trend_regions:
+            series[region] = [
+                _value(region_by_key.get((region, q), {}), metric, scale)
+                for q in quarters
+            ]
+        trend_specs.append(
+            {
+                "kind": "trend",
+                "metric": metric,
+                "title": f"{metric_title(metric)} by quarter",
+                "percent": scale == 100,
+                "quarters": quarters,
+                "series": series,
+            }
+        )
+
+        if focus_regions:
+            # Highest value first, missing values last
+            regions = sorted(
+                (record["region_name"] for record in focus_regions),
+                key=lambda r: -_sort_value(region_by_key[(r, focus)], metric),
+            )
+            comparison_specs.append(
+                {
+                    "kind": "comparison",
+                    "metric": metric,
+                    "title": f"{metric_title(metric)} by region, {focus}",
+                    "percent": scale == 100,
+                    "regions": regions,
+                    "quarter": focus,
+                    "values": [
+                        _value(region_by_key[(r, focus)], metric, scale)
+                        for r in regions
+                    ],
+                    "previous_quarter": previous,
+                    "previous_values": [
+                        _value(region_by_key.get((r, previous), {}), metric, scale)
+                        for r in regions
+                    ],
+                }
+            )
+
+    return trend_specs + comparison_specs
+
+
+def chart_key(spec):
+    """Return the cache key for a chart spec (a hash of its data and style)."""
+    payload = json.dumps([CHART_VERSION, spec], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chart_size(spec):
+    """Return the (width, height) of a chart in inches."""
+    if spec["kind"] == "comparison":
+        # Comparison charts grow with the number of regions
+        return FIGURE_WIDTH, min(9.0, max(2.2, 1.2 + 0.28 * len(spec["regions"])))
+    return FIGURE_WIDTH, TREND_HEIGHT
+
+
+def render_chart_png(spec):
+    """Render a chart spec to PNG bytes. Runs in a worker process."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    figure = Figure(figsize=chart_size(spec), dpi=150, layout="constrained")
+    axes = figure.add_subplot()
+    axes.set_title(spec["title"], fontsize=10, loc="left")
+    axes.tick_params(labelsize=7)
+    axes.grid(alpha=0.3)
+    suffix = "%" if spec["percent"] else ""
+    value_axis = axes.xaxis if spec["kind"] == "comparison" else axes.yaxis
+    value_axis.set_major_formatter(FuncFormatter(lambda v, _: f"{v:,.4g}{suffix}"))
+
+    if spec["kind"] == "trend":
+        x = range(len(spec["quarters"]))
+        for name, values in spec["series"].items():
+            # Quarters with no value are skipped
+            points = [(i, v) for i, v in zip(x, values) if v is not None]
+            if not points:
+                continue
+            is_customer = name == CUSTOMER_LABEL
+            axes.plot(
+                [i for i, _ in points],
+                [v for _, v in points],
+                label=name,
+                linewidth=2.2 if is_customer else 1.0,
+                color="#4a6bff" if is_customer else None,
+                alpha=1.0 if is_customer else 0.7,
+                marker="o" if is_customer else None,
+                markersize=3,
+                zorder=3 if is_customer else 2,
+            )
+        axes.set_xticks(list(x), spec["quarters"], rotation=30, ha="right")
+        axes.legend(fontsize=6, ncol=3, frameon=False)
+    else:
+        y = range(len(spec["regions"]))
+        height = 0.4
+        if spec["previous_quarter"]:
+            axes.barh(
+                [i + height / 2 for i in y],
+                [v or 0 for v in spec["previous_values"]],
+                height,
+                color="#adb5bd",
+                label=spec["previous_quarter"],
+            )
+        axes.barh(
+            [i - height / 2 for i in y],
+            [v or 0 for v in spec["values"]],
+            height,
+            color="#4a6bff",
+            label=spec["quarter"],
+        )
+        axes.set_yticks(list(y), spec["regions"])
+        axes.invert_yaxis()
+        axes.set_axisbelow(True)
+        figure.legend(fontsize=6, ncol=2, frameon=False, loc="outside lower center")
+
+    buffer = BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def _load_matplotlib():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.figure  # noqa: F401
+
+
+class ChartRenderer:
+    """
+    Renders chart specs on a process pool, with PNGs cached on disk by
+    chart_key. A render that misses the time budget is left out of the
+    current report but still cached when it finishes, for the next one.
+    """
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_workers=None,
+        budget_seconds=DEFAULT_BUDGET_SECONDS,
+        max_entries=DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.budget_seconds = budget_seconds
+        self.max_entries = max_entries
+        self.pool = None
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.last_stats = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _read(self, key):
+        try:
+            with open(self._cache_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, png):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, self._cache_path(key))
+
+    def _prune(self):
+        entries = [
+            entry.path
+            for entry in os.scandir(self.cache_dir)
+            if entry.name.endswith(".png")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _store(self, key, png):
+        # Both render() and the done callback store a finished chart, so
+        # whichever runs first makes it visible to the next render
+        if not os.path.exists(self._cache_path(key)):
+            self._write(key, png)
+            self._prune()
+
+    def _get_pool(self):
+        # Callers hold self.lock
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.pool
+
+    def warm_up(self):
+        """Start the worker processes and load matplotlib before first use."""
+        with self.lock:
+            pool = self._get_pool()
+            for _ in range(self.max_workers):
+                pool.submit(_load_matplotlib)
+
+    def _submit(self, key, spec):
+        """Start rendering a chart, sharing any render of the same key."""
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                return future
+            future = self._get_pool().submit(render_chart_png, spec)
+            self.in_flight[key] = future
+
+        def store(done):
+            with self.lock:
+                self.in_flight.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                return
+            self._store(key, done.result())
+
+        future.add_done_callback(store)
+        return future
+
+    def render(self, specs, budget_seconds=None):
+        """
+        Return a Chart for each spec that is cached or renders within the
+        budget, in spec order.
+        """
+        budget = self.budget_seconds if budget_seconds is None else budget_seconds
+        deadline = time.perf_counter() + budget
+
+        charts = [None] * len(specs)
+        pending = {}
+        cached = 0
+        for i, spec in enumerate(specs):
+            key = chart_key(spec)
+            png = self._read(key)
+            if png is not None:
+                charts[i] = Chart(key, spec["title"], png, *chart_size(spec))
+                cached += 1
+            else:
+                pending[self._submit(key, spec)] = (i, key, spec)
+
+        failed = 0
+        if pending:
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.perf_counter()))
+            for future in done:
+                i, key, spec = pending[future]
+                try:
+                    png = future.result()
+                    self._store(key, png)
+                    charts[i] = Chart(key, spec["title"], png, *chart_size(spec))
+                except Exception as e:
+                    failed += 1
+                    print(f"Error rendering chart '{spec['title']}': {str(e)}")
+
+        rendered = [chart for chart in charts if chart is not None]
+        self.last_stats = {
+            "charts": len(specs),
+            "cached": cached,
+            "rendered": len(rendered) - cached,
+            "over_budget": len(specs) - len(rendered) - failed,
+            "failed": failed,
+        }
+        return rendered
+
+    def shutdown(self):
+        # The pool is joined without the lock, which its callbacks take
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+_shared_chart_renderer = None
+_shared_chart_renderer_lock = threading.Lock()
+
+
+def get_shared_chart_renderer():
+    """
+    Return the process-wide chart renderer configured by CHART_* env
+    variables, or None if charts are disabled.
+    """
+    global _shared_chart_renderer
+
+    if os.getenv("CHARTS_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+
+    with _shared_chart_renderer_lock:
+        if _shared_chart_renderer is None:
+            _shared_chart_renderer = ChartRenderer(
+                cache_dir=os.getenv("CHART_CACHE_DIR", DEFAULT_CACHE_DIR),
+                max_workers=int(os.getenv("CHART_WORKERS", 0)) or None,
+                budget_seconds=float(
+                    os.getenv("CHART_RENDER_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS)
+                ),
+            )
+        return _shared_chart_renderer
+
+
+def render_report_charts(customer_data, region_data, quarter=None):
+    """Return the charts for a report, or [] if charts are disabled."""
+    renderer = get_shared_chart_renderer()
+    if renderer is None or not customer_data:
+        return []
+
+    specs = build_chart_specs(
+        customer_data,
+        region_data,
+        quarter=quarter,
+        max_trend_regions=int(
+            os.getenv("CHART_MAX_TREND_REGIONS", DEFAULT_MAX_TREND_REGIONS)
+        ),
+    )
+    charts = renderer.render(specs)
+    print(f"Chart rendering: {renderer.last_stats}")
+    return charts
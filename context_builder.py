@@ -0,0 +1,147 @@
+"""
+Context builder module for ROI Automation Dashboard.
+This module handles choosing how much of each qualitative source (meeting
+notes, industry news) goes into the synthesis prompt: the raw text, the
+extracted summary, or a mix of both bounded by a token budget.
+"""
+
+import os
+from prompt_serializer import count_tokens
+
+RAW = "raw"
+SUMMARY = "summary"
+MIXED = "mixed"
+CONTEXT_MODES = (RAW, SUMMARY, MIXED)
+
+DEFAULT_CONTEXT_MODE = MIXED
+DEFAULT_TOKEN_BUDGET = 4000
+
+TRUNCATION_MARKER = "[...]"
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Return the leading paragraphs of text that fit in max_tokens."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    kept = []
+    used = count_tokens(TRUNCATION_MARKER)
+    for paragraph in text.split("\n\n"):
+        tokens = count_tokens(paragraph)
+        if used + tokens > max_tokens:
+            if not kept:
+                # A single oversized paragraph is cut at ~4 characters a
+                # token, then shortened until it really fits
+                cut = paragraph[: (max_tokens - used) * 4]
+                while cut and count_tokens(cut) > max_tokens - used:
+                    cut = cut[: len(cut) * 3 // 4]
+                kept.append(cut)
+            break
+        kept.append(paragraph)
+        used += tokens
+
+    return "\n\n".join(kept + [TRUNCATION_MARKER])
+
+
+def parse_context_modes(value, source_names):
+    """
+    Parse a mode setting into {source: mode}.
+
+    value is either one mode for every source ("summary") or per-source
+    overrides on top of the default ("mixed,meeting_notes:raw").
+    """
+    modes = dict.fromkeys(source_names, DEFAULT_CONTEXT_MODE)
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, mode = part.rpartition(":")
+        if mode not in CONTEXT_MODES:
+            raise ValueError(
+                f"Unknown context mode '{mode}', expected one of {CONTEXT_MODES}"
+            )
+        if name:
+            modes[name] = mode
+        else:
+            modes = dict.fromkeys(source_names, mode)
+    return modes
+
+
+def _mixed_context(raw_text, summary, allowance):
+    """Pick raw text, summary, or summary plus a raw excerpt within allowance."""
+    if count_tokens(raw_text) <= allowance:
+        # The whole document fits, so the summary would only repeat it
+        return RAW, raw_text
+    if summary is None:
+        return RAW, truncate_to_tokens(raw_text, allowance)
+
+    remaining = allowance - count_tokens(summary)
+    excerpt = truncate_to_tokens(raw_text, remaining)
+    if not excerpt:
+        # The summary alone may not fit either
+        return SUMMARY, truncate_to_tokens(summary, allowance)
+    return MIXED, f"{summary}\n\nExcerpt from the original:\n\n{excerpt}"
+
+
+def assemble_context(sources, modes, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Build the synthesis context for each source.
+
+    sources maps a source name to (raw_text, summary); summary is None when
+    extraction failed, in which case the raw text is used instead. modes maps
+    each source to raw, summary or mixed. Raw and summary sources are sent as
+    is; whatever is left of token_budget is shared between the mixed sources,
+    with any allowance a small source doesn't need passed on to the others.
+
+    Returns ({source: text}, accounting) where accounting records, per
+    source, the mode used and the raw, summary and sent token counts.
+    """
+    contexts = {}
+    accounting = {}
+
+    def record(name, mode, text):
+        raw_text, summary = sources[name]
+        contexts[name] = text
+        accounting[name] = {
+            "mode": mode,
+            "raw_tokens": count_tokens(raw_text),
+            "summary_tokens": count_tokens(summary) if summary else 0,
+            "sent_tokens": count_tokens(text),
+        }
+
+    mixed = []
+    for name, (raw_text, summary) in sources.items():
+        mode = modes.get(name, DEFAULT_CONTEXT_MODE)
+        if mode == MIXED:
+            mixed.append(name)
+        elif mode == SUMMARY and summary is not None:
+            record(name, SUMMARY, summary)
+        else:
+            record(name, RAW, raw_text)
+
+    # Smallest documents first, so their unused share flows to larger ones
+    remaining = token_budget - sum(a["sent_tokens"] for a in accounting.values())
+    mixed.sort(key=lambda name: count_tokens(sources[name][0]))
+    for i, name in enumerate(mixed):
+        allowance = max(0, remaining) // (len(mixed) - i)
+        mode, text = _mixed_context(*sources[name], allowance)
+        record(name, mode, text)
+        remaining -= accounting[name]["sent_tokens"]
+
+    accounting["total"] = {
+        "budget": token_budget,
+        "raw_tokens": sum(count_tokens(raw) for raw, _ in sources.values()),
+        "sent_tokens": sum(count_tokens(text) for text in contexts.values()),
+    }
+    return contexts, accounting
+
+
+def get_context_settings(source_names):
+    """Return (modes, token_budget) from the SYNTHESIS_CONTEXT_* env variables."""
+    modes = parse_context_modes(os.getenv("SYNTHESIS_CONTEXT_MODE"), source_names)
+    token_budget = int(
+        os.getenv("SYNTHESIS_CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+    )
+    return modes, token_budget
@@ -1,55 +1,418 @@
 """
 Simplified data processing module for ROI Automation Dashboard.
 This module handles loading, preprocessing, and aggregating CSV data at quarter level.
+Parquet, Feather and Arrow IPC files are read with column pruning and
+predicate pushdown.
 """
 
+import os
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+from metric_definitions import METRIC_DEFINITIONS
+from metric_engine import MetricEngine
+
+# Raw metric columns summed when aggregating to quarter level
+METRIC_COLUMNS = [
+    "add_on_num",
+    "add_on_den",
+    "case_volume",
+    "case_minutes",
+    "turnover_num",
+    "turnover_den",
+    "fcots_num",
+    "fcots_den",
+    "release_minutes",
+    "cancel_rate_num",
+    "cancel_rate_den",
+    "total_request_minutes",
+    "ptu_num",
+    "ptu_den",
+]
+
+# Metrics are computed from the METRIC_DEFINITIONS formulas, which may only
+# use the summed metric columns
+METRIC_ENGINE = MetricEngine(METRIC_DEFINITIONS, METRIC_COLUMNS)
+
+# Ratio metrics and the summed (numerator, denominator) columns they're
+# derived from
+RATIO_METRICS = METRIC_ENGINE.ratio_inputs()
+
+# Tenant -> region -> location hierarchy aggregated into the rollup cube.
+# Extracts without a tenant or location column are treated as one tenant or
+# one location per region
+HIERARCHY_COLUMNS = ["tenant_name", "region_name", "location_name"]
+MISSING_HIERARCHY_NAME = "Unknown"
+
+# Explicit dtypes for chunked reads: compact float32 metrics and categorical
+# names, so each chunk stays small while it is being aggregated
+STREAMING_DTYPES = {
+    **{col: "float32" for col in METRIC_COLUMNS},
+    "tenant_name": "category",
+    "region_name": "category",
+    "location_name": "category",
+}
+
+# Columnar file extensions and the pyarrow dataset format used to read them
+COLUMNAR_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "ipc",
+    ".ipc": "ipc",
+}
+
+# Bump whenever a change alters process_file output, so results cached by
+# processed_cache are recomputed rather than served stale
+PROCESSOR_VERSION = 7
+
+# Files larger than this are streamed in chunks rather than read eagerly
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+DEFAULT_CHUNKSIZE = 500_000
+
+# Quarter-over-quarter change reported for each output metric.
+# "pct_change" metrics get a relative % change, while "diff" metrics are
+# already ratios so their change is reported in percentage points.
+QOQ_METRICS = METRIC_ENGINE.qoq_changes()
+
+
+def quarter_key(dates) -> np.ndarray:
+    """
+    Return an integer quarter key (year * 4 + quarter - 1) for each date.
+    Keys sort chronologically and consecutive quarters differ by exactly one.
+    """
+    dates = pd.DatetimeIndex(dates)
+    return np.asarray(dates.year * 4 + dates.quarter - 1, dtype=np.int32)
+
+
+def month_key(dates) -> np.ndarray:
+    """
+    Return an integer month key (year * 12 + month - 1) for each date.
+    month_key // 3 is the date's quarter_key.
+    """
+    dates = pd.DatetimeIndex(dates)
+    return np.asarray(dates.year * 12 + dates.month - 1, dtype=np.int32)
+
+
+def format_quarter_key(keys) -> list:
+    """Return display strings like "Q4 2024" for integer quarter keys."""
+    return [f"Q{key % 4 + 1} {key // 4}" for key in np.asarray(keys)]
+
+
+def add_qoq_changes(
+    data: pd.DataFrame, group_cols=None, key_col="quarter_key"
+) -> pd.DataFrame:
+    """
+    Add a <metric>_qoq column for every metric in QOQ_METRICS that data has.
+    Rows must already be sorted chronologically within each group. All groups
+    and metrics are computed in one vectorized pass per change type. When
+    key_col is present, changes against a non-adjacent quarter (a gap in the
+    data) are left empty rather than compared across the gap.
+    """
+    metrics = [m for m in QOQ_METRICS if m in data.columns]
+    pct_cols = [m for m in metrics if QOQ_METRICS[m] == "pct_change"]
+    diff_cols = [m for m in metrics if QOQ_METRICS[m] == "diff"]
+
+    # One shift gives every group's previous quarter for every metric
+    shift_cols = metrics + [key_col] if key_col in data.columns else metrics
+    if group_cols:
+        previous = data.groupby(group_cols, sort=False)[shift_cols].shift()
+    else:
+        previous = data[shift_cols].shift()
+
+    changes = pd.concat(
+        [
+            (data[pct_cols] / previous[pct_cols] - 1) * 100,
+            (data[diff_cols] - previous[diff_cols]) * 100,
+        ],
+        axis=1,
+    )
+
+    # A change from zero is undefined, as in rollup.qoq_change
+    changes = changes.replace([np.inf, -np.inf], np.nan)
+    if key_col in data.columns:
+        changes = changes.where(previous[key_col] == data[key_col] - 1)
+
+    data = data.copy()
+    for metric in metrics:
+        data[f"{metric}_qoq"] = changes[metric]
+
+    return data
+
+
+def _fold_sums(total, part):
+    """Add a chunk's grouped sums into the running totals."""
+    if total is None:
+        return part
+    levels = list(range(part.index.nlevels))
+    return pd.concat([total, part]).groupby(level=levels, observed=True).sum()
 
 
 class DataProcessor:
-    def __init__(self, csv_file_path):
-        """Initialize the data processor with a CSV file path."""
-        self.csv_file_path = csv_file_path
-        self.raw_data = pd.read_csv(self.csv_file_path)
-
-    def preprocess_data(self):
-        """Preprocess the data for analysis."""
-
-        # Make a copy to avoid modifying the original data
-        df = self.raw_data.copy()
-
-        df["dt_month"] = pd.to_datetime(df["dt_month"])
-        # have column of quarter and year
-        df["quarter"] = df["dt_month"].dt.quarter
-        df["year"] = df["dt_month"].dt.year
-        df["quarter_year"] = (
-            "Q" + df["quarter"].astype(str) + " " + df["year"].astype(str)
+    def __init__(
+        self,
+        file_path=None,
+        chunksize=None,
+        tenants=None,
+        start_date=None,
+        end_date=None,
+        data=None,
+        metrics=None,
+        lazy=False,
+    ):
+        """
+        Initialize the data processor with a CSV, Parquet, Feather or Arrow path,
+        or with an already-loaded DataFrame passed as data.
+        If chunksize is given (or the file is larger than
+        STREAMING_THRESHOLD_BYTES), the file is streamed in chunks of that many
+        rows during preprocessing and never held in memory in full.
+        tenants, start_date and end_date restrict the rows that are aggregated;
+        for columnar files they are pushed down into the reader.
+        metrics limits the output to those METRIC_DEFINITIONS metrics, and
+        only their input columns are read.
+        If lazy is true, the constructor reads nothing: read_columns() can
+        then load just the columns it needs, and the full file is only read
+        if the data is aggregated.
+        """
+        self.file_path = file_path
+        self.metrics = METRIC_ENGINE.resolve(metrics)
+        self.metric_columns = METRIC_ENGINE.inputs(self.metrics)
+        self.tenants = list(tenants) if tenants else None
+        self.start_date = pd.Timestamp(start_date) if start_date else None
+        self.end_date = pd.Timestamp(end_date) if end_date else None
+        self.cube = None
+        self.monthly_sums = None
+        self._columns = None
+
+        if data is not None:
+            self.file_format = None
+            self.chunksize = None
+            self.raw_data = data
+            return
+
+        self.file_format = COLUMNAR_FORMATS.get(
+            os.path.splitext(file_path)[1].lower(), "csv"
         )
 
-        metric_cols = [
-            "add_on_num",
-            "add_on_den",
-            "case_volume",
-            "case_minutes",
-            "turnover_num",
-            "turnover_den",
-            "fcots_num",
-            "fcots_den",
-            "release_minutes",
-            "cancel_rate_num",
-            "cancel_rate_den",
-            "total_request_minutes",
-            "ptu_num",
-            "ptu_den",
+        if chunksize is None and (
+            os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES
+        ):
+            chunksize = DEFAULT_CHUNKSIZE
+        self.chunksize = chunksize
+
+        # In streaming mode the raw data is never loaded as a whole
+        self.raw_data = None if chunksize or lazy else self._read_all()
+
+    def _read_all(self):
+        """Read the whole file into a DataFrame."""
+        if self.file_format == "csv":
+            return pd.read_csv(self.file_path)
+
+        return self._columnar_scanner().to_table().to_pandas()
+
+    def _file_columns(self):
+        """Return the input's column names without reading its rows."""
+        if self._columns is None:
+            if self.file_format is None:
+                self._columns = list(self.raw_data.columns)
+            elif self.file_format == "csv":
+                self._columns = list(pd.read_csv(self.file_path, nrows=0).columns)
+            else:
+                dataset = ds.dataset(self.file_path, format=self.file_format)
+                self._columns = dataset.schema.names
+        return self._columns
+
+    def _select_columns(self, extra_columns=()):
+        """
+        Return the month, hierarchy and needed metric columns plus
+        extra_columns, leaving out hierarchy columns the input doesn't have.
+        Raises ValueError if a metric's input columns are missing.
+        """
+        available = set(self._file_columns())
+        missing = [col for col in self.metric_columns if col not in available]
+        if missing:
+            needed_by = [
+                name
+                for name in self.metrics
+                if set(METRIC_ENGINE.metrics[name].inputs) & set(missing)
+            ]
+            raise ValueError(
+                f"Input is missing columns {', '.join(missing)} needed for "
+                f"metrics {', '.join(needed_by)}"
+            )
+
+        columns = ["dt_month", *HIERARCHY_COLUMNS, *self.metric_columns]
+        columns += [col for col in extra_columns if col not in columns]
+        return [
+            col for col in columns if col in available or col not in HIERARCHY_COLUMNS
         ]
 
-        for col in metric_cols:
-            df[col] = df[col].astype(float)
+    def read_columns(self, extra_columns=()):
+        """
+        Read only the month, hierarchy and metric columns (plus extra_columns)
+        with compact dtypes. Columnar filters are pushed down into the reader.
+        """
+        columns = self._select_columns(extra_columns)
+        if self.file_format is None:
+            return self.raw_data[columns]
+
+        if self.file_format == "csv":
+            return pd.read_csv(
+                self.file_path,
+                usecols=columns,
+                dtype={k: v for k, v in STREAMING_DTYPES.items() if k in columns},
+            )
+
+        return (
+            self._columnar_scanner(extra_columns=extra_columns).to_table().to_pandas()
+        )
+
+    def _iter_chunks(self):
+        """Yield the file as DataFrames of at most chunksize rows."""
+        if self.file_format == "csv":
+            yield from pd.read_csv(
+                self.file_path,
+                usecols=self._select_columns(),
+                dtype=STREAMING_DTYPES,
+                chunksize=self.chunksize,
+            )
+            return
+
+        for batch in self._columnar_scanner(self.chunksize).to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def _columnar_scanner(self, batch_size=None, extra_columns=()):
+        """
+        Build a scanner over a columnar file that reads only the grouping keys
+        and metric columns, with tenant and date filters pushed down.
+        """
+        dataset = ds.dataset(self.file_path, format=self.file_format)
+        schema = dataset.schema
+
+        columns = self._select_columns(extra_columns)
+        filters = []
 
-        customer_df = df.groupby(["quarter_year"])[metric_cols].sum().reset_index()
+        if self.tenants:
+            filters.append(ds.field("tenant_name").isin(self.tenants))
+
+        # Dates can only be pushed down when dt_month is stored as a date type;
+        # string months are filtered after parsing in _aggregate
+        dt_type = schema.field("dt_month").type
+        if pa.types.is_timestamp(dt_type) or pa.types.is_date(dt_type):
+            if self.start_date is not None:
+                filters.append(
+                    ds.field("dt_month") >= pa.scalar(self.start_date, dt_type)
+                )
+            if self.end_date is not None:
+                filters.append(
+                    ds.field("dt_month") <= pa.scalar(self.end_date, dt_type)
+                )
+
+        scan_filter = None
+        for expression in filters:
+            scan_filter = (
+                expression if scan_filter is None else scan_filter & expression
+            )
+
+        options = {"batch_size": batch_size} if batch_size else {}
+        return dataset.scanner(columns=columns, filter=scan_filter, **options)
+
+    def _aggregate(self, df):
+        """
+        Sum the metric columns per month, tenant, region and location. The
+        rollup cube's quarterly leaves are summed from these, and the
+        monthly series are kept for anomaly detection.
+        """
+        # Integer month key used for grouping and chronological sorting.
+        # Only the distinct months are parsed, then mapped back to each row
+        month_codes, months = pd.factorize(df["dt_month"])
+        month_dates = pd.DatetimeIndex(pd.to_datetime(months))
+
+        # Row filters that weren't (or couldn't be) applied by the reader
+        keep_month = np.ones(len(month_dates), dtype=bool)
+        if self.start_date is not None:
+            keep_month &= month_dates >= self.start_date
+        if self.end_date is not None:
+            keep_month &= month_dates <= self.end_date
+        keep = keep_month[month_codes]
+        if self.tenants and "tenant_name" in df.columns:
+            keep &= df["tenant_name"].isin(self.tenants).to_numpy()
+        if not keep.all():
+            df = df[keep]
+            month_codes = month_codes[keep]
+
+        keys = pd.Series(
+            month_key(month_dates)[month_codes],
+            index=df.index,
+            name="month_key",
+        )
+
+        # Missing hierarchy columns and names are grouped as one "Unknown"
+        groups = [keys]
+        for column in HIERARCHY_COLUMNS:
+            if column in df.columns:
+                groups.append(df[column])
+            else:
+                groups.append(
+                    pd.Series(MISSING_HIERARCHY_NAME, index=df.index, name=column)
+                )
+
+        # Sum in float64 so compact float32 inputs keep precision in the totals
+        metrics = df[self.metric_columns].astype(np.float64)
+        return metrics.groupby(groups, observed=True, dropna=False).sum()
+
+    def _aggregate_chunks(self):
+        """Stream the file in chunks, folding each into running leaf sums."""
+        leaf_sums = None
+        for chunk in self._iter_chunks():
+            leaf_sums = _fold_sums(leaf_sums, self._aggregate(chunk))
+
+        if leaf_sums is None:
+            # Nothing matched the filters; return empty aggregates
+            return self._aggregate(
+                pd.DataFrame(columns=["dt_month", *self.metric_columns])
+            )
+
+        return leaf_sums
+
+    def build_cube(self):
+        """
+        Aggregate the data into a tenant -> region -> location by quarter
+        rollup cube (see rollup.RollupCube) in one pass over the rows. The
+        per-location monthly sums it is built from are kept as monthly_sums.
+        """
+        from rollup import RollupCube
+
+        if self.raw_data is None and not self.chunksize:
+            # A lazy processor reads the file on first use
+            self.raw_data = self._read_all()
+
+        if self.raw_data is None:
+            leaf_sums = self._aggregate_chunks()
+        else:
+            self._select_columns()  # Checks the metric inputs are present
+            leaf_sums = self._aggregate(self.raw_data)
+
+        self.monthly_sums = leaf_sums
+        self.cube = RollupCube.from_leaf_sums(leaf_sums)
+        return self.cube
+
+    def preprocess_data(self, cube=None, quarter_keys=None):
+        """
+        Preprocess the data for analysis. An already built cube can be given,
+        and quarter_keys limits the quarters that are computed.
+        """
+        if cube is None:
+            cube = self.build_cube()
+
+        # Regions with the same name in different tenants are combined
+        customer_df = cube.level_frame("total", quarter_keys)
         region_df = (
-            df.groupby(["quarter_year", "region_name"])[metric_cols].sum().reset_index()
+            cube.level_frame("region", quarter_keys)
+            .groupby(["quarter_key", "region_name"], as_index=False)[cube.columns]
+            .sum()
         )
 
         customer_processed_df = self.process_metrics(customer_df)
@@ -58,96 +421,60 @@ class DataProcessor:
         return customer_processed_df, region_processed_df
 
     def process_metrics(self, data: pd.DataFrame) -> pd.DataFrame:
-        data["primetime_utilization_pct"] = data["ptu_num"] / data["ptu_den"]
-        data["add_on_pct"] = data["add_on_num"] / data["add_on_den"]
-        data["turnover_time"] = data["turnover_num"] / data["turnover_den"]
-        data["fcots_pct"] = data["fcots_num"] / data["fcots_den"]
-        data["cancel_rate_pct"] = data["cancel_rate_num"] / data["cancel_rate_den"]
+        """Add the metrics computed from the summed columns in data."""
+        for metric, values in METRIC_ENGINE.evaluate(data, self.metrics).items():
+            data[metric] = values
 
         return data
 
-    def process_file(self) -> tuple[dict, dict]:
+    def process_frames(
+        self, cube=None, quarter_keys=None, trends=True
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
         """
-        Process the CSV file and return region and customer level dictionaries.
-        This is the main method to call from outside.
+        Process the data file and return the customer and region level
+        DataFrames that process_file turns into dictionaries. cube and
+        quarter_keys are passed on to preprocess_data. With trends, the
+        YoY, rolling and seasonally adjusted columns from
+        trends.add_trend_columns are added after the QoQ changes.
         """
 
-        customer_df, region_df = self.preprocess_data()
+        customer_df, region_df = self.preprocess_data(cube, quarter_keys)
 
-        customer_df = customer_df[
-            [
-                "quarter_year",
-                "case_volume",
-                "case_minutes",
-                "turnover_time",
-                "add_on_pct",
-                "cancel_rate_pct",
-                "primetime_utilization_pct",
-                "fcots_pct",
-            ]
-        ]
-        region_df = region_df[
-            [
-                "quarter_year",
-                "region_name",
-                "case_volume",
-                "case_minutes",
-                "turnover_time",
-                "add_on_pct",
-                "cancel_rate_pct",
-                "primetime_utilization_pct",
-                "fcots_pct",
-            ]
-        ]
+        customer_df = customer_df[["quarter_key", *self.metrics]]
+        region_df = region_df[["quarter_key", "region_name", *self.metrics]]
 
-        # Sort data by quarter_year to ensure chronological order
-        customer_df = customer_df.sort_values("quarter_year")
-        region_df = region_df.sort_values(["region_name", "quarter_year"])
+        # Sort data by quarter_key to ensure chronological order
+        customer_df = customer_df.sort_values("quarter_key")
+        region_df = region_df.sort_values(["region_name", "quarter_key"])
 
-        # Calculate quarter-over-quarter changes for customer data
-        customer_df["case_volume_qoq"] = customer_df["case_volume"].pct_change() * 100
-        customer_df["case_minutes_qoq"] = customer_df["case_minutes"].pct_change() * 100
-        customer_df["turnover_time_qoq"] = (
-            customer_df["turnover_time"].pct_change() * 100
+        # Calculate quarter-over-quarter changes. Region changes are grouped
+        # by region_name so they are calculated within each region
+        customer_df = add_qoq_changes(customer_df)
+        region_df = add_qoq_changes(region_df, ["region_name"])
+
+        if trends:
+            from trends import add_trend_columns
+
+            customer_df = add_trend_columns(customer_df)
+            region_df = add_trend_columns(region_df, ["region_name"])
+
+        # The display string is only built for the aggregated output rows
+        customer_df.insert(
+            0, "quarter_year", format_quarter_key(customer_df.pop("quarter_key"))
         )
-        customer_df["add_on_pct_qoq"] = (
-            customer_df["add_on_pct"].diff() * 100
-        )  # Percentage point change
-        customer_df["cancel_rate_pct_qoq"] = (
-            customer_df["cancel_rate_pct"].diff() * 100
-        )  # Percentage point change
-        customer_df["primetime_utilization_pct_qoq"] = (
-            customer_df["primetime_utilization_pct"].diff() * 100
-        )  # Percentage point change
-        customer_df["fcots_pct_qoq"] = (
-            customer_df["fcots_pct"].diff() * 100
-        )  # Percentage point change
-
-        # Calculate quarter-over-quarter changes for region data
-        # Group by region_name to ensure changes are calculated within each region
-        for region in region_df["region_name"].unique():
-            mask = region_df["region_name"] == region
-            region_df.loc[mask, "case_volume_qoq"] = (
-                region_df.loc[mask, "case_volume"].pct_change() * 100
-            )
-            region_df.loc[mask, "case_minutes_qoq"] = (
-                region_df.loc[mask, "case_minutes"].pct_change() * 100
-            )
-            region_df.loc[mask, "turnover_time_qoq"] = (
-                region_df.loc[mask, "turnover_time"].pct_change() * 100
-            )
-            region_df.loc[mask, "add_on_pct_qoq"] = (
-                region_df.loc[mask, "add_on_pct"].diff() * 100
-            )
-            region_df.loc[mask, "cancel_rate_pct_qoq"] = (
-                region_df.loc[mask, "cancel_rate_pct"].diff() * 100
-            )
-            region_df.loc[mask, "primetime_utilization_pct_qoq"] = (
-                region_df.loc[mask, "primetime_utilization_pct"].diff() * 100
-            )
-            region_df.loc[mask, "fcots_pct_qoq"] = (
-                region_df.loc[mask, "fcots_pct"].diff() * 100
-            )
+        region_df.insert(
+            0, "quarter_year", format_quarter_key(region_df.pop("quarter_key"))
+        )
+
+        return customer_df.reset_index(drop=True), region_df.reset_index(drop=True)
+
+    def process_file(self) -> tuple[dict, dict]:
+        """
+        Process the data file and return region and customer level dictionaries.
+        This is the main method to call from outside.
+        """
+        customer_df, region_df = self.process_frames()
+
         customer_dict = customer_df.to_dict(orient="records")
         region_dict = region_df.to_dict(orient="records")
 
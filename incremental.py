@@ -0,0 +1,223 @@
+"""
+Incremental aggregation module for ROI Automation Dashboard.
+This module handles keeping processed aggregates up to date as monthly
+extracts arrive: the rollup cube's sums are stored, each delivery's months
+are folded into them, and only the quarters the delivery touches are
+recomputed. Deliveries that repeat already loaded months are rejected.
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from data_processor import MISSING_HIERARCHY_NAME, DataProcessor
+from rollup import RollupCube, parse_quarter_label
+from trends import refresh_trend_columns
+
+DEFAULT_STATE_DIR = os.path.join("cache", "incremental")
+
+
+def delivered_months(frame):
+    """Return {tenant_name: set of "YYYY-MM"} for the rows of a delivery."""
+    if "tenant_name" in frame.columns:
+        tenants = frame["tenant_name"].astype(object)
+        tenants = tenants.where(tenants.notna(), MISSING_HIERARCHY_NAME).astype(str)
+    else:
+        tenants = pd.Series(MISSING_HIERARCHY_NAME, index=frame.index)
+
+    # Only the distinct months are parsed, as in DataProcessor._aggregate
+    month_codes, months = pd.factorize(frame["dt_month"])
+    labels = pd.DatetimeIndex(pd.to_datetime(months)).strftime("%Y-%m")
+    pairs = pd.DataFrame(
+        {"tenant_name": tenants.to_numpy(), "month": np.asarray(labels)[month_codes]}
+    ).drop_duplicates()
+
+    delivered = {}
+    for tenant, month in pairs.itertuples(index=False):
+        delivered.setdefault(tenant, set()).add(month)
+    return delivered
+
+
+def _replace_quarters(frame, part, quarter_keys, group_cols=()):
+    """
+    Return frame with the rows of quarter_keys replaced by part's, sorted
+    like DataProcessor.process_frames output.
+    """
+    keys = np.array([parse_quarter_label(q) for q in frame["quarter_year"]])
+    kept = frame[~np.isin(keys, list(quarter_keys))]
+    combined = pd.concat([kept, part], ignore_index=True)
+
+    combined["quarter_key"] = [parse_quarter_label(q) for q in combined["quarter_year"]]
+    combined = combined.sort_values([*group_cols, "quarter_key"])
+    return combined.drop(columns="quarter_key").reset_index(drop=True)
+
+
+class IncrementalAggregator:
+    """
+    Stored rollup cube, loaded months and processed customer and region
+    frames for a dataset that grows by monthly deliveries.
+
+    Every update is written to a new generation directory and published by
+    replacing the CURRENT file, so a failed update leaves the previous state
+    in place. Only one process should append to a state_dir at a time.
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR):
+        self.state_dir = state_dir
+        self.cube = None
+        self.months = {}  # tenant_name -> sorted "YYYY-MM" months loaded
+        self.customer_df = None
+        self.region_df = None
+        self.last_stats = {}
+        os.makedirs(state_dir, exist_ok=True)
+        self._load()
+
+    def _current_dir(self):
+        try:
+            with open(os.path.join(self.state_dir, "CURRENT")) as f:
+                return os.path.join(self.state_dir, f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        current_dir = self._current_dir()
+        if current_dir is None:
+            return
+
+        self.cube = RollupCube.load(os.path.join(current_dir, "cube.npz"))
+        with open(os.path.join(current_dir, "months.json")) as f:
+            self.months = json.load(f)
+        self.customer_df = pd.read_parquet(
+            os.path.join(current_dir, "customer.parquet")
+        )
+        self.region_df = pd.read_parquet(os.path.join(current_dir, "region.parquet"))
+
+    def _save(self):
+        """Write the state to a new generation and make it the current one."""
+        generation_dir = tempfile.mkdtemp(dir=self.state_dir, prefix="gen-")
+        self.cube.save(os.path.join(generation_dir, "cube.npz"))
+        with open(os.path.join(generation_dir, "months.json"), "w") as f:
+            json.dump(self.months, f)
+        self.customer_df.to_parquet(os.path.join(generation_dir, "customer.parquet"))
+        self.region_df.to_parquet(os.path.join(generation_dir, "region.parquet"))
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(os.path.basename(generation_dir))
+        os.replace(tmp_path, os.path.join(self.state_dir, "CURRENT"))
+
+        for entry in os.scandir(self.state_dir):
+            if entry.name.startswith("gen-") and entry.path != generation_dir:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def append(self, file_path=None, data=None):
+        """
+        Fold a delivery (a file path or a DataFrame) into the stored
+        aggregates and return the updated (customer_df, region_df).
+
+        Raises ValueError, leaving the state unchanged, if the delivery has
+        rows for a month already loaded for the same tenant.
+        """
+        start = time.perf_counter()
+        # Only the needed columns are read
+        frame = DataProcessor(file_path, data=data, lazy=True).read_columns()
+
+        delivered = delivered_months(frame)
+        overlaps = sorted(
+            f"{tenant} {month}"
+            for tenant, months in delivered.items()
+            for month in months & set(self.months.get(tenant, []))
+        )
+        if overlaps:
+            raise ValueError(
+                f"Delivery repeats {len(overlaps)} month(s) that were already "
+                f"loaded: {', '.join(overlaps[:10])}"
+            )
+        if not delivered:
+            return self.customer_df, self.region_df
+
+        processor = DataProcessor(data=frame)
+        delta = processor.build_cube()
+
+        if self.cube is None:
+            self.cube = delta
+            self.customer_df, self.region_df = processor.process_frames(self.cube)
+            recomputed = self.cube.quarter_keys.tolist()
+        else:
+            self.cube = self.cube.add(delta)
+
+            # The delivered quarters change, and so does the QoQ change of the
+            # quarter after each; their previous quarters are read for QoQ
+            changed = set(delta.quarter_keys.tolist())
+            recomputed = sorted(changed | {key + 1 for key in changed})
+            window = sorted(set(recomputed) | {key - 1 for key in changed})
+            customer_part, region_part = processor.process_frames(
+                self.cube, window, trends=False
+            )
+
+            labels = [parse_quarter_label(q) for q in customer_part["quarter_year"]]
+            customer_part = customer_part[np.isin(labels, recomputed)]
+            labels = [parse_quarter_label(q) for q in region_part["quarter_year"]]
+            region_part = region_part[np.isin(labels, recomputed)]
+
+            self.customer_df = _replace_quarters(
+                self.customer_df, customer_part, recomputed
+            )
+            self.region_df = _replace_quarters(
+                self.region_df, region_part, recomputed, ["region_name"]
+            )
+
+            # YoY, rolling and seasonal columns look further back than the
+            # window, so they are redone over the whole (small) frames
+            self.customer_df = refresh_trend_columns(self.customer_df)
+            self.region_df = refresh_trend_columns(self.region_df, ["region_name"])
+
+        for tenant, months in delivered.items():
+            self.months[tenant] = sorted(set(self.months.get(tenant, [])) | months)
+        self._save()
+
+        self.last_stats = {
+            "rows": len(frame),
+            "months": sum(len(months) for months in delivered.values()),
+            "quarters_recomputed": len(recomputed),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        print(
+            f"Appended {self.last_stats['rows']} rows "
+            f"({self.last_stats['months']} tenant months), recomputed "
+            f"{len(recomputed)} quarter(s) in {self.last_stats['seconds']}s"
+        )
+        return self.customer_df, self.region_df
+
+    def process_file(self):
+        """Return the current (customer_dict, region_dict), like DataProcessor."""
+        if self.cube is None:
+            return [], []
+        return (
+            self.customer_df.to_dict(orient="records"),
+            self.region_df.to_dict(orient="records"),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fold monthly extracts into stored aggregates in order."
+    )
+    parser.add_argument("file_paths", nargs="+", help="Extracts to append")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR)
+    args = parser.parse_args()
+
+    aggregator = IncrementalAggregator(args.state_dir)
+    for file_path in args.file_paths:
+        try:
+            aggregator.append(file_path)
+        except ValueError as e:
+            print(f"Skipped {file_path}: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Insight ranking module for ROI Automation Dashboard.
+This module handles finding the significant quarter-over-quarter movements in
+the processed metric data before anything is sent to the LLM, so the model
+gets a short, ranked list of exact findings instead of scanning every row.
+"""
+
+import numpy as np
+import pandas as pd
+from data_processor import QOQ_METRICS
+from metric_definitions import METRIC_DEFINITIONS
+
+# Minimum absolute QoQ change (in % or percentage points) worth reporting
+CUSTOMER_THRESHOLD = 5.0
+REGION_THRESHOLD = 10.0
+
+# Customer-level findings are given priority over region-level ones
+LEVEL_WEIGHTS = {"customer": 1.5, "region": 1.0}
+
+# Weight of the z-score against the series' own QoQ history in the score.
+# It is capped because a short, steady history makes any move look extreme
+Z_SCORE_WEIGHT = 0.5
+Z_SCORE_CAP = 3.0
+
+CUSTOMER_LABEL = "All regions"
+
+# Trend columns (see trends.add_trend_columns) carried into each finding
+TREND_FIELDS = {"_qoq_sa": "seasonal_change", "_yoy": "yoy_change"}
+
+
+def _long_format(records, level):
+    """Melt processed records to one row per (region, quarter, metric)."""
+    df = pd.DataFrame.from_records(records)
+    if df.empty:
+        return pd.DataFrame()
+
+    if "region_name" not in df.columns:
+        df["region_name"] = CUSTOMER_LABEL
+
+    quarter = df["quarter_year"].str.extract(r"Q(\d) (\d{4})").astype(int)
+    df["quarter_key"] = quarter[1] * 4 + quarter[0] - 1
+
+    metrics = [m for m in QOQ_METRICS if m in df.columns and f"{m}_qoq" in df]
+    ids = ["region_name", "quarter_key", "quarter_year"]
+    values = df.melt(ids, metrics, var_name="metric", value_name="value")
+    changes = df.melt(
+        ids,
+        [f"{m}_qoq" for m in metrics],
+        var_name="metric",
+        value_name="change",
+    )
+    values["change"] = changes["change"].to_numpy()
+    # Column by column, like melt; records without trend columns get NaN
+    for suffix, field in TREND_FIELDS.items():
+        columns = [f"{m}{suffix}" for m in metrics]
+        values[field] = df.reindex(columns=columns).to_numpy(float).ravel(order="F")
+    values["level"] = level
+    return values
+
+
+def _add_history_stats(long_df):
+    """Add previous-quarter values and a z-score of each change vs. history."""
+    long_df = long_df.sort_values(["level", "region_name", "metric", "quarter_key"])
+    series = long_df.groupby(["level", "region_name", "metric"], sort=False)
+
+    long_df["previous_value"] = series["value"].shift()
+    long_df["previous_quarter"] = series["quarter_year"].shift()
+
+    # Running mean and sample std of the changes strictly before each
+    # quarter, from cumulative sums so every series is done in one pass
+    prior = series["change"].shift()
+    keys = [long_df["level"], long_df["region_name"], long_df["metric"]]
+    count = prior.notna().groupby(keys).cumsum()
+    total = prior.fillna(0).groupby(keys).cumsum()
+    total_sq = (prior**2).fillna(0).groupby(keys).cumsum()
+
+    mean = total / count
+    variance = (total_sq - count * mean**2) / (count - 1)
+    std = np.sqrt(variance.clip(lower=0))
+
+    z_score = (long_df["change"] - mean) / std.where(std > 0)
+    long_df["z_score"] = z_score.where(count >= 2)
+    return long_df
+
+
+def rank_findings(
+    customer_data,
+    region_data,
+    top_k=10,
+    quarter=None,
+    customer_threshold=CUSTOMER_THRESHOLD,
+    region_threshold=REGION_THRESHOLD,
+):
+    """
+    Return the top_k significant QoQ movements into quarter (a label like
+    "Q4 2024"), or into the latest quarter when it is not given or not in
+    the data.
+
+    A movement is significant when its change passes the level's threshold,
+    using the seasonally adjusted change where there is an earlier year to
+    adjust by, so a normal seasonal dip is not reported. Each finding is
+    labelled improved/declined from the sign of the change it was judged on
+    and the metric's goal direction in METRIC_DEFINITIONS ("changed" for
+    metrics without one), and scored by how far it passes the threshold plus
+    how unusual it is against that region's own QoQ history.
+    """
+    long_df = pd.concat(
+        [
+            _long_format(customer_data, "customer"),
+            _long_format(region_data, "region"),
+        ],
+        ignore_index=True,
+    )
+    if long_df.empty:
+        return []
+
+    long_df = _add_history_stats(long_df)
+    if quarter is None or not (long_df["quarter_year"] == quarter).any():
+        quarter = long_df.loc[long_df["quarter_key"].idxmax(), "quarter_year"]
+    latest = long_df[long_df["quarter_year"] == quarter]
+
+    threshold = latest["level"].map(
+        {"customer": customer_threshold, "region": region_threshold}
+    )
+    # The same change decides significance and direction
+    judged_change = latest["seasonal_change"].fillna(latest["change"])
+    judged = judged_change.abs()
+    findings = latest[judged >= threshold].copy()
+    if findings.empty:
+        return []
+
+    weight = findings["level"].map(LEVEL_WEIGHTS)
+    findings["score"] = weight * (
+        judged[findings.index] / threshold[findings.index]
+        + Z_SCORE_WEIGHT * findings["z_score"].abs().clip(upper=Z_SCORE_CAP).fillna(0)
+    )
+
+    goal = findings["metric"].map(
+        lambda metric: METRIC_DEFINITIONS.get(metric, {}).get("goal", "neutral")
+    )
+    change = judged_change[findings.index]
+    better = np.where(goal == "lower", change < 0, change > 0)
+    findings["goal"] = goal
+    findings["direction"] = np.where(
+        goal == "neutral", "changed", np.where(better, "improved", "declined")
+    )
+    findings["unit"] = findings["metric"].map(
+        lambda metric: "%" if QOQ_METRICS[metric] == "pct_change" else "pp"
+    )
+
+    findings = findings.sort_values(
+        ["score", "level", "region_name", "metric"],
+        ascending=[False, True, True, True],
+    ).head(top_k)
+
+    columns = [
+        "level",
+        "region_name",
+        "metric",
+        "previous_quarter",
+        "quarter_year",
+        "previous_value",
+        "value",
+        "change",
+        "seasonal_change",
+        "yoy_change",
+        "unit",
+        "goal",
+        "direction",
+        "z_score",
+        "score",
+    ]
+    return findings[columns].to_dict(orient="records")
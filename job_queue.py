@@ -0,0 +1,264 @@
+"""
+Job queue module for ROI Automation Dashboard.
+This module handles running report generation in background worker threads
+so web requests return immediately with a job ID. Job status and results are
+kept in a SQLite database shared by every worker on the node, so a job can be
+polled from any worker.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+DEFAULT_JOB_DB_PATH = os.path.join("cache", "sessions.sqlite3")
+
+
+def _worker_alive(pid):
+    """Return True if the process that owns a job is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    """Job queue backed by a thread pool in each worker and a shared database.
+
+    Jobs submitted with the same dedupe key while an earlier one is still
+    queued or running (in any worker) share that job instead of starting a
+    new one. Finished jobs are kept (oldest dropped first) so their results
+    can be fetched. Jobs whose worker process exited before finishing are
+    marked failed when they are next looked at.
+    """
+
+    def __init__(self, max_workers=4, max_finished_jobs=200, db_path=None):
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.db_path = db_path or DEFAULT_JOB_DB_PATH
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="report-job"
+        )
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        job_id TEXT PRIMARY KEY,
+                        dedupe_key TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        current_stage TEXT,
+                        stages TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL,
+                        result TEXT,
+                        error TEXT,
+                        worker_pid INTEGER NOT NULL
+                    )
+                    """)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_jobs_dedupe "
+                    "ON jobs (dedupe_key, status)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the queue thread-safe."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _update(self, job_id, **fields):
+        """Set columns of a job record."""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                    (*fields.values(), job_id),
+                )
+        finally:
+            conn.close()
+
+    def _reap(self, conn, row):
+        """Mark a job failed if its worker exited before finishing it."""
+        if row["status"] in (SUCCEEDED, FAILED) or _worker_alive(row["worker_pid"]):
+            return row
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ?, "
+            "current_stage = NULL WHERE job_id = ?",
+            (
+                FAILED,
+                "Worker exited before the job finished",
+                time.time(),
+                row["job_id"],
+            ),
+        )
+        return conn.execute(
+            "SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)
+        ).fetchone()
+
+    def submit(self, dedupe_key, func, *args):
+        """Queue func(*args, on_stage) and return (job snapshot, created).
+
+        func receives an on_stage(stage, seconds) callback for reporting
+        per-stage durations and should return a JSON-serializable result.
+        """
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            # The write lock makes the in-flight check and insert atomic
+            # across workers
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for row in conn.execute(
+                    "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)",
+                    (dedupe_key, QUEUED, RUNNING),
+                ).fetchall():
+                    row = self._reap(conn, row)
+                    if row["status"] in (QUEUED, RUNNING):
+                        conn.execute("COMMIT")
+                        return self._snapshot(row), False
+
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (job_id, dedupe_key, status, stages, "
+                    "created_at, worker_pid) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, dedupe_key, QUEUED, "{}", time.time(), os.getpid()),
+                )
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+        self.executor.submit(self._run, job_id, func, args)
+        return self._snapshot(row), True
+
+    def _run(self, job_id, func, args):
+        """Run a job in a worker thread and record its outcome."""
+        self._update(job_id, status=RUNNING, started_at=time.time())
+        stages = {}
+
+        def on_stage(stage, seconds):
+            stages[stage] = seconds
+            self._update(job_id, stages=json.dumps(stages), current_stage=stage)
+
+        try:
+            result = func(*args, on_stage)
+            self._update(
+                job_id,
+                result=json.dumps(result),
+                status=SUCCEEDED,
+                finished_at=time.time(),
+                current_stage=None,
+            )
+        except Exception as e:
+            import traceback
+
+            error_details = traceback.format_exc()
+            print(f"Error running job {job_id}: {str(e)}\n{error_details}")
+            self._update(
+                job_id,
+                error=str(e),
+                status=FAILED,
+                finished_at=time.time(),
+                current_stage=None,
+            )
+        finally:
+            self._prune_finished()
+
+    def _prune_finished(self):
+        """Drop the oldest finished jobs beyond max_finished_jobs."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM jobs WHERE job_id IN ("
+                    "SELECT job_id FROM jobs WHERE status IN (?, ?) "
+                    "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                    (SUCCEEDED, FAILED, self.max_finished_jobs),
+                )
+        finally:
+            conn.close()
+
+    def _snapshot(self, row):
+        """Return a job record as a dict that is safe to serialize."""
+        snapshot = {
+            "id": row["job_id"],
+            "status": row["status"],
+            "current_stage": row["current_stage"],
+            "stages": json.loads(row["stages"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+
+        now = time.time()
+        started = row["started_at"]
+        snapshot["queue_wait"] = round((started or now) - row["created_at"], 3)
+        if started:
+            snapshot["run_time"] = round((row["finished_at"] or now) - started, 3)
+        return snapshot
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown."""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                return self._snapshot(self._reap(conn, row))
+        finally:
+            conn.close()
+
+    def get_stats(self):
+        """Return the queue depth and job counts by status, across workers."""
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        conn = self._connect()
+        try:
+            for status, count in conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ):
+                counts[status] = count
+        finally:
+            conn.close()
+
+        return {
+            "workers": self.max_workers,
+            "queue_depth": counts[QUEUED],
+            "running": counts[RUNNING],
+            "succeeded": counts[SUCCEEDED],
+            "failed": counts[FAILED],
+        }
@@ -0,0 +1,249 @@
+"""
+LLM response cache module for ROI Automation Dashboard.
+This module handles persisting chat completion responses on disk so repeat
+analyses can be served without calling the OpenAI API again.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "llm_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # One week
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100MB of response text
+
+
+def make_cache_key(model, temperature, max_tokens, messages):
+    """Return a content hash for a chat completion request."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed, content-addressed cache of LLM responses.
+
+    The database file can be shared by every worker on a node. Entries
+    expire after ttl_seconds and the least recently used entries are evicted
+    once the cache holds more than max_entries responses or max_bytes of
+    response text.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_CACHE_PATH,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        max_bytes=DEFAULT_MAX_BYTES,
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # Create the cache directory if it doesn't exist
+        cache_dir = os.path.dirname(self.db_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._setup_schema()
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the cache thread-safe."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _setup_schema(self):
+        """Create the cache tables if they don't exist."""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_accessed "
+                "ON responses (last_accessed)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+                """)
+        conn.close()
+
+    def _increment(self, conn, name, amount=1):
+        conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?",
+                    (key,),
+                ).fetchone()
+
+                if row is None:
+                    self._increment(conn, "misses")
+                    return None
+
+                response, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    # Expired entries count as a miss and are removed right away
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._increment(conn, "misses")
+                    self._increment(conn, "expired")
+                    return None
+
+                conn.execute(
+                    "UPDATE responses SET last_accessed = ? WHERE key = ?",
+                    (now, key),
+                )
+                self._increment(conn, "hits")
+                return response
+        finally:
+            conn.close()
+
+    def set(self, key, response):
+        """Store a response and evict the least recently used overflow."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, response, size_bytes, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(conn, now)
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then LRU entries beyond the size limits."""
+        if self.ttl_seconds:
+            expired = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            ).rowcount
+            if expired:
+                self._increment(conn, "expired", expired)
+
+        if self.max_entries:
+            evicted = conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses
+                    ORDER BY last_accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            if evicted:
+                self._increment(conn, "evictions", evicted)
+
+        if self.max_bytes:
+            # Keep the most recently used entries whose running size fits
+            evicted = conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size_bytes) OVER (
+                            ORDER BY last_accessed DESC, key
+                        ) AS running_bytes
+                        FROM responses
+                    ) WHERE running_bytes > ?
+                )
+                """,
+                (self.max_bytes,),
+            ).rowcount
+            if evicted:
+                self._increment(conn, "evictions", evicted)
+
+    def get_or_create(self, model, temperature, max_tokens, messages, create_func):
+        """Return a cached response or call create_func() and cache its result."""
+        key = make_cache_key(model, temperature, max_tokens, messages)
+        response = self.get(key)
+        if response is not None:
+            return response
+
+        response = create_func()
+        if response:
+            self.set(key, response)
+        return response
+
+    def clear(self):
+        """Remove every cached response and reset the counters."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM responses")
+                conn.execute("DELETE FROM stats")
+        finally:
+            conn.close()
+
+    def get_stats(self):
+        """Return hit/miss/eviction counters and the current cache size."""
+        conn = self._connect()
+        try:
+            stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+            ).fetchone()
+        finally:
+            conn.close()
+
+        hits = stats.get("hits", 0)
+        misses = stats.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "expired": stats.get("expired", 0),
+            "evictions": stats.get("evictions", 0),
+            "entries": entries,
+            "size_bytes": size_bytes,
+        }
+
+
+def get_default_cache():
+    """Build the cache configured by the LLM_CACHE_* environment variables.
+
+    Set LLM_CACHE_ENABLED=false to turn caching off entirely.
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+
+    return LLMResponseCache(
+        db_path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+        ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    )
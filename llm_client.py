@@ -0,0 +1,258 @@
+"""
+Rate-limited LLM client module for ROI Automation Dashboard.
+This module handles metering OpenAI requests against Azure RPM/TPM quotas,
+capping concurrent calls and retrying rate-limited or failed requests.
+"""
+
+import os
+import time
+import random
+import threading
+import email.utils
+import openai
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 80000
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_RETRIES = 5
+
+
+def estimate_tokens(text):
+    """Roughly estimate the number of tokens in a string (~4 chars per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def estimate_request_tokens(messages, max_tokens=0):
+    """Estimate the tokens a chat completion request will count against TPM."""
+    # Each message carries a few tokens of role/formatting overhead
+    prompt_tokens = sum(
+        estimate_tokens(message.get("content") or "") + 4 for message in messages
+    )
+    return prompt_tokens + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills continuously at a per-minute rate."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second
+        )
+        self.updated_at = now
+
+    def acquire(self, amount=1):
+        """Block until amount tokens are available and return the seconds waited."""
+        # A single request larger than the bucket can only wait for a full bucket
+        amount = min(amount, self.capacity)
+        start = time.monotonic()
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - start
+                shortfall = amount - self.tokens
+            time.sleep(shortfall / self.rate_per_second)
+
+    def refund(self, amount):
+        """Return unused tokens, e.g. when actual usage was below the estimate."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def is_retryable(error):
+    """Return True for rate limits, server errors and connection failures."""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error):
+    """Return the server's requested retry delay in seconds, if it sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        # Retry-After may also be an HTTP date
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time()) if retry_at else None
+
+
+class RateLimiter:
+    """
+    Meters LLM calls with request and token buckets, caps in-flight calls and
+    retries retryable failures with jittered exponential backoff.
+    One instance is shared per process (see get_shared_rate_limiter).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=1.0,
+        max_delay=60.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "queue_wait_seconds": 0.0,
+            "max_queue_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    def _record(self, **changes):
+        with self.metrics_lock:
+            for name, value in changes.items():
+                self.metrics[name] += value
+            self.metrics["peak_in_flight"] = max(
+                self.metrics["peak_in_flight"], self.metrics["in_flight"]
+            )
+
+    def _acquire(self, estimated_tokens):
+        """Wait for quota and an in-flight slot; return the seconds spent waiting."""
+        start = time.monotonic()
+        self.request_bucket.acquire(1)
+        self.token_bucket.acquire(estimated_tokens)
+        self.in_flight.acquire()
+        waited = time.monotonic() - start
+
+        self._record(attempts=1, in_flight=1, queue_wait_seconds=waited)
+        with self.metrics_lock:
+            self.metrics["max_queue_wait_seconds"] = max(
+                self.metrics["max_queue_wait_seconds"], waited
+            )
+        return waited
+
+    def _release(self):
+        self.in_flight.release()
+        self._record(in_flight=-1)
+
+    def _backoff_delay(self, error, attempt):
+        """Honour Retry-After when given, otherwise use full-jitter backoff."""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, 0.1)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _release_when_done(self, stream):
+        """Hold the in-flight slot until a streamed response is fully consumed."""
+        try:
+            yield from stream
+        finally:
+            self._release()
+
+    def call(self, create_func, **kwargs):
+        """
+        Call create_func(**kwargs) (e.g. client.chat.completions.create) within
+        the rate limits, retrying rate-limited and transient failures.
+        """
+        estimated_tokens = estimate_request_tokens(
+            kwargs.get("messages", []), kwargs.get("max_tokens")
+        )
+        self._record(calls=1)
+
+        for attempt in range(self.max_retries + 1):
+            self._acquire(estimated_tokens)
+            try:
+                response = create_func(**kwargs)
+            except Exception as e:
+                self._release()
+                if isinstance(e, openai.RateLimitError):
+                    self._record(rate_limited=1)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self._record(failures=1)
+                    raise
+
+                delay = self._backoff_delay(e, attempt)
+                self._record(retries=1, backoff_seconds=delay)
+                time.sleep(delay)
+                continue
+
+            if kwargs.get("stream"):
+                return self._release_when_done(response)
+
+            self._release()
+
+            # Give back the part of the estimate the request didn't use
+            usage = getattr(response, "usage", None)
+            total_tokens = getattr(usage, "total_tokens", None)
+            if isinstance(total_tokens, int) and total_tokens < estimated_tokens:
+                self.token_bucket.refund(estimated_tokens - total_tokens)
+
+            return response
+
+    def get_metrics(self):
+        """Return a copy of the call, retry and queue-wait counters."""
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+        metrics["queue_wait_seconds"] = round(metrics["queue_wait_seconds"], 3)
+        metrics["max_queue_wait_seconds"] = round(metrics["max_queue_wait_seconds"], 3)
+        metrics["backoff_seconds"] = round(metrics["backoff_seconds"], 3)
+        metrics["max_in_flight"] = self.max_in_flight
+        return metrics
+
+
+_shared_rate_limiter = None
+_shared_rate_limiter_lock = threading.Lock()
+
+
+def get_shared_rate_limiter():
+    """Return the process-wide rate limiter configured by LLM_* env variables."""
+    global _shared_rate_limiter
+
+    with _shared_rate_limiter_lock:
+        if _shared_rate_limiter is None:
+            _shared_rate_limiter = RateLimiter(
+                requests_per_minute=int(
+                    os.getenv("LLM_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)
+                ),
+                tokens_per_minute=int(
+                    os.getenv("LLM_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)
+                ),
+                max_in_flight=int(
+                    os.getenv("LLM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)
+                ),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            )
+        return _shared_rate_limiter
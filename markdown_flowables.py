@@ -0,0 +1,311 @@
+"""
+Markdown flowables module for ROI Automation Dashboard.
+This module handles converting markdown into ReportLab flowables in a single
+walk over Python-Markdown's element tree, covering headings, paragraphs,
+nested lists, tables, code blocks, block quotes and rules.
+"""
+
+import re
+from xml.sax.saxutils import escape, unescape
+import markdown
+from markdown.extensions import Extension
+from markdown.preprocessors import Preprocessor
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import HTML_PLACEHOLDER_RE
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import (
+    HRFlowable,
+    ListFlowable,
+    ListItem,
+    Paragraph,
+    Preformatted,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+# Inline tags and the ReportLab paragraph markup they map to
+INLINE_TAGS = {
+    "strong": ("<b>", "</b>"),
+    "b": ("<b>", "</b>"),
+    "em": ("<i>", "</i>"),
+    "i": ("<i>", "</i>"),
+    "code": ('<font face="Courier">', "</font>"),
+    "del": ("<strike>", "</strike>"),
+    "s": ("<strike>", "</strike>"),
+    "u": ("<u>", "</u>"),
+    "sup": ("<super>", "</super>"),
+    "sub": ("<sub>", "</sub>"),
+}
+
+# Block-level children that end a list item's leading text
+LIST_ITEM_BLOCKS = {"p", "ul", "ol", "pre", "blockquote", "table"}
+
+HEADING_RE = re.compile(r"h([1-6])$")
+TAG_RE = re.compile(r"<[^>]+>")
+LIST_ITEM_RE = re.compile(r"^( *)(?:[-*+]|\d+[.)])\s")
+ALIGN_RE = re.compile(r"text-align:\s*(\w+)")
+
+TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e9ecef")),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#adb5bd")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("LEADING", (0, 0), (-1, -1), 11),
+        ("TOPPADDING", (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+    ]
+)
+
+
+class _ListIndentPreprocessor(Preprocessor):
+    """
+    Re-indents nested list items to four spaces per level. Python-Markdown
+    needs four, but LLM output usually nests lists with two or three.
+    """
+
+    def run(self, lines):
+        indents = []
+        output = []
+        for line in lines:
+            match = LIST_ITEM_RE.match(line)
+            if match is None:
+                # Unindented text ends any open list
+                if line.strip() and not line.startswith(" "):
+                    indents = []
+                output.append(line)
+                continue
+
+            indent = len(match.group(1))
+            while indents and indent < indents[-1]:
+                indents.pop()
+            if not indents or indent > indents[-1]:
+                indents.append(indent)
+            output.append(" " * 4 * (len(indents) - 1) + line[indent:])
+        return output
+
+
+class _FlowableTreeprocessor(Treeprocessor):
+    """Runs last and hands the finished element tree to the converter."""
+
+    def __init__(self, md, converter):
+        super().__init__(md)
+        self.converter = converter
+
+    def run(self, root):
+        self.converter.flowables = self.converter.convert_blocks(root)
+        # Nothing is serialized to HTML, so return an empty tree
+        root.clear()
+        return root
+
+
+class MarkdownFlowableConverter:
+    """
+    Converts markdown to a list of ReportLab flowables using the given
+    stylesheet. Reuse one converter per thread; it is not thread-safe.
+    """
+
+    def __init__(self, styles, available_width=6.5 * inch):
+        self.styles = styles
+        self.available_width = available_width
+        self.flowables = []
+
+        converter = self
+
+        class FlowableExtension(Extension):
+            def extendMarkdown(self, md):
+                # After fenced code and raw HTML blocks are stashed
+                md.preprocessors.register(
+                    _ListIndentPreprocessor(md), "list_indent", 15
+                )
+                # After "unescape" (priority 0) so escaped characters are final
+                md.treeprocessors.register(
+                    _FlowableTreeprocessor(md, converter), "flowables", -10
+                )
+
+        self.md = markdown.Markdown(
+            extensions=["tables", "fenced_code", "sane_lists", FlowableExtension()]
+        )
+
+    def convert(self, md_text):
+        """Return the flowables for a markdown document."""
+        self.md.reset()
+        self.flowables = []
+        self.md.convert(md_text)
+        return self.flowables
+
+    def inline_markup(self, element, stop_at=()):
+        """
+        Return ReportLab paragraph markup for an element's inline content,
+        stopping at the first child whose tag is in stop_at.
+        """
+        parts = [self._text(element.text)]
+        for child in element:
+            if child.tag in stop_at:
+                break
+            parts.append(self._inline_child(child))
+            parts.append(self._text(child.tail))
+        return "".join(parts).strip()
+
+    def _inline_child(self, child):
+        if child.tag == "br":
+            return "<br/>"
+        if child.tag == "img":
+            return escape(child.get("alt", ""))
+
+        if child.tag == "code":
+            # Python-Markdown has already escaped code spans
+            open_tag, close_tag = INLINE_TAGS["code"]
+            return f"{open_tag}{''.join(child.itertext())}{close_tag}"
+
+        content = self.inline_markup(child)
+        if child.tag == "a" and child.get("href"):
+            href = escape(child.get("href"), {'"': "&quot;"})
+            return f'<a href="{href}" color="blue">{content}</a>'
+        open_tag, close_tag = INLINE_TAGS.get(child.tag, ("", ""))
+        return f"{open_tag}{content}{close_tag}"
+
+    def _text(self, text):
+        if not text:
+            return ""
+        # Raw HTML is stashed behind placeholders; show it as plain text
+        text = HTML_PLACEHOLDER_RE.sub(self._stashed_html, text)
+        return escape(text)
+
+    def _stashed_html(self, match):
+        index = int(match.group(1))
+        blocks = self.md.htmlStash.rawHtmlBlocks
+        return str(blocks[index]) if index < len(blocks) else ""
+
+    def _convert_raw_html(self, html, body_style):
+        """Render a stashed HTML block (including fenced code) as plain text."""
+        text = unescape(TAG_RE.sub("", html)).strip("\n")
+        if html.lstrip().startswith("<pre"):
+            return [Preformatted(text, self.styles["Code"]), Spacer(1, 0.1 * inch)]
+        if not text.strip():
+            return []
+        return [Paragraph(escape(text), self.styles[body_style]), Spacer(1, 0.1 * inch)]
+
+    def convert_blocks(self, parent, body_style="BodyText"):
+        """Return the flowables for the block-level children of parent."""
+        flowables = []
+        for element in parent:
+            flowables.extend(self._convert_block(element, body_style))
+        return flowables
+
+    def _convert_block(self, element, body_style):
+        tag = element.tag
+        heading = HEADING_RE.match(tag)
+        if heading:
+            level = int(heading.group(1))
+            style = self.styles["Title" if level == 1 else f"Heading{level}"]
+            return [
+                Paragraph(self.inline_markup(element), style),
+                Spacer(1, 0.1 * inch),
+            ]
+
+        if tag == "p":
+            placeholder = HTML_PLACEHOLDER_RE.fullmatch((element.text or "").strip())
+            if placeholder and len(element) == 0:
+                return self._convert_raw_html(
+                    self._stashed_html(placeholder), body_style
+                )
+            markup = self.inline_markup(element)
+            if not markup:
+                return []
+            return [Paragraph(markup, self.styles[body_style]), Spacer(1, 0.1 * inch)]
+
+        if tag in ("ul", "ol"):
+            return [self._convert_list(element), Spacer(1, 0.1 * inch)]
+
+        if tag == "table":
+            table = self._convert_table(element)
+            return [table, Spacer(1, 0.15 * inch)] if table is not None else []
+
+        if tag == "pre":
+            code = unescape("".join(element.itertext())).rstrip("\n")
+            return [Preformatted(code, self.styles["Code"]), Spacer(1, 0.1 * inch)]
+
+        if tag == "blockquote":
+            return self.convert_blocks(element, body_style="Quote")
+
+        if tag == "hr":
+            return [
+                HRFlowable(width="100%", thickness=0.5, color=colors.grey),
+                Spacer(1, 0.1 * inch),
+            ]
+
+        # Unknown containers (e.g. div) contribute their children
+        return self.convert_blocks(element, body_style)
+
+    def _convert_list(self, element):
+        items = []
+        for li in element.findall("li"):
+            contents = []
+            markup = self.inline_markup(li, stop_at=LIST_ITEM_BLOCKS)
+            if markup:
+                contents.append(Paragraph(markup, self.styles["Bullet"]))
+            for child in li:
+                if child.tag in LIST_ITEM_BLOCKS:
+                    contents.extend(
+                        flowable
+                        for flowable in self._convert_block(child, "Bullet")
+                        if not isinstance(flowable, Spacer)
+                    )
+            if contents:
+                items.append(ListItem(contents, leftIndent=20))
+
+        if element.tag == "ol":
+            start = element.get("start", "1")
+            return ListFlowable(items, bulletType="1", start=start)
+        return ListFlowable(items, bulletType="bullet", start="•")
+
+    def _convert_table(self, element):
+        rows = [list(tr) for tr in element.iter("tr")]
+        if not rows:
+            return None
+
+        columns = max(len(row) for row in rows)
+        column_width = self.available_width / columns
+        cell_style = self.styles["TableCell"]
+        # Rough characters per line; Helvetica averages about 0.55em per glyph
+        max_chars = int(column_width / (cell_style.fontSize * 0.55))
+
+        data = []
+        commands = []
+        for row_index, row in enumerate(rows):
+            cells = []
+            for column_index, cell in enumerate(row):
+                text = unescape(self._text(cell.text).strip())
+                if len(cell) == 0 and len(text) <= max_chars:
+                    # Short plain cells skip Paragraph's markup parser
+                    cells.append(text)
+                else:
+                    style = "TableHeader" if cell.tag == "th" else "TableCell"
+                    cells.append(
+                        Paragraph(self.inline_markup(cell), self.styles[style])
+                    )
+
+                align = cell.get("align")
+                if align is None:
+                    match = ALIGN_RE.search(cell.get("style", ""))
+                    align = match.group(1) if match else None
+                if align in ("center", "right"):
+                    position = (column_index, row_index)
+                    commands.append(("ALIGN", position, position, align.upper()))
+            cells.extend([""] * (columns - len(cells)))
+            data.append(cells)
+
+        if rows[0] and rows[0][0].tag == "th":
+            commands.append(("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"))
+
+        table = Table(
+            data,
+            colWidths=[column_width] * columns,
+            repeatRows=1,
+            style=TABLE_STYLE,
+        )
+        table.setStyle(TableStyle(commands))
+        return table
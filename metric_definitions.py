@@ -3,12 +3,21 @@ This module contains definitions for metrics used in the ROI Automation Dashboar
 These metrics are used to analyze data and identify trends.
 """
 
+import os
+import json
+from dotenv import load_dotenv
+
+# The definitions path may be set in .env
+load_dotenv()
+
 # Metric definitions dictionary
 # Each metric has:
 # - description: human-readable explanation of the metric
-# - formula: how the metric is calculated (expressed as a string referring to column names)
+# - formula: how the metric is calculated from the summed input columns
+#   (column names, numbers and + - * /); compiled by metric_engine
 # - goal: whether higher or lower values are better for this metric
-# - format: how to display the metric (percentage, decimal, integer, etc.)
+# - format: how to display the metric (percentage, decimal, integer, etc.);
+#   percentages change quarter over quarter in percentage points
 # - category: the type of metric (operational, financial, etc.)
 
 METRIC_DEFINITIONS = {
@@ -19,12 +28,12 @@ METRIC_DEFINITIONS = {
         "format": "integer",
         "category": "volume",
     },
-    "fcots_pct": {
-        "description": "First Case On-Time Start Percentage",
-        "formula": "fcots_num / fcots_den",
+    "case_minutes": {
+        "description": "Total minutes of cases performed",
+        "formula": "case_minutes",
         "goal": "higher",
-        "format": "percentage",
-        "category": "efficiency",
+        "format": "integer",
+        "category": "volume",
     },
     "turnover_time": {
         "description": "Average time between cases (minutes)",
@@ -33,13 +42,6 @@ METRIC_DEFINITIONS = {
         "format": "decimal",
         "category": "efficiency",
     },
-    "utilization_pct": {
-        "description": "Room utilization percentage",
-        "formula": "ptu_num / ptu_den",
-        "goal": "higher",
-        "format": "percentage",
-        "category": "efficiency",
-    },
     "add_on_pct": {
         "description": "Percentage of cases that were added on",
         "formula": "add_on_num / add_on_den",
@@ -47,16 +49,68 @@ METRIC_DEFINITIONS = {
         "format": "percentage",
         "category": "scheduling",
     },
-    "denial_rate_pct": {
-        "description": "Percentage of requests that were denied",
-        "formula": "denial_rate_num / denial_rate_den",
+    "cancel_rate_pct": {
+        "description": "Percentage of scheduled cases that were cancelled",
+        "formula": "cancel_rate_num / cancel_rate_den",
         "goal": "lower",
         "format": "percentage",
         "category": "scheduling",
     },
+    "primetime_utilization_pct": {
+        "description": "Room utilization percentage during primetime hours",
+        "formula": "ptu_num / ptu_den",
+        "goal": "higher",
+        "format": "percentage",
+        "category": "efficiency",
+    },
+    "fcots_pct": {
+        "description": "First Case On-Time Start Percentage",
+        "formula": "fcots_num / fcots_den",
+        "goal": "higher",
+        "format": "percentage",
+        "category": "efficiency",
+    },
+    "release_pct": {
+        "description": "Percentage of requested block minutes that were released",
+        "formula": "release_minutes / total_request_minutes",
+        "goal": "higher",
+        "format": "percentage",
+        "category": "scheduling",
+    },
 }
 
 
+def load_metric_definitions(path):
+    """
+    Return METRIC_DEFINITIONS updated from a JSON file mapping metric names
+    to definitions. A definition replaces the built-in one of the same name
+    and null removes it.
+    """
+    with open(path) as f:
+        overrides = json.load(f)
+
+    definitions = dict(METRIC_DEFINITIONS)
+    for name, definition in overrides.items():
+        if definition is None:
+            definitions.pop(name, None)
+            continue
+        if "formula" not in definition:
+            raise ValueError(f"Metric {name} in {path} has no formula")
+        definitions[name] = {
+            "description": name.replace("_", " "),
+            "goal": "higher",
+            "format": "decimal",
+            "category": "custom",
+            **definition,
+        }
+    return definitions
+
+
+# Metrics can be added or changed without code changes via a JSON file
+if os.getenv("METRIC_DEFINITIONS_PATH"):
+    METRIC_DEFINITIONS = load_metric_definitions(os.getenv("METRIC_DEFINITIONS_PATH"))
+
+
 def get_metric_names():
     """Return a list of all metric names."""
     return list(METRIC_DEFINITIONS.keys())
@@ -0,0 +1,158 @@
+"""
+Metric engine module for ROI Automation Dashboard.
+This module handles computing metrics from the formulas in
+METRIC_DEFINITIONS: each formula is parsed once into a compiled NumPy
+expression over the summed input columns, its inputs are checked against
+the input schema, and only the metrics a caller asks for are evaluated.
+"""
+
+import ast
+from collections import namedtuple
+import numpy as np
+
+# Formula syntax: column names, numbers, + - * / and parentheses
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.UAdd,
+    ast.USub,
+)
+
+# inputs are the formula's column names in the order they appear. ratio is
+# (numerator, denominator) for "a / b" formulas and column is set for
+# formulas that are a single column; both are None otherwise
+CompiledMetric = namedtuple(
+    "CompiledMetric", ["name", "formula", "inputs", "code", "ratio", "column"]
+)
+
+
+def compile_formula(name, formula):
+    """Parse and compile a metric formula, raising ValueError if invalid."""
+    try:
+        tree = ast.parse(formula, mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Invalid formula for {name}: {formula!r}")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES) or (
+            isinstance(node, ast.Constant)
+            and (
+                isinstance(node.value, bool) or not isinstance(node.value, (int, float))
+            )
+        ):
+            raise ValueError(
+                f"Unsupported syntax in formula for {name}: {formula!r} "
+                "(only column names, numbers and + - * / are allowed)"
+            )
+
+    # Column names in the order they appear in the formula
+    names = [node for node in ast.walk(tree) if isinstance(node, ast.Name)]
+    inputs = []
+    for node in sorted(names, key=lambda node: node.col_offset):
+        if node.id not in inputs:
+            inputs.append(node.id)
+    if not inputs:
+        raise ValueError(f"Formula for {name} uses no columns: {formula!r}")
+
+    body = tree.body
+    ratio = None
+    if (
+        isinstance(body, ast.BinOp)
+        and isinstance(body.op, ast.Div)
+        and isinstance(body.left, ast.Name)
+        and isinstance(body.right, ast.Name)
+    ):
+        ratio = (body.left.id, body.right.id)
+    column = body.id if isinstance(body, ast.Name) else None
+
+    code = compile(tree, f"<metric {name}>", "eval")
+    return CompiledMetric(name, formula, inputs, code, ratio, column)
+
+
+class MetricEngine:
+    """
+    Compiled METRIC_DEFINITIONS formulas over the columns of an input
+    schema. Every formula must only use schema columns.
+    """
+
+    def __init__(self, definitions, schema):
+        self.definitions = definitions
+        self.schema = list(schema)
+        self.metrics = {}
+
+        missing = []
+        for name, definition in definitions.items():
+            metric = compile_formula(name, definition["formula"])
+            unknown = [col for col in metric.inputs if col not in self.schema]
+            if unknown:
+                missing.append(f"{name} ({', '.join(unknown)})")
+            self.metrics[name] = metric
+
+        if missing:
+            raise ValueError(
+                "Metric formulas use columns that are not in the input schema: "
+                + "; ".join(missing)
+            )
+
+    def resolve(self, metrics=None):
+        """Return the requested metric names (all if None) in definition order."""
+        if metrics is None:
+            return list(self.metrics)
+        unknown = [name for name in metrics if name not in self.metrics]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+        return [name for name in self.metrics if name in metrics]
+
+    def inputs(self, metrics=None):
+        """Return the schema columns the given metrics need, in schema order."""
+        needed = {
+            col for name in self.resolve(metrics) for col in self.metrics[name].inputs
+        }
+        return [col for col in self.schema if col in needed]
+
+    def qoq_changes(self):
+        """
+        Return {metric: "pct_change" or "diff"}: percentages change in
+        percentage points, everything else by a relative %.
+        """
+        return {
+            name: (
+                "diff"
+                if self.definitions[name].get("format") == "percentage"
+                else "pct_change"
+            )
+            for name in self.metrics
+        }
+
+    def ratio_inputs(self):
+        """Return {metric: (numerator, denominator)} for the "a / b" metrics."""
+        return {
+            name: metric.ratio
+            for name, metric in self.metrics.items()
+            if metric.ratio is not None
+        }
+
+    def evaluate(self, columns, metrics=None):
+        """
+        Return {metric: values} computed from columns (a DataFrame or a
+        mapping of column name to array or scalar). Division by zero gives
+        inf or NaN as with pandas.
+        """
+        names = self.resolve(metrics)
+        namespace = {
+            col: np.asarray(columns[col], dtype=np.float64)
+            for col in self.inputs(names)
+        }
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                name: eval(self.metrics[name].code, {"__builtins__": {}}, namespace)
+                for name in names
+            }
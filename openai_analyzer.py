@@ -5,18 +5,82 @@ This module handles sending data to the OpenAI API and processing the responses.
 
 import os
 import json
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI, AzureOpenAI
 from dotenv import load_dotenv
-from ai_prompt import data_analysis_prompt, meeting_notes_prompt, beckers_web_scrape
+from ai_prompt import data_analysis_prompt
 from metric_definitions import METRIC_DEFINITIONS
+from llm_cache import get_default_cache, make_cache_key
+from llm_client import get_shared_rate_limiter
+from prompt_serializer import (
+    count_tokens,
+    latest_quarter,
+    serialize_metric_data,
+    serialize_metric_definitions,
+    serialize_records,
+)
+from insight_ranker import rank_findings
+from data_processor import format_quarter_key
+from rollup import location_drivers
+from trends import location_trends
+from context_builder import SUMMARY, assemble_context, get_context_settings
+from vector_index import get_customer_index, retrieve_context
+from sources import (
+    SourceExtractor,
+    get_beckers_news_source,
+    get_default_extraction_store,
+    get_meeting_notes_source,
+)
+
+# Finding fields sent to the model (the score only decides the order)
+FINDING_PROMPT_COLUMNS = [
+    "level",
+    "region_name",
+    "metric",
+    "previous_quarter",
+    "quarter_year",
+    "previous_value",
+    "value",
+    "change",
+    "seasonal_change",
+    "yoy_change",
+    "unit",
+    "direction",
+    "z_score",
+]
+
+# Anomaly fields sent to the model
+ANOMALY_PROMPT_COLUMNS = [
+    "region_name",
+    "location_name",
+    "metric",
+    "month",
+    "value",
+    "median",
+    "robust_z",
+    "direction",
+]
 
 # Load environment variables
 load_dotenv()
 
 
 class OpenAIAnalyzer:
-    def __init__(self):
-        """Initialize the OpenAI API client."""
+    def __init__(self, customer=None, cube=None, anomalies=None):
+        """Initialize the OpenAI API client.
+
+        customer names whose meeting notes and news index is searched when
+        retrieval is enabled (VECTOR_INDEX_DIR). cube is the data's
+        RollupCube; with it, the locations driving each region finding are
+        added to the baseline prompt. anomalies are the data's monthly
+        anomaly records (see anomaly_detection.detect_anomalies); those in
+        the focus quarter are added to the baseline prompt.
+        """
+        self.customer = customer
+        self.cube = cube
+        self.anomalies = anomalies or []
 
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -28,11 +92,129 @@ class OpenAIAnalyzer:
             api_key=self.api_key,
             api_version=self.api_version,
             azure_endpoint=self.azure_endpoint,
+            max_retries=0,  # Retries are handled by the shared rate limiter
         )
 
+        # Process-wide request/token metering, concurrency cap and retries
+        self.rate_limiter = get_shared_rate_limiter()
+
+        # How much of the metric data goes into the baseline prompt
+        last_n_quarters = os.getenv("PROMPT_LAST_N_QUARTERS")
+        min_qoq_change = os.getenv("PROMPT_MIN_QOQ_CHANGE")
+        self.prompt_last_n_quarters = int(last_n_quarters) if last_n_quarters else None
+        self.prompt_min_qoq_change = float(min_qoq_change) if min_qoq_change else None
+        self.prompt_table_format = os.getenv("PROMPT_TABLE_FORMAT", "csv")
+        self.prompt_token_stats = {}
+
+        # Quarter the report focuses on (the latest in the data unless
+        # REPORT_FOCUS_QUARTER is set) and how many ranked findings to send
+        self.focus_quarter = os.getenv("REPORT_FOCUS_QUARTER") or None
+        self.prompt_findings_top_k = int(os.getenv("PROMPT_FINDINGS_TOP_K", 10))
+        self.prompt_anomalies_top_k = int(os.getenv("PROMPT_ANOMALIES_TOP_K", 10))
+        self.findings = []
+
+        # How the meeting notes and news are fed into the synthesis call
+        self.context_modes, self.context_token_budget = get_context_settings(
+            ["meeting_notes", "beckers_news"]
+        )
+        self.context_accounting = {}
+
+        # Meeting notes and news come from source adapters; per-document
+        # extractions are stored so unchanged documents aren't re-sent
+        extraction_store = get_default_extraction_store()
+        self.meeting_extractor = SourceExtractor(
+            "meeting_notes",
+            get_meeting_notes_source(),
+            self._complete_text,
+            extraction_store,
+        )
+        self.beckers_extractor = SourceExtractor(
+            "beckers_news",
+            get_beckers_news_source(),
+            self._complete_text,
+            extraction_store,
+        )
+
+        # Per-customer embedding index used to pick the relevant passages
+        self.vector_index = get_customer_index(customer, self.client, self.rate_limiter)
+
+        # Disk-backed response cache shared across requests and workers
+        self.response_cache = get_default_cache()
+
         self.cached_insights = None  # Cache to store insights
         self.meeting_insights = None  # Cache to store meeting-specific insights
         self.beckers_insights = None  # Cache to store Becker's web scrape insights
+        self.stage_timings = {}  # Wall-clock seconds spent in each pipeline stage
+
+    def _chat_completion(self, messages):
+        """Send a chat completion request, reusing a cached response if one exists."""
+
+        def create():
+            response = self.rate_limiter.call(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,  # Lower temperature for more consistent, analytical output
+                max_tokens=self.max_tokens,
+            )
+            if response.usage:
+                print(
+                    f"LLM call tokens: {response.usage.prompt_tokens} prompt, "
+                    f"{response.usage.completion_tokens} completion"
+                )
+            return response.choices[0].message.content
+
+        if self.response_cache is None:
+            return create()
+
+        return self.response_cache.get_or_create(
+            self.model, self.temperature, self.max_tokens, messages, create
+        )
+
+    def _complete_text(self, system_prompt, text):
+        """Run a single system + user prompt completion."""
+        return self._chat_completion(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text},
+            ]
+        )
+
+    def _stream_chat_completion(self, messages):
+        """Yield the response text in chunks as the model produces it.
+
+        A cached response is yielded in one piece; otherwise the streamed
+        response is cached once it completes.
+        """
+        cache_key = make_cache_key(
+            self.model, self.temperature, self.max_tokens, messages
+        )
+        if self.response_cache is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        stream = self.rate_limiter.call(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+        )
+
+        chunks = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                chunks.append(text)
+                yield text
+
+        if self.response_cache is not None and chunks:
+            self.response_cache.set(cache_key, "".join(chunks))
 
     def extract_meeting_insights(self):
         """Extract key insights and recommendations from the meeting notes."""
@@ -41,7 +223,7 @@ class OpenAIAnalyzer:
             return True, self.meeting_insights
 
         try:
-            # Generate targeted insights from the meeting notes
+            # Generate targeted insights from each meeting notes document
             prompt = """
             You are an expert healthcare operations consultant reviewing meeting notes from a customer meeting.
             
@@ -54,18 +236,9 @@ class OpenAIAnalyzer:
             Format your response with clear sections and bullet points.
             """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": meeting_notes_prompt},
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            self.meeting_insights = self.meeting_extractor.refresh(prompt)
+            print(f"Meeting notes extraction: {self.meeting_extractor.stats}")
 
-            # Extract the meeting insights
-            self.meeting_insights = response.choices[0].message.content
             return True, self.meeting_insights
 
         except Exception as e:
@@ -85,7 +258,7 @@ class OpenAIAnalyzer:
             return True, self.beckers_insights
 
         try:
-            # Generate targeted insights from the Becker's web scrape
+            # Generate targeted insights from each Becker's article
             prompt = """
             You are an expert healthcare business analyst reviewing an article from Becker's Hospital Review.
             
@@ -98,18 +271,9 @@ class OpenAIAnalyzer:
             Format your response with clear sections and bullet points.
             """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": beckers_web_scrape},
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            self.beckers_insights = self.beckers_extractor.refresh(prompt)
+            print(f"Becker's news extraction: {self.beckers_extractor.stats}")
 
-            # Extract the Becker's insights
-            self.beckers_insights = response.choices[0].message.content
             return True, self.beckers_insights
 
         except Exception as e:
@@ -122,73 +286,282 @@ class OpenAIAnalyzer:
                 f"Error extracting Becker's insights: {str(e)}\n{error_details}",
             )
 
+    def _timed(self, stage, func, *args):
+        """Run func and record how long it took under the given stage name."""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.stage_timings[stage] = round(time.perf_counter() - start, 3)
+
+    def _latest_quarter(self, customer_data, region_data):
+        """
+        Return the latest complete quarter in the cube, so a partly loaded
+        trailing quarter isn't compared with full ones, or without a cube the
+        latest quarter in the data.
+        """
+        if self.cube is not None and len(self.cube.quarter_keys):
+            return format_quarter_key([self.cube.latest_complete_quarter()])[0]
+        return latest_quarter(customer_data + region_data)
+
+    def _generate_baseline_insights(self, customer_data, region_data, on_token=None):
+        """Generate the baseline insights from the metric data alone.
+
+        With on_token, the response is streamed and each chunk of text is
+        passed to on_token as it arrives.
+        """
+        if self.focus_quarter is None:
+            self.focus_quarter = self._latest_quarter(customer_data, region_data)
+
+        # Significant movements are computed locally so the model gets exact
+        # numbers; the region table then only needs the focus quarter
+        findings = []
+        if self.prompt_findings_top_k > 0:
+            findings = rank_findings(
+                customer_data,
+                region_data,
+                top_k=self.prompt_findings_top_k,
+                quarter=self.focus_quarter,
+            )
+        self.findings = findings
+        if findings:
+            region_quarters = [findings[0]["quarter_year"]]
+        elif any(r["quarter_year"] == self.focus_quarter for r in region_data):
+            region_quarters = [self.focus_quarter]
+        else:
+            # As rank_findings does, fall back to the latest quarter
+            region_quarters = [latest_quarter(region_data)]
+
+        customer_table, region_table, stats = serialize_metric_data(
+            customer_data,
+            region_data,
+            last_n_quarters=self.prompt_last_n_quarters,
+            min_qoq_change=self.prompt_min_qoq_change,
+            region_quarters=region_quarters,
+            table_format=self.prompt_table_format,
+        )
+        definitions = serialize_metric_definitions(METRIC_DEFINITIONS)
+        findings_table = serialize_records(
+            [{col: f[col] for col in FINDING_PROMPT_COLUMNS} for f in findings],
+            table_format=self.prompt_table_format,
+        )
+        # Locations behind each region finding, so the summary can name them
+        drivers_prompt = ""
+        region_metrics = sorted(
+            {f["metric"] for f in findings if f["level"] == "region"}
+        )
+        if self.cube is not None and region_metrics:
+            trends = location_trends(self.cube, region_metrics)
+            drivers = location_drivers(self.cube, findings, trends=trends)
+            if drivers:
+                drivers_table = serialize_records(
+                    drivers, table_format=self.prompt_table_format
+                )
+                drivers_prompt = f"\n\nHere are the locations that contributed most to each region-level movement ('contribution' is the part of the region's change that comes from that location, in the finding's unit; a region's contributions add up to its change; 'yoy_change' and 'seasonal_change' are the location's own year-over-year and seasonally adjusted changes):\n\n{drivers_table}"
+        # Month-level spikes and drops that the quarterly numbers hide
+        anomalies = [
+            a for a in self.anomalies if a["quarter_year"] == self.focus_quarter
+        ][: self.prompt_anomalies_top_k]
+        anomalies_prompt = ""
+        if anomalies:
+            anomalies_table = serialize_records(
+                [{col: a[col] for col in ANOMALY_PROMPT_COLUMNS} for a in anomalies],
+                table_format=self.prompt_table_format,
+            )
+            anomalies_prompt = f"\n\nHere are the months in {self.focus_quarter} where a location's metric was far outside its usual monthly range, which the quarterly totals can hide ('median' is the location's median month for that metric and 'robust_z' is how many typical deviations away the month is; values are in the metric's own units, with percentages as fractions). Mention the ones that matter and which month they happened in:\n\n{anomalies_table}"
+        stats["findings"] = len(findings)
+        stats["anomalies"] = len(anomalies)
+        stats["raw_tokens"] += count_tokens(str(METRIC_DEFINITIONS))
+        stats["compact_tokens"] += (
+            count_tokens(definitions)
+            + count_tokens(findings_table)
+            + count_tokens(drivers_prompt)
+            + count_tokens(anomalies_prompt)
+        )
+        self.prompt_token_stats = stats
+        print(
+            f"Metric data prompt tokens: {stats['raw_tokens']} raw -> "
+            f"{stats['compact_tokens']} compact ({len(findings)} ranked findings)"
+        )
+
+        messages = [
+            {"role": "system", "content": data_analysis_prompt},
+            {
+                "role": "user",
+                "content": f"Here are the significant quarter-over-quarter movements, already computed exactly and ranked by importance (customer level at least 5%, region level at least 10%; 'unit' is % for relative changes and pp for percentage point changes, 'direction' accounts for whether higher or lower is better, 'seasonal_change' is the change minus the usual change into the same quarter in earlier years, 'yoy_change' compares with the same quarter a year earlier, and 'z_score' compares the change with that region's earlier quarters). A movement with a small seasonal_change is the normal seasonal pattern and should not be reported as a concern. Base the key findings on these and use their numbers as given rather than recomputing them:\n\n{findings_table}{drivers_prompt}{anomalies_prompt}\n\nHere is the customer data for context:\n\n{customer_table}\n\nHere is the region data for context:\n\n{region_table}\n\nEach table has one row per quarter (and region); empty cells are missing values. Please create a complete executive summary with key findings, regional performance analysis, and recommendations. Make sure you're using {self.focus_quarter} as the most recent quarter. All of the changes with the '_qoq' and '_yoy' suffixes are already in percentage or percentage point changes - do not multiply them by 100. Here are the metric definitions which can you use to have more context about the data:\n{definitions}",
+            },
+        ]
+        if on_token is None:
+            return self._chat_completion(messages)
+
+        chunks = []
+        for text in self._stream_chat_completion(messages):
+            chunks.append(text)
+            on_token(text)
+        return "".join(chunks)
+
+    def _retrieval_queries(self, baseline_insights):
+        """Queries describing the findings the summary will discuss."""
+        queries = []
+        for finding in self.findings:
+            info = METRIC_DEFINITIONS.get(finding["metric"], {})
+            description = info.get("description", finding["metric"].replace("_", " "))
+            queries.append(
+                f"{finding['region_name']} {description} {finding['direction']}"
+            )
+        return queries or [baseline_insights]
+
+    def _source_context(self, extractor, baseline_insights, summary):
+        """
+        Return a source's raw text for the synthesis context: every document,
+        or with a vector index only the passages relevant to the findings.
+        The index is left alone when the source is sent as its summary.
+        """
+        summary_only = (
+            self.context_modes.get(extractor.name) == SUMMARY and summary is not None
+        )
+        if self.vector_index is None or summary_only:
+            return extractor.raw_text()
+
+        documents = extractor.documents
+        if documents is None:
+            documents = extractor.load()
+        self.vector_index.add_documents(extractor.name, documents)
+        return retrieve_context(
+            self.vector_index,
+            self._retrieval_queries(baseline_insights),
+            extractor.name,
+        )
+
+    def _synthesis_messages(
+        self, baseline_insights, meeting_insights, beckers_insights
+    ):
+        """Build the messages that combine every source into the final summary."""
+        # Now, generate enhanced insights by combining data analysis with meeting notes and web scrape
+        combined_prompt = """
+        You are an expert consultant creating an executive summary report that integrates multiple sources of information:
+        1. Data insights from operational metrics
+        2. Meeting notes from customer conversations
+        3. Industry news from Becker's Hospital Review
+        
+        Your task is to create a comprehensive executive summary that:
+        1. Heavily prioritizes both the meeting notes AND the Becker's article information in the findings and recommendations. No need to include that this is heavily prioritized, just do it.
+        2. Connects all three sources of information where relevant
+        3. Makes specific recommendations that address both the customer's concerns from the meeting AND the strategic implications from the Becker's article
+        4. Organizes information in a clear, business-focused format suitable for executives
+        5. Be concise with the information, don't repeat yourself just to fill up space
+        
+        The meeting notes and Becker's article should be treated as high-priority context that shapes your analysis and recommendations. Don't mention anywhere in the report that this is highly prioritized
+        """
+
+        contexts, accounting = assemble_context(
+            {
+                "meeting_notes": (
+                    self._source_context(
+                        self.meeting_extractor, baseline_insights, meeting_insights
+                    ),
+                    meeting_insights,
+                ),
+                "beckers_news": (
+                    self._source_context(
+                        self.beckers_extractor, baseline_insights, beckers_insights
+                    ),
+                    beckers_insights,
+                ),
+            },
+            self.context_modes,
+            self.context_token_budget,
+        )
+        self.context_accounting = accounting
+        for source, counts in accounting.items():
+            print(f"Synthesis context {source}: {counts}")
+
+        return [
+            {"role": "system", "content": combined_prompt},
+            {
+                "role": "user",
+                "content": f"Here are the baseline data insights:\n\n{baseline_insights}\n\nHere is the context from the customer meeting notes, which should be heavily prioritized in the findings and recommendations:\n\n{contexts['meeting_notes']}\n\nHere is the context from important industry news from Becker's Hospital Review, which should also be heavily prioritized:\n\n{contexts['beckers_news']}\n\nPlease create an enhanced executive summary that heavily prioritizes BOTH the meeting notes AND the Becker's article information while incorporating relevant data insights. Format the response with clear sections for Key Findings, Regional Performance, and Recommendations using Markdown.",
+            },
+        ]
+
+    def _synthesize_insights(
+        self, baseline_insights, meeting_insights, beckers_insights
+    ):
+        """Combine the baseline, meeting and Becker's insights into the final summary."""
+        return self._chat_completion(
+            self._synthesis_messages(
+                baseline_insights, meeting_insights, beckers_insights
+            )
+        )
+
+    def _submit_source_stages(
+        self, executor, customer_data, region_data, on_baseline_token=None
+    ):
+        """Start the independent calls and return a future -> stage name map."""
+        return {
+            executor.submit(
+                self._timed,
+                "baseline_analysis",
+                self._generate_baseline_insights,
+                customer_data,
+                region_data,
+                on_baseline_token,
+            ): "baseline_analysis",
+            executor.submit(
+                self._timed, "meeting_extraction", self.extract_meeting_insights
+            ): "meeting_extraction",
+            executor.submit(
+                self._timed, "beckers_extraction", self.extract_beckers_insights
+            ): "beckers_extraction",
+        }
+
+    def _collect_source_results(self, results):
+        """Unpack the stage results, substituting notes for failed extractions."""
+        baseline_insights = results["baseline_analysis"]
+
+        # A failed extraction leaves the summary empty so the synthesis
+        # context falls back to the source's raw text
+        success_meeting, meeting_insights = results["meeting_extraction"]
+        if not success_meeting:
+            meeting_insights = None
+
+        success_beckers, beckers_insights = results["beckers_extraction"]
+        if not success_beckers:
+            beckers_insights = None
+
+        return baseline_insights, meeting_insights, beckers_insights
+
     def generate_insights(self, data):
-        """Generate insights from the processed data using OpenAI API."""
+        """Generate insights from the processed data using OpenAI API.
+
+        The baseline data analysis, meeting notes extraction and Becker's
+        extraction don't depend on each other, so they run concurrently and
+        the final synthesis call starts once all three have returned. Time
+        spent in each stage is recorded in self.stage_timings.
+        """
         customer_data, region_data = data
         try:
             # Check if we already have insights cached
             if self.cached_insights:
                 return True, self.cached_insights
 
-            # First generate baseline insights from the data
-            baseline_response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": data_analysis_prompt},
-                    {
-                        "role": "user",
-                        "content": f"Here is the customer data to analyze: {customer_data} and here is the region data to analyze: {region_data}. Please create a complete executive summary with key findings, regional performance analysis, and recommendations. Make sure you're using Q4 2024 as the most recent quarter and calculating % increases and decreases correctly. All of the pct changes with the 'pct_qoq' suffixes are already in percentage point changes - do not multiply them by 100. Here are the metric definitions which can you use to have more context about the data: {METRIC_DEFINITIONS}",
-                    },
-                ],
-                temperature=self.temperature,  # Lower temperature for more consistent, analytical output
-                max_tokens=self.max_tokens,
-            )
-
-            # Extract the baseline insights
-            baseline_insights = baseline_response.choices[0].message.content
-
-            # Extract meeting-specific insights
-            success_meeting, meeting_insights = self.extract_meeting_insights()
-            if not success_meeting:
-                meeting_insights = "Could not extract meeting insights. Proceeding with data insights only."
-
-            # Extract insights from Becker's web scrape
-            success_beckers, beckers_insights = self.extract_beckers_insights()
-            if not success_beckers:
-                beckers_insights = "Could not extract insights from Becker's article. Proceeding without this information."
-
-            # Now, generate enhanced insights by combining data analysis with meeting notes and web scrape
-            combined_prompt = """
-            You are an expert consultant creating an executive summary report that integrates multiple sources of information:
-            1. Data insights from operational metrics
-            2. Meeting notes from customer conversations
-            3. Industry news from Becker's Hospital Review
-            
-            Your task is to create a comprehensive executive summary that:
-            1. Heavily prioritizes both the meeting notes AND the Becker's article information in the findings and recommendations. No need to include that this is heavily prioritized, just do it.
-            2. Connects all three sources of information where relevant
-            3. Makes specific recommendations that address both the customer's concerns from the meeting AND the strategic implications from the Becker's article
-            4. Organizes information in a clear, business-focused format suitable for executives
-            5. Be concise with the information, don't repeat yourself just to fill up space
-            
-            The meeting notes and Becker's article should be treated as high-priority context that shapes your analysis and recommendations. Don't mention anywhere in the report that this is highly prioritized
-            """
-
-            enhanced_response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": combined_prompt},
-                    {
-                        "role": "user",
-                        "content": f"Here are the baseline data insights:\n\n{baseline_insights}\n\nHere are the meeting notes that should be heavily prioritized in the findings and recommendations:\n\n{meeting_notes_prompt}\n\nHere are the key insights extracted from the meeting notes:\n\n{meeting_insights}\n\nHere is important industry news from Becker's Hospital Review that should also be heavily prioritized:\n\n{beckers_web_scrape}\n\nHere are the key insights extracted from the Becker's article:\n\n{beckers_insights}\n\nPlease create an enhanced executive summary that heavily prioritizes BOTH the meeting notes AND the Becker's article information while incorporating relevant data insights. Format the response with clear sections for Key Findings, Regional Performance, and Recommendations using Markdown.",
-                    },
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
+            self.stage_timings = {}
+            pipeline_start = time.perf_counter()
+
+            # Fan out the independent calls
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = self._submit_source_stages(
+                    executor, customer_data, region_data
+                )
+                results = {stage: future.result() for future, stage in futures.items()}
+
+            # Final synthesis once every source is available
+            insights = self._timed(
+                "synthesis",
+                self._synthesize_insights,
+                *self._collect_source_results(results),
             )
-
-            # Extract the enhanced insights that prioritize meeting notes and Becker's information
-            insights = enhanced_response.choices[0].message.content
+            self.stage_timings["total"] = round(time.perf_counter() - pipeline_start, 3)
 
             # Cache the insights for reuse
             self.cached_insights = insights
@@ -205,6 +578,88 @@ class OpenAIAnalyzer:
                 f"Error generating insights with OpenAI API: {str(e)}\n{error_details}",
             )
 
+    def stream_insights(self, data):
+        """Generate insights while yielding (event, payload) progress tuples.
+
+        The baseline analysis is streamed as "baseline_token" events while the
+        extractions run, so the first text arrives without waiting for every
+        source. A "stage" event is yielded as each independent call finishes,
+        the final synthesis is streamed as "token" events, and a single
+        "insights" event carries the finished summary. Failures are reported
+        as an "error" event.
+        """
+        customer_data, region_data = data
+        try:
+            if self.cached_insights:
+                yield "token", {"text": self.cached_insights}
+                yield "insights", {"insights": self.cached_insights}
+                return
+
+            self.stage_timings = {}
+            pipeline_start = time.perf_counter()
+            stage_events = {
+                "baseline_analysis": "baseline_analyzed",
+                "meeting_extraction": "meeting_extracted",
+                "beckers_extraction": "beckers_extracted",
+            }
+
+            # Baseline tokens and finished calls arrive on one queue in the
+            # order they happen; a call's tokens always precede its completion
+            events = queue.Queue()
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = self._submit_source_stages(
+                    executor,
+                    customer_data,
+                    region_data,
+                    on_baseline_token=lambda text: events.put(("token", text)),
+                )
+                for future in futures:
+                    future.add_done_callback(lambda f: events.put(("done", f)))
+
+                results = {}
+                while len(results) < len(futures):
+                    kind, item = events.get()
+                    if kind == "token":
+                        yield "baseline_token", {"text": item}
+                        continue
+                    stage = futures[item]
+                    results[stage] = item.result()
+                    yield "stage", {
+                        "stage": stage_events[stage],
+                        "seconds": self.stage_timings.get(stage),
+                    }
+
+            yield "stage", {"stage": "synthesis"}
+
+            synthesis_start = time.perf_counter()
+            messages = self._synthesis_messages(*self._collect_source_results(results))
+            chunks = []
+            for text in self._stream_chat_completion(messages):
+                chunks.append(text)
+                yield "token", {"text": text}
+            insights = "".join(chunks)
+
+            self.stage_timings["synthesis"] = round(
+                time.perf_counter() - synthesis_start, 3
+            )
+            self.stage_timings["total"] = round(time.perf_counter() - pipeline_start, 3)
+            self.cached_insights = insights
+
+            yield "insights", {"insights": insights}
+
+        except Exception as e:
+            import traceback
+
+            error_details = traceback.format_exc()
+            print("ERROR DETAILS: ", error_details)
+            yield "error", {
+                "error": f"Error generating insights with OpenAI API: {str(e)}"
+            }
+
+    def get_stage_timings(self):
+        """Return a copy of the per-stage timings from the last pipeline run."""
+        return dict(self.stage_timings)
+
     def generate_pdf_content(self, data):
         """Generate content specifically formatted for a PDF report by reusing insights."""
         # If we already have insights from a previous call, use them
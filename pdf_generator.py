@@ -4,7 +4,8 @@ This module handles creating PDF reports from the OpenAI analysis.
 """
 
 import os
-import markdown
+import tempfile
+import uuid
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -16,13 +17,14 @@ from reportlab.platypus import (
     Table,
     TableStyle,
     Image,
-    ListFlowable,
-    ListItem,
+    PageBreak,
 )
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from io import BytesIO
 from xhtml2pdf import pisa
 from datetime import datetime
+from markdown_flowables import MarkdownFlowableConverter
+from report_cache import report_filename
 
 
 class PDFGenerator:
@@ -37,6 +39,9 @@ class PDFGenerator:
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
 
+        # Built on first use; holds a Markdown instance that is reused
+        self.converter = None
+
     def _setup_custom_styles(self):
         """Set up custom styles for the PDF document."""
         # Title style - check if it already exists to avoid KeyError
@@ -101,161 +106,148 @@ class PDFGenerator:
                 )
             )
 
+        # Table cell styles
+        if "TableCell" not in self.styles:
+            self.styles.add(
+                ParagraphStyle(
+                    name="TableCell",
+                    parent=self.styles["BodyText"],
+                    fontSize=9,
+                    leading=11,
+                    spaceAfter=0,
+                )
+            )
+
+        if "TableHeader" not in self.styles:
+            self.styles.add(
+                ParagraphStyle(
+                    name="TableHeader",
+                    parent=self.styles["TableCell"],
+                    fontName="Helvetica-Bold",
+                )
+            )
+
+        # Block quote style
+        if "Quote" not in self.styles:
+            self.styles.add(
+                ParagraphStyle(
+                    name="Quote",
+                    parent=self.styles["BodyText"],
+                    leftIndent=20,
+                    textColor=colors.HexColor("#495057"),
+                )
+            )
+
     def _convert_markdown_to_reportlab(self, md_text):
         """Convert markdown text to ReportLab elements."""
-        elements = []
-
-        # First convert markdown to HTML using the markdown library
-        html = markdown.markdown(md_text)
-
-        # Split the HTML by headers for easier processing
-        html_parts = html.split("<h1>")
-
-        # Process the first part (before any h1 tag)
-        first_part = html_parts[0]
-        if first_part.strip():
-            # Process paragraphs
-            for p in first_part.split("<p>"):
-                if not p.strip():
-                    continue
-                # Clean up paragraph closing tags
-                p = p.replace("</p>", "").strip()
-                if p:
-                    # Convert <strong> tags to bold in ReportLab
-                    p = p.replace("<strong>", "<b>").replace("</strong>", "</b>")
-                    # Convert <em> tags to italic in ReportLab
-                    p = p.replace("<em>", "<i>").replace("</em>", "</i>")
-                    elements.append(Paragraph(p, self.styles["BodyText"]))
-
-        # Process remaining parts with headers
-        for part in html_parts[1:]:
-            if not part.strip():
-                continue
-
-            # Split header from content
-            header_parts = part.split("</h1>", 1)
-            header = header_parts[0].strip()
-
-            # Add the h1 header
-            elements.append(Paragraph(header, self.styles["Title"]))
-            elements.append(Spacer(1, 0.1 * inch))
-
-            if len(header_parts) > 1:
-                content = header_parts[1].strip()
-
-                # Process h2 headers
-                h2_parts = content.split("<h2>")
-
-                # Content before first h2
-                first_h2_part = h2_parts[0]
-                self._process_content_part(first_h2_part, elements)
-
-                # Process each h2 section
-                for h2_part in h2_parts[1:]:
-                    if not h2_part.strip():
-                        continue
-
-                    # Split h2 header from content
-                    h2_header_parts = h2_part.split("</h2>", 1)
-                    h2_header = h2_header_parts[0].strip()
-
-                    # Add the h2 header
-                    elements.append(Paragraph(h2_header, self.styles["Heading2"]))
-                    elements.append(Spacer(1, 0.1 * inch))
-
-                    if len(h2_header_parts) > 1:
-                        h2_content = h2_header_parts[1].strip()
-                        self._process_content_part(h2_content, elements)
-
+        if self.converter is None:
+            self.converter = MarkdownFlowableConverter(
+                self.styles, available_width=letter[0] - 144
+            )
+        return self.converter.convert(md_text)
+
+    def _chart_elements(self, charts):
+        """Return a charts section with one Image per rendered chart."""
+        if not charts:
+            return []
+
+        elements = [
+            PageBreak(),
+            Paragraph("Metric Charts", self.styles["Heading2"]),
+            Spacer(1, 0.1 * inch),
+        ]
+        for chart in charts:
+            elements.append(
+                Image(
+                    BytesIO(chart.png),
+                    width=chart.width * inch,
+                    height=chart.height * inch,
+                )
+            )
+            elements.append(Spacer(1, 0.2 * inch))
         return elements
 
-    def _process_content_part(self, content, elements):
-        """Process a content part and add elements."""
-        if not content:
-            return
-
-        # Process paragraphs
-        for p in content.split("<p>"):
-            if not p.strip():
-                continue
-
-            # Clean up paragraph closing tags
-            p = p.replace("</p>", "").strip()
-            if p:
-                # Convert <strong> tags to bold in ReportLab
-                p = p.replace("<strong>", "<b>").replace("</strong>", "</b>")
-                # Convert <em> tags to italic in ReportLab
-                p = p.replace("<em>", "<i>").replace("</em>", "</i>")
-                elements.append(Paragraph(p, self.styles["BodyText"]))
-                elements.append(Spacer(1, 0.1 * inch))
-
-        # Process unordered lists
-        if "<ul>" in content:
-            ul_parts = content.split("<ul>")
-            for ul_part in ul_parts[1:]:
-                if "</ul>" in ul_part:
-                    list_content = ul_part.split("</ul>")[0].strip()
-                    list_items = []
-
-                    for li in list_content.split("<li>"):
-                        li = li.replace("</li>", "").strip()
-                        if li:
-                            # Convert <strong> tags to bold in ReportLab
-                            li = li.replace("<strong>", "<b>").replace(
-                                "</strong>", "</b>"
-                            )
-                            # Convert <em> tags to italic in ReportLab
-                            li = li.replace("<em>", "<i>").replace("</em>", "</i>")
-                            list_items.append(
-                                ListItem(
-                                    Paragraph(li, self.styles["Bullet"]), leftIndent=20
-                                )
-                            )
-
-                    if list_items:
-                        elements.append(
-                            ListFlowable(list_items, bulletType="bullet", start="•")
-                        )
-                        elements.append(Spacer(1, 0.1 * inch))
-
-    def generate_pdf_from_markdown(self, markdown_content, filename="report.pdf"):
+    def _build_pdf(self, markdown_content, target, charts=None):
+        """
+        Render markdown into target, a file path or a file-like object,
+        followed by any charts (chart_renderer.Chart).
+        """
+        # Set up the PDF document
+        doc = SimpleDocTemplate(
+            target,
+            pagesize=letter,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72,
+        )
+
+        # Convert markdown to ReportLab elements
+        elements = self._convert_markdown_to_reportlab(markdown_content)
+        elements.extend(self._chart_elements(charts))
+
+        # Add a footer with page numbers
+        def add_page_number(canvas, doc):
+            canvas.saveState()
+            canvas.setFont("Helvetica", 9)
+            page_num = canvas.getPageNumber()
+            text = f"Page {page_num}"
+            canvas.drawRightString(letter[0] - 72, 40, text)
+            canvas.restoreState()
+
+        # Build the PDF
+        doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
+
+    def _output_path(self, filename):
+        """Return a unique path in the output directory for filename."""
+        # The random suffix keeps reports generated in the same second apart
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = uuid.uuid4().hex[:8]
+        output_filename = f"{os.path.splitext(filename)[0]}_{timestamp}_{suffix}.pdf"
+        return os.path.join(self.output_dir, output_filename)
+
+    def render_pdf_bytes(self, markdown_content, charts=None):
+        """Render markdown content to PDF bytes without touching the disk."""
+        buffer = BytesIO()
+        self._build_pdf(markdown_content, buffer, charts)
+        return buffer.getvalue()
+
+    def generate_pdf_from_markdown(
+        self, markdown_content, filename="report.pdf", charts=None
+    ):
         """Generate a PDF file from markdown content."""
         try:
-            # Generate a unique filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            if not filename.endswith(".pdf"):
-                filename = filename + ".pdf"
-            output_filename = f"{os.path.splitext(filename)[0]}_{timestamp}.pdf"
-            output_path = os.path.join(self.output_dir, output_filename)
-
-            # Set up the PDF document
-            doc = SimpleDocTemplate(
-                output_path,
-                pagesize=letter,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=72,
-            )
+            output_path = self._output_path(filename)
+            self._build_pdf(markdown_content, output_path, charts)
+            return True, output_path
 
-            # Convert markdown to ReportLab elements
-            elements = self._convert_markdown_to_reportlab(markdown_content)
-
-            # Add a footer with page numbers
-            def add_page_number(canvas, doc):
-                canvas.saveState()
-                canvas.setFont("Helvetica", 9)
-                page_num = canvas.getPageNumber()
-                text = f"Page {page_num}"
-                canvas.drawRightString(letter[0] - 72, 40, text)
-                canvas.restoreState()
-
-            # Build the PDF
-            doc.build(
-                elements, onFirstPage=add_page_number, onLaterPages=add_page_number
+        except Exception as e:
+            return False, f"Error generating PDF: {str(e)}"
+
+    def generate_pdf_to_cache(
+        self, markdown_content, report_cache, filename="report.pdf", charts=None
+    ):
+        """
+        Render markdown content into report_cache, reusing the cached PDF for
+        identical content and charts. The PDF is also written once to the
+        output directory, which every worker can read, so the download works
+        wherever it lands. Returns (success, download filename or error).
+        """
+        try:
+            report_id, pdf_bytes = report_cache.get_or_render(
+                markdown_content,
+                lambda content: self.render_pdf_bytes(content, charts),
+                key_parts=[chart.key for chart in charts or []],
             )
+            download_name = report_filename(filename, report_id)
 
-            return True, output_path
+            output_path = os.path.join(self.output_dir, download_name)
+            if not os.path.exists(output_path):
+                fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pdf_bytes)
+                os.replace(tmp_path, output_path)
+            return True, download_name
 
         except Exception as e:
             return False, f"Error generating PDF: {str(e)}"
@@ -263,12 +255,7 @@ class PDFGenerator:
     def convert_html_to_pdf(self, html_content, filename="report.pdf"):
         """Convert HTML content to a PDF file."""
         try:
-            # Generate a unique filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            if not filename.endswith(".pdf"):
-                filename = filename + ".pdf"
-            output_filename = f"{os.path.splitext(filename)[0]}_{timestamp}.pdf"
-            output_path = os.path.join(self.output_dir, output_filename)
+            output_path = self._output_path(filename)
 
             # Create a file buffer
             result_file = open(output_path, "w+b")
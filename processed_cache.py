@@ -0,0 +1,238 @@
+"""
+Processed result cache module for ROI Automation Dashboard.
+This module handles storing DataProcessor output (customer and region
+aggregates as Parquet, plus a JSON preview of the raw file) keyed by the
+file's content hash, so repeat previews and analyses skip parsing entirely.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import pandas as pd
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+from data_processor import COLUMNAR_FORMATS, PROCESSOR_VERSION, DataProcessor
+from rollup import RollupCube
+from anomaly_detection import detect_anomalies
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "processed")
+DEFAULT_MAX_ENTRIES = 100
+
+# (path, size, mtime) -> content hash, so an unchanged file is hashed once
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def file_fingerprint(file_path, block_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's contents."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    with _fingerprints_lock:
+        _fingerprints[memo_key] = digest.hexdigest()
+    return digest.hexdigest()
+
+
+def file_preview(file_path):
+    """Return the row count and column names of a data file without pandas."""
+    file_format = COLUMNAR_FORMATS.get(os.path.splitext(file_path)[1].lower())
+    if file_format:
+        dataset = ds.dataset(file_path, format=file_format)
+        column_names = dataset.schema.names
+        rows = dataset.count_rows()
+    else:
+        # Stream the file through Arrow's CSV reader, converting one column
+        reader = pa_csv.open_csv(file_path)
+        column_names = reader.schema.names
+        reader = pa_csv.open_csv(
+            file_path,
+            convert_options=pa_csv.ConvertOptions(include_columns=column_names[:1]),
+        )
+        rows = sum(batch.num_rows for batch in reader)
+
+    return {
+        "rows": rows,
+        "columns": len(column_names),
+        "column_names": column_names,
+    }
+
+
+class ProcessedResultCache:
+    """
+    Directory of processed results, one subdirectory per file hash,
+    processor version and set of processing options. The least recently
+    used entries are removed once there are more than max_entries.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, file_path, options=None):
+        key = f"{file_fingerprint(file_path)}-v{PROCESSOR_VERSION}"
+        if options:
+            options_json = json.dumps(options, sort_keys=True, default=str)
+            key += "-" + hashlib.sha256(options_json.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key)
+
+    def _write_entry(self, entry_dir, files):
+        """Write an entry's files into a temp dir and move it into place."""
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            for filename, write in files.items():
+                write(os.path.join(tmp_dir, filename))
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another worker stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._prune()
+
+    def _touch(self, entry_dir):
+        os.utime(entry_dir)
+
+    def _prune(self):
+        entries = [
+            entry.path
+            for entry in os.scandir(self.cache_dir)
+            if entry.is_dir() and not entry.name.startswith(".tmp-")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for entry_dir in entries[: len(entries) - self.max_entries]:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def get_processed(self, file_path, **processor_options):
+        """
+        Return (customer_df, region_df, cube, anomalies) as DataProcessor and
+        detect_anomalies build them for the file, from the cache when this
+        file content has been processed before. A miss processes the file
+        once and returns the results it just stored.
+        """
+        options = {k: v for k, v in processor_options.items() if v is not None}
+        # Chunk size changes how the file is read, not the result
+        options.pop("chunksize", None)
+        entry_dir = self._entry_dir(file_path, options)
+
+        paths = [
+            os.path.join(entry_dir, filename)
+            for filename in (
+                "customer.parquet",
+                "region.parquet",
+                "cube.npz",
+                "anomalies.parquet",
+            )
+        ]
+        if all(os.path.exists(path) for path in paths):
+            self._touch(entry_dir)
+            return (
+                pd.read_parquet(paths[0]),
+                pd.read_parquet(paths[1]),
+                RollupCube.load(paths[2]),
+                pd.read_parquet(paths[3]),
+            )
+
+        return self._process(file_path, entry_dir, processor_options)
+
+    def get_cube(self, file_path, **processor_options):
+        """
+        Return the RollupCube DataProcessor builds for the file, from the
+        cache when this file content has been processed before.
+        """
+        options = {k: v for k, v in processor_options.items() if v is not None}
+        options.pop("chunksize", None)
+        entry_dir = self._entry_dir(file_path, options)
+
+        cube_path = os.path.join(entry_dir, "cube.npz")
+        if os.path.exists(cube_path):
+            self._touch(entry_dir)
+            return RollupCube.load(cube_path)
+
+        return self._process(file_path, entry_dir, processor_options)[2]
+
+    def _process(self, file_path, entry_dir, processor_options):
+        """
+        Process the file, store its aggregates, cube and anomalies, and
+        return (customer_df, region_df, cube, anomalies).
+        """
+        processor = DataProcessor(file_path, **processor_options)
+        customer_df, region_df = processor.process_frames()
+        anomalies = detect_anomalies(processor.monthly_sums, processor.metrics)
+        self._write_entry(
+            entry_dir,
+            {
+                "customer.parquet": customer_df.to_parquet,
+                "region.parquet": region_df.to_parquet,
+                "cube.npz": processor.cube.save,
+                "anomalies.parquet": anomalies.to_parquet,
+            },
+        )
+        return customer_df, region_df, processor.cube, anomalies
+
+    def get_preview(self, file_path):
+        """Return file_preview(file_path), from the cache when possible."""
+        entry_dir = self._entry_dir(file_path, {"preview": True})
+        preview_path = os.path.join(entry_dir, "preview.json")
+        if os.path.exists(preview_path):
+            self._touch(entry_dir)
+            with open(preview_path) as f:
+                return json.load(f)
+
+        preview = file_preview(file_path)
+
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(preview, f)
+
+        self._write_entry(entry_dir, {"preview.json": write})
+        return preview
+
+
+def get_default_processed_cache():
+    """Build the cache configured by PROCESSED_CACHE_*, or None if disabled."""
+    if os.getenv("PROCESSED_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return ProcessedResultCache(
+        cache_dir=os.getenv("PROCESSED_CACHE_DIR", DEFAULT_CACHE_DIR),
+        max_entries=int(os.getenv("PROCESSED_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+def load_processed_data(file_path, cache=None):
+    """
+    Return (customer_dict, region_dict, cube, anomalies) for a file,
+    processing it at most once and using cache if given. The anomaly records
+    come from the monthly sums of the processor that built the cube.
+    """
+    if cache is None:
+        processor = DataProcessor(file_path)
+        customer_df, region_df = processor.process_frames()
+        cube = processor.cube
+        anomalies = detect_anomalies(processor.monthly_sums, processor.metrics)
+    else:
+        customer_df, region_df, cube, anomalies = cache.get_processed(file_path)
+    return (
+        customer_df.to_dict(orient="records"),
+        region_df.to_dict(orient="records"),
+        cube,
+        anomalies.to_dict(orient="records"),
+    )
+
+
+def load_rollup_cube(file_path, cache=None):
+    """Return the tenant/region/location RollupCube for a file."""
+    if cache is None:
+        return DataProcessor(file_path).build_cube()
+    return cache.get_cube(file_path)
@@ -0,0 +1,179 @@
+"""
+Prompt serializer module for ROI Automation Dashboard.
+This module handles turning processed metric records into compact tables for
+LLM prompts, so prompt size stays small as regions and quarters grow.
+"""
+
+import io
+import csv
+import math
+from llm_client import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to the character-based estimate
+    tiktoken = None
+
+_encoding = None
+
+# Trend columns left out of the metric tables: the rolling means repeat the
+# quarters already shown and the seasonal changes are in the ranked findings
+PROMPT_EXCLUDED_SUFFIXES = ("_rolling4", "_qoq_sa")
+
+
+def count_tokens(text):
+    """Count prompt tokens with tiktoken when installed, else estimate them."""
+    global _encoding
+
+    if tiktoken is None:
+        return estimate_tokens(text)
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o tokenizer
+    return len(_encoding.encode(text))
+
+
+def format_value(value, significant_digits=4):
+    """
+    Format a cell: round floats to a few significant digits (never fewer than
+    the integer part), drop trailing zeros and leave NaN and infinity empty.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return ""
+        magnitude = math.floor(math.log10(abs(value))) if value else 0
+        decimals = max(0, significant_digits - 1 - magnitude)
+        text = f"{value:.{decimals}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+    return str(value)
+
+
+def quarter_sort_key(quarter_year):
+    """Sort key for 'Q4 2024' style labels."""
+    quarter, year = quarter_year.split()
+    return int(year), int(quarter[1:])
+
+
+def latest_quarter(records):
+    """Return the most recent quarter_year label in records, or None."""
+    quarters = {record["quarter_year"] for record in records}
+    return max(quarters, key=quarter_sort_key) if quarters else None
+
+
+def select_rows(records, last_n_quarters=None, min_qoq_change=None, quarters=None):
+    """
+    Return the records worth sending to the model.
+
+    last_n_quarters keeps only the most recent N quarters and quarters keeps
+    only the listed quarter labels; given both, rows must pass both.
+    min_qoq_change keeps only rows where at least one *_qoq value (percent or
+    percentage-point change) is at least that large in absolute value.
+    """
+    if last_n_quarters:
+        all_quarters = sorted(
+            {record["quarter_year"] for record in records}, key=quarter_sort_key
+        )
+        keep = set(all_quarters[-last_n_quarters:])
+        records = [record for record in records if record["quarter_year"] in keep]
+
+    if quarters:
+        records = [record for record in records if record["quarter_year"] in quarters]
+
+    if min_qoq_change is not None:
+        records = [
+            record
+            for record in records
+            if any(
+                key.endswith("_qoq")
+                and isinstance(value, (int, float))
+                and not math.isnan(value)
+                and abs(value) >= min_qoq_change
+                for key, value in record.items()
+            )
+        ]
+
+    return records
+
+
+def serialize_records(
+    records, significant_digits=4, table_format="csv", exclude_suffixes=()
+):
+    """
+    Render records as a CSV or markdown table with a single header row,
+    leaving out columns that end with any of exclude_suffixes.
+    """
+    if not records:
+        return "(no rows)"
+
+    columns = [col for col in records[0] if not col.endswith(tuple(exclude_suffixes))]
+    rows = [
+        [format_value(record.get(col), significant_digits) for col in columns]
+        for record in records
+    ]
+
+    if table_format == "markdown":
+        lines = [
+            "| " + " | ".join(columns) + " |",
+            "|" + "---|" * len(columns),
+        ]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows)
+        return "\n".join(lines)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().rstrip("\n")
+
+
+def serialize_metric_definitions(definitions):
+    """Render metric definitions as one short line per metric."""
+    return "\n".join(
+        f"- {name}: {info['description']} ({info['goal']} is better)"
+        for name, info in definitions.items()
+    )
+
+
+def serialize_metric_data(
+    customer_data,
+    region_data,
+    last_n_quarters=None,
+    min_qoq_change=None,
+    region_quarters=None,
+    significant_digits=4,
+    table_format="csv",
+):
+    """
+    Serialize the customer and region records for the baseline prompt.
+
+    The quarter window applies to both tables; the QoQ threshold only trims
+    region rows so the customer-level trend is always sent in full.
+    region_quarters optionally limits the region table to those quarters.
+
+    Returns (customer_table, region_table, stats) where stats holds the row
+    counts and the token counts of the compact tables versus the raw record
+    dumps they replace.
+    """
+    customer_rows = select_rows(customer_data, last_n_quarters)
+    region_rows = select_rows(
+        region_data, last_n_quarters, min_qoq_change, region_quarters
+    )
+
+    excluded = PROMPT_EXCLUDED_SUFFIXES
+    customer_table = serialize_records(
+        customer_rows, significant_digits, table_format, excluded
+    )
+    region_table = serialize_records(
+        region_rows, significant_digits, table_format, excluded
+    )
+
+    stats = {
+        "customer_rows": len(customer_rows),
+        "region_rows": len(region_rows),
+        "raw_tokens": count_tokens(str(customer_data)) + count_tokens(str(region_data)),
+        "compact_tokens": count_tokens(customer_table) + count_tokens(region_table),
+    }
+    return customer_table, region_table, stats
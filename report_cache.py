@@ -0,0 +1,145 @@
+"""
+Report cache module for ROI Automation Dashboard.
+This module handles keeping rendered PDF reports in memory, keyed by a hash
+of their markdown, so identical summaries are rendered once and this
+worker's downloads are served without reading from disk. Each report is also
+written to the session's reports folder, which is shared by every worker.
+"""
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_MB = 256
+
+REPORT_ID_PATTERN = re.compile(r"_([0-9a-f]{32})\.pdf$")
+
+
+def report_id_for(markdown_content, key_parts=()):
+    """
+    Return the content-addressed ID of a report's markdown plus anything
+    else rendered into it (e.g. chart keys).
+    """
+    digest = hashlib.sha256(markdown_content.encode("utf-8"))
+    for part in key_parts:
+        digest.update(b"\0" + part.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def report_filename(filename, report_id):
+    """Return the download name for a cached report, e.g. summary_<id>.pdf."""
+    return f"{os.path.splitext(filename)[0]}_{report_id}.pdf"
+
+
+def parse_report_filename(filename):
+    """Return the report ID in a download name, or None if it has none."""
+    match = REPORT_ID_PATTERN.search(filename)
+    return match.group(1) if match else None
+
+
+class ReportCache:
+    """
+    Thread-safe LRU cache of rendered PDF bytes. The least recently used
+    reports are evicted once there are more than max_entries or their total
+    size passes max_bytes.
+    """
+
+    def __init__(
+        self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_MB * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def get(self, report_id):
+        """Return a report's PDF bytes, or None if it isn't cached."""
+        with self.lock:
+            pdf_bytes = self.entries.get(report_id)
+            if pdf_bytes is not None:
+                self.entries.move_to_end(report_id)
+            return pdf_bytes
+
+    def put(self, report_id, pdf_bytes):
+        """Store a report and evict the least recently used ones over budget."""
+        with self.lock:
+            if report_id in self.entries:
+                self.total_bytes -= len(self.entries.pop(report_id))
+            self.entries[report_id] = pdf_bytes
+            self.total_bytes += len(pdf_bytes)
+
+            # Always keep the newest report, even if it alone is over budget
+            while len(self.entries) > 1 and (
+                len(self.entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_render(self, markdown_content, render, key_parts=()):
+        """
+        Return (report_id, pdf_bytes) for the markdown, calling
+        render(markdown_content) only if the same content isn't cached.
+        """
+        report_id = report_id_for(markdown_content, key_parts)
+        pdf_bytes = self.get(report_id)
+        if pdf_bytes is not None:
+            with self.lock:
+                self.hits += 1
+            return report_id, pdf_bytes
+
+        with self.lock:
+            self.misses += 1
+        pdf_bytes = render(markdown_content)
+        self.put(report_id, pdf_bytes)
+        return report_id, pdf_bytes
+
+    def get_stats(self):
+        """Return entry counts, cached size and hit/miss counters."""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_shared_report_cache = None
+_shared_report_cache_lock = threading.Lock()
+
+
+def get_shared_report_cache():
+    """
+    Return the process-wide report cache configured by REPORT_CACHE_*, or
+    None if disabled (reports are then written to the reports folder).
+    """
+    global _shared_report_cache
+
+    if os.getenv("REPORT_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+
+    with _shared_report_cache_lock:
+        if _shared_report_cache is None:
+            _shared_report_cache = ReportCache(
+                max_entries=int(
+                    os.getenv("REPORT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+                ),
+                max_bytes=int(os.getenv("REPORT_CACHE_MAX_MB", DEFAULT_MAX_MB))
+                * 1024
+                * 1024,
+            )
+        return _shared_report_cache
@@ -0,0 +1,101 @@
+"""
+Report pipeline module for ROI Automation Dashboard.
+This module runs the full report generation pipeline (data processing, AI
+analysis and PDF rendering) outside of a request so it can be queued.
+"""
+
+import os
+import time
+from processed_cache import get_default_processed_cache, load_processed_data
+from openai_analyzer import OpenAIAnalyzer
+from pdf_generator import PDFGenerator
+from chart_renderer import render_report_charts
+from report_cache import get_shared_report_cache
+
+
+def render_report(
+    insights, reports_folder, filename="executive_summary.pdf", charts=None
+):
+    """
+    Render the executive summary PDF and return (success, download filename).
+
+    The PDF is written to reports_folder. With the in-memory report cache
+    enabled, identical summaries are rendered once and kept in memory too.
+    """
+    pdf_generator = PDFGenerator(reports_folder)
+    report_cache = get_shared_report_cache()
+    if report_cache is not None:
+        return pdf_generator.generate_pdf_to_cache(
+            insights, report_cache, filename, charts
+        )
+
+    success, pdf_path = pdf_generator.generate_pdf_from_markdown(
+        insights, filename, charts
+    )
+    if not success:
+        return False, pdf_path
+    return True, os.path.basename(pdf_path)
+
+
+def run_report_pipeline(file_path, reports_folder, on_stage=None):
+    """Generate the executive summary for a data file.
+
+    on_stage(stage, seconds) is called as each stage finishes so callers can
+    report progress. Returns a result dict in the same shape as /analyze.
+    """
+
+    def record(stage, seconds):
+        if on_stage:
+            on_stage(stage, round(seconds, 3))
+
+    # Process the metric data, reusing the stored result for a known file
+    start = time.perf_counter()
+    processed_cache = get_default_processed_cache()
+    customer_dict, region_dict, cube, anomalies = load_processed_data(
+        file_path, processed_cache
+    )
+    record("data_processing", time.perf_counter() - start)
+
+    # Multi-source data collection and AI synthesis
+    openai_analyzer = OpenAIAnalyzer(
+        customer=cube.customer_name(), cube=cube, anomalies=anomalies
+    )
+    success, insights = openai_analyzer.generate_insights((customer_dict, region_dict))
+    for stage, seconds in openai_analyzer.get_stage_timings().items():
+        if stage != "total":
+            record(stage, seconds)
+    if not success:
+        raise RuntimeError(insights)
+
+    meeting_insights = openai_analyzer.meeting_insights
+    if not meeting_insights:
+        meeting_insights = (
+            "Meeting insights data unavailable. Proceeding with available data sources."
+        )
+
+    beckers_insights = openai_analyzer.beckers_insights
+    if not beckers_insights:
+        beckers_insights = "Becker's healthcare news unavailable. Proceeding with available data sources."
+
+    # Trend and region charts, within the chart render-time budget
+    start = time.perf_counter()
+    charts = render_report_charts(
+        customer_dict, region_dict, quarter=openai_analyzer.focus_quarter
+    )
+    record("chart_rendering", time.perf_counter() - start)
+
+    # Create the downloadable executive summary
+    start = time.perf_counter()
+    success, pdf_filename = render_report(insights, reports_folder, charts=charts)
+    record("pdf_rendering", time.perf_counter() - start)
+    if not success:
+        raise RuntimeError(pdf_filename)
+
+    return {
+        "success": True,
+        "insights": insights,
+        "meeting_insights": meeting_insights,
+        "beckers_insights": beckers_insights,
+        "pdf_path": pdf_filename,
+        "timings": openai_analyzer.get_stage_timings(),
+    }
@@ -0,0 +1,424 @@
+"""
+Rollup module for ROI Automation Dashboard.
+This module handles the tenant -> region -> location by quarter rollup cube:
+the summed metric columns of every node in the hierarchy for every quarter,
+held in dense arrays with a path index so any node and quarter is a
+dictionary lookup. Ratio metrics are derived from the summed numerators and
+denominators, never averaged.
+"""
+
+import numpy as np
+import pandas as pd
+from data_processor import (
+    HIERARCHY_COLUMNS,
+    METRIC_COLUMNS,
+    METRIC_ENGINE,
+    MISSING_HIERARCHY_NAME,
+    QOQ_METRICS,
+    RATIO_METRICS,
+    format_quarter_key,
+)
+
+# Levels of the hierarchy; a node's path has one name per level below total
+LEVELS = ["total", "tenant", "region", "location"]
+
+# Month mask of a quarter with data in all three of its months
+FULL_QUARTER_MASK = 0b111
+
+
+def parse_quarter_label(label):
+    """
+    Return the integer quarter key for a label like "Q4 2024". Raises
+    ValueError for anything else, including quarters outside Q1-Q4.
+    """
+    quarter, year = label.split()
+    if not quarter.startswith("Q") or quarter[1:] not in ("1", "2", "3", "4"):
+        raise ValueError(f"Not a quarter label: {label}")
+    return int(year) * 4 + int(quarter[1:]) - 1
+
+
+def qoq_change(metric, value, previous):
+    """Return a metric's QoQ change in the units used by add_qoq_changes."""
+    if value is None or previous is None:
+        return None
+    if QOQ_METRICS[metric] == "diff":
+        return (value - previous) * 100
+    if previous == 0:
+        return None
+    return (value / previous - 1) * 100
+
+
+class RollupCube:
+    """
+    Summed metric columns for every hierarchy node and quarter.
+
+    sums has shape (nodes, quarters, columns) and present marks the
+    (node, quarter) cells that had any rows. paths[i] is node i's path, e.g.
+    () for the total or (tenant, region) for a region. month_masks has a bit
+    per month of each quarter that had any rows; without it every quarter
+    is taken to be complete.
+    """
+
+    def __init__(
+        self,
+        quarter_keys,
+        paths,
+        sums,
+        present,
+        columns=METRIC_COLUMNS,
+        month_masks=None,
+    ):
+        self.quarter_keys = np.asarray(quarter_keys, dtype=np.int32)
+        if month_masks is None:
+            month_masks = np.full(len(self.quarter_keys), FULL_QUARTER_MASK)
+        self.month_masks = np.asarray(month_masks, dtype=np.int8)
+        self.paths = [tuple(path) for path in paths]
+        self.sums = sums
+        self.present = present
+        self.columns = list(columns)
+
+        self.column_index = {column: i for i, column in enumerate(self.columns)}
+        # Metrics whose input columns the cube has
+        self.metric_names = [
+            name
+            for name, metric in METRIC_ENGINE.metrics.items()
+            if all(column in self.column_index for column in metric.inputs)
+        ]
+        self.node_index = {path: i for i, path in enumerate(self.paths)}
+        self.quarter_index = {int(key): j for j, key in enumerate(self.quarter_keys)}
+        self.level_nodes = [[] for _ in LEVELS]
+        self.child_nodes = {}
+        for i, path in enumerate(self.paths):
+            self.level_nodes[len(path)].append(i)
+            if path:
+                self.child_nodes.setdefault(path[:-1], []).append(i)
+
+    @classmethod
+    def from_leaf_sums(cls, leaf_sums):
+        """
+        Build the cube from sums grouped by quarter_key (or month_key, whose
+        months are summed into their quarters) and the hierarchy columns.
+        Every parent is rolled up from its leaves in one pass.
+        """
+        frame = leaf_sums.reset_index()
+        if "quarter_key" not in frame.columns:
+            frame["quarter_key"] = frame["month_key"] // 3
+        quarter_keys, quarter_ids = np.unique(
+            frame["quarter_key"].to_numpy(dtype=np.int32), return_inverse=True
+        )
+        month_masks = None
+        if "month_key" in frame.columns:
+            month_masks = np.zeros(len(quarter_keys), dtype=np.int8)
+            month_bits = 1 << (frame["month_key"].to_numpy(dtype=np.int32) % 3)
+            np.bitwise_or.at(month_masks, quarter_ids, month_bits.astype(np.int8))
+        hierarchy = frame[HIERARCHY_COLUMNS].astype(object)
+        hierarchy = hierarchy.where(hierarchy.notna(), MISSING_HIERARCHY_NAME)
+        hierarchy = hierarchy.astype(str)
+        columns = list(leaf_sums.columns)
+        values = frame[columns].to_numpy(dtype=np.float64)
+
+        # Node IDs of every row at each level, with levels stored in order
+        paths = [()]
+        row_nodes = [np.zeros(len(frame), dtype=np.int64)]
+        for depth in range(1, len(LEVELS) if len(frame) else 1):
+            codes, uniques = pd.MultiIndex.from_frame(
+                hierarchy.iloc[:, :depth]
+            ).factorize()
+            row_nodes.append(codes + len(paths))
+            paths.extend(tuple(unique) for unique in uniques)
+
+        sums = np.zeros((len(paths), len(quarter_keys), len(columns)))
+        present = np.zeros((len(paths), len(quarter_keys)), dtype=bool)
+        for nodes in row_nodes:
+            np.add.at(sums, (nodes, quarter_ids), values)
+            present[nodes, quarter_ids] = True
+
+        return cls(quarter_keys, paths, sums, present, columns, month_masks)
+
+    def save(self, path):
+        """Write the cube to a compressed .npz file."""
+        names = np.array(
+            [list(p) + [""] * (len(LEVELS) - 1 - len(p)) for p in self.paths],
+            dtype=str,
+        )
+        depths = np.array([len(p) for p in self.paths], dtype=np.int8)
+        np.savez_compressed(
+            path,
+            quarter_keys=self.quarter_keys,
+            names=names,
+            depths=depths,
+            sums=self.sums,
+            present=self.present,
+            columns=np.array(self.columns),
+            month_masks=self.month_masks,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a cube written by save()."""
+        with np.load(path) as data:
+            paths = [
+                tuple(names[:depth])
+                for names, depth in zip(data["names"].tolist(), data["depths"])
+            ]
+            return cls(
+                data["quarter_keys"],
+                paths,
+                data["sums"],
+                data["present"],
+                data["columns"].tolist(),
+                data["month_masks"] if "month_masks" in data else None,
+            )
+
+    def customer_name(self):
+        """
+        Return the data's tenant name, or the tenant names joined with " + "
+        when it has several, e.g. to scope per-customer stores.
+        """
+        tenants = sorted(
+            self.paths[i][0] for i in self.level_nodes[LEVELS.index("tenant")]
+        )
+        return " + ".join(tenants) or None
+
+    def quarter_labels(self):
+        return format_quarter_key(self.quarter_keys)
+
+    def latest_complete_quarter(self):
+        """
+        Return the key of the latest quarter with data in all three months,
+        or of the latest quarter if none is complete (None for an empty cube).
+        """
+        if not len(self.quarter_keys):
+            return None
+        complete = self.quarter_keys[self.month_masks == FULL_QUARTER_MASK]
+        return int(complete.max() if len(complete) else self.quarter_keys.max())
+
+    def lookup(self, path, quarter_key):
+        """Return a node's summed columns for a quarter, or None if absent."""
+        i = self.node_index.get(tuple(path))
+        j = self.quarter_index.get(int(quarter_key))
+        if i is None or j is None or not self.present[i, j]:
+            return None
+        return self.sums[i, j]
+
+    def metrics(self, path, quarter_key):
+        """
+        Return a node's metric values for a quarter, or None. Values that
+        can't be computed (a zero denominator) are None.
+        """
+        sums = self.lookup(path, quarter_key)
+        if sums is None:
+            return None
+
+        values = METRIC_ENGINE.evaluate(
+            {column: sums[i] for i, column in enumerate(self.columns)},
+            self.metric_names,
+        )
+        return {
+            metric: float(value) if np.isfinite(value) else None
+            for metric, value in values.items()
+        }
+
+    def children(self, path):
+        """Return the paths of a node's children, sorted by name."""
+        return sorted(self.paths[i] for i in self.child_nodes.get(tuple(path), []))
+
+    def region_paths(self, region_name):
+        """Return the (tenant, region) paths of every region with this name."""
+        return [
+            self.paths[i]
+            for i in self.level_nodes[LEVELS.index("region")]
+            if self.paths[i][1] == region_name
+        ]
+
+    def add(self, other):
+        """
+        Return a new cube with other's sums added to this one's. Only the
+        cells other has data for are touched.
+        """
+        paths = self.paths + [p for p in other.paths if p not in self.node_index]
+        quarter_keys = np.union1d(self.quarter_keys, other.quarter_keys)
+        sums = np.zeros((len(paths), len(quarter_keys), len(self.columns)))
+        present = np.zeros((len(paths), len(quarter_keys)), dtype=bool)
+
+        own_quarters = np.searchsorted(quarter_keys, self.quarter_keys)
+        sums[: len(self.paths)][:, own_quarters] = self.sums
+        present[: len(self.paths)][:, own_quarters] = self.present
+
+        node_index = {path: i for i, path in enumerate(paths)}
+        nodes = np.array([node_index[path] for path in other.paths], dtype=np.int64)
+        quarters = np.searchsorted(quarter_keys, other.quarter_keys)
+        columns = [other.column_index[column] for column in self.columns]
+        cells = np.ix_(nodes, quarters)
+        sums[cells] += other.sums[:, :, columns]
+        present[cells] |= other.present
+
+        month_masks = np.zeros(len(quarter_keys), dtype=np.int8)
+        month_masks[own_quarters] = self.month_masks
+        month_masks[quarters] |= other.month_masks
+
+        return RollupCube(quarter_keys, paths, sums, present, self.columns, month_masks)
+
+    def level_frame(self, level, quarter_keys=None):
+        """
+        Return a level's summed columns as a DataFrame with one row per node
+        and quarter that had data, like grouping the raw rows by quarter_key
+        and the level's hierarchy columns. quarter_keys limits the quarters.
+        """
+        depth = LEVELS.index(level)
+        nodes = np.array(self.level_nodes[depth], dtype=np.int64)
+        quarters = np.arange(len(self.quarter_keys))
+        if quarter_keys is not None:
+            quarters = quarters[np.isin(self.quarter_keys, quarter_keys)]
+        node_ids, quarter_ids = np.nonzero(self.present[np.ix_(nodes, quarters)])
+        quarter_ids = quarters[quarter_ids]
+
+        frame = pd.DataFrame(
+            self.sums[nodes[node_ids], quarter_ids], columns=self.columns
+        )
+        frame.insert(0, "quarter_key", self.quarter_keys[quarter_ids])
+        for d, column in enumerate(HIERARCHY_COLUMNS[:depth]):
+            frame.insert(1 + d, column, [self.paths[i][d] for i in nodes[node_ids]])
+        return frame
+
+    def contributions(self, path, quarter_key, metric):
+        """
+        Return each child's share of the node's QoQ change in metric, in the
+        same units as the change. The shares add up to the node's change.
+        Only ratio ("a / b") and single-column metrics can be split.
+        """
+        path = tuple(path)
+        current = self.lookup(path, quarter_key)
+        previous = self.lookup(path, quarter_key - 1)
+        child_ids = self.child_nodes.get(path, [])
+        column = METRIC_ENGINE.metrics[metric].column
+        if current is None or previous is None or not child_ids:
+            return {}
+        if metric not in RATIO_METRICS and column is None:
+            return {}
+
+        # Children missing from a quarter contribute zeros to it
+        now = self.sums[child_ids, self.quarter_index[int(quarter_key)]]
+        before = self.sums[child_ids, self.quarter_index[int(quarter_key) - 1]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if metric in RATIO_METRICS:
+                num, den = (self.column_index[c] for c in RATIO_METRICS[metric])
+                # A ratio's change splits exactly into the change of each
+                # child's numerator over the parent's denominator
+                shares = now[:, num] / current[den] - before[:, num] / previous[den]
+                if QOQ_METRICS[metric] == "diff":
+                    shares = shares * 100
+                else:
+                    shares = shares / (previous[num] / previous[den]) * 100
+            else:
+                column = self.column_index[column]
+                shares = (now[:, column] - before[:, column]) * 100
+                if QOQ_METRICS[metric] == "pct_change":
+                    shares = shares / previous[column]
+
+        return {
+            self.paths[i]: float(share) if np.isfinite(share) else None
+            for i, share in zip(child_ids, shares)
+        }
+
+    def drilldown(self, path, quarter_key, metric=None):
+        """
+        Return a node's metrics and QoQ changes for a quarter alongside each
+        of its children's. With metric, children are ranked by their
+        contribution to the node's change in that metric.
+        """
+        path = tuple(path)
+
+        def describe(node_path):
+            current = self.metrics(node_path, quarter_key)
+            previous = self.metrics(node_path, quarter_key - 1)
+            if current is None and previous is None:
+                return None
+            return {
+                "name": node_path[-1] if node_path else LEVELS[0],
+                "level": LEVELS[len(node_path)],
+                "metrics": current,
+                "qoq": {
+                    m: qoq_change(
+                        m,
+                        (current or {}).get(m),
+                        (previous or {}).get(m),
+                    )
+                    for m in self.metric_names
+                },
+            }
+
+        children = []
+        contributions = self.contributions(path, quarter_key, metric) if metric else {}
+        for child_path in self.children(path):
+            child = describe(child_path)
+            if child is None:
+                continue
+            if metric:
+                child["contribution"] = contributions.get(child_path)
+            children.append(child)
+
+        if metric:
+            children.sort(key=lambda child: -abs(child["contribution"] or 0))
+
+        return {
+            "path": list(path),
+            "quarter_year": format_quarter_key([quarter_key])[0],
+            "previous_quarter": format_quarter_key([quarter_key - 1])[0],
+            "metric": metric,
+            "node": describe(path),
+            "children": children,
+        }
+
+
+def location_drivers(cube, findings, top_n=3, trends=None):
+    """
+    Return the locations contributing most to each region-level finding's
+    change, as flat rows for the prompt. Regions whose name is shared by
+    several tenants are skipped as ambiguous. If trends (see
+    trends.location_trends) is given, each row also gets the location's
+    yoy_change and seasonal_change for the finding's metric.
+    """
+    if trends is not None:
+        trends = trends.set_index(["quarter_year", *HIERARCHY_COLUMNS])
+
+    def trend_value(key, column):
+        if key not in trends.index or column not in trends.columns:
+            return None
+        value = trends.at[key, column]
+        return None if pd.isna(value) else float(value)
+
+    rows = []
+    for finding in findings:
+        if finding.get("level") != "region":
+            continue
+        region_paths = cube.region_paths(finding["region_name"])
+        if len(region_paths) != 1:
+            continue
+
+        quarter_key = parse_quarter_label(finding["quarter_year"])
+        metric = finding["metric"]
+        contributions = cube.contributions(region_paths[0], quarter_key, metric)
+        ranked = sorted(
+            (item for item in contributions.items() if item[1] is not None),
+            key=lambda item: -abs(item[1]),
+        )
+        for location_path, contribution in ranked[:top_n]:
+            current = cube.metrics(location_path, quarter_key) or {}
+            previous = cube.metrics(location_path, quarter_key - 1) or {}
+            row = {
+                "region_name": finding["region_name"],
+                "metric": metric,
+                "location_name": location_path[-1],
+                "previous_value": previous.get(metric),
+                "value": current.get(metric),
+                "change": qoq_change(metric, current.get(metric), previous.get(metric)),
+                "contribution": contribution,
+                "unit": finding.get("unit"),
+            }
+            if trends is not None:
+                key = (finding["quarter_year"], *location_path)
+                row["yoy_change"] = trend_value(key, f"{metric}_yoy")
+                row["seasonal_change"] = trend_value(key, f"{metric}_qoq_sa")
+            rows.append(row)
+    return rows
@@ -0,0 +1,183 @@
+"""
+Session store module for ROI Automation Dashboard.
+This module handles tracking which dataset each browser session is working
+with in a SQLite database shared by every worker on the node, and cleaning up
+the uploads and reports of sessions that have expired.
+"""
+
+import os
+import re
+import time
+import uuid
+import shutil
+import sqlite3
+
+DEFAULT_SESSION_DB_PATH = os.path.join("cache", "sessions.sqlite3")
+DEFAULT_SESSION_TTL_SECONDS = 24 * 60 * 60  # One day
+DEFAULT_CLEANUP_INTERVAL_SECONDS = 10 * 60
+
+
+class SessionStore:
+    """
+    Maps session IDs to their active dataset, with per-session upload and
+    report directories. Sessions not seen for ttl_seconds expire and their
+    directories are removed by cleanup_expired().
+    """
+
+    def __init__(
+        self,
+        uploads_folder,
+        reports_folder,
+        db_path=DEFAULT_SESSION_DB_PATH,
+        ttl_seconds=DEFAULT_SESSION_TTL_SECONDS,
+        cleanup_interval_seconds=DEFAULT_CLEANUP_INTERVAL_SECONDS,
+    ):
+        self.uploads_folder = uploads_folder
+        self.reports_folder = reports_folder
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self.last_cleanup = 0.0
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    dataset_path TEXT,
+                    dataset_name TEXT,
+                    created_at REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                )
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sessions_last_seen "
+                "ON sessions (last_seen)"
+            )
+        conn.close()
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the store thread-safe."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def create_session(self):
+        """Register a new session and return its ID."""
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO sessions (session_id, created_at, last_seen) "
+                    "VALUES (?, ?, ?)",
+                    (session_id, now, now),
+                )
+        finally:
+            conn.close()
+        return session_id
+
+    def is_active(self, session_id):
+        """Return True if the session exists and hasn't expired."""
+        if not session_id:
+            return False
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT last_seen FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    def set_dataset(self, session_id, dataset_path, dataset_name):
+        """Make dataset_path the session's active dataset."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE sessions SET dataset_path = ?, dataset_name = ?, "
+                    "last_seen = ? WHERE session_id = ?",
+                    (dataset_path, dataset_name, time.time(), session_id),
+                )
+        finally:
+            conn.close()
+
+    def get_dataset(self, session_id):
+        """Return (dataset_path, dataset_name) for the session, or None."""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT dataset_path, dataset_name FROM sessions "
+                    "WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                if row is None or row[0] is None:
+                    return None
+                conn.execute(
+                    "UPDATE sessions SET last_seen = ? WHERE session_id = ?",
+                    (time.time(), session_id),
+                )
+        finally:
+            conn.close()
+
+        dataset_path, dataset_name = row
+        if not os.path.exists(dataset_path):
+            return None
+        return dataset_path, dataset_name
+
+    def upload_dir(self, session_id):
+        """Return (creating it if needed) the session's upload directory."""
+        path = os.path.join(self.uploads_folder, session_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def reports_dir(self, session_id):
+        """Return (creating it if needed) the session's reports directory."""
+        path = os.path.join(self.reports_folder, session_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def cleanup_expired(self):
+        """
+        Delete expired sessions and their upload and report directories, plus
+        any session directory no longer tracked. Returns the number of
+        directories removed.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE last_seen < ?", (cutoff,))
+                active = {
+                    row[0] for row in conn.execute("SELECT session_id FROM sessions")
+                }
+        finally:
+            conn.close()
+
+        removed = 0
+        for folder in (self.uploads_folder, self.reports_folder):
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                # Only per-session directories are managed here
+                if not entry.is_dir() or not re.fullmatch(r"[0-9a-f]{32}", entry.name):
+                    continue
+                if entry.name in active or entry.stat().st_mtime >= cutoff:
+                    continue
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def maybe_cleanup(self):
+        """Run cleanup_expired at most once per cleanup interval per process."""
+        now = time.time()
+        if now - self.last_cleanup < self.cleanup_interval_seconds:
+            return 0
+        self.last_cleanup = now
+        return self.cleanup_expired()
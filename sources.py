@@ -0,0 +1,331 @@
+"""
+Qualitative sources module for ROI Automation Dashboard.
+This module handles loading meeting notes and industry news through source
+adapters, and extracting insights from them incrementally: each document's
+extraction is stored under a fingerprint of its text, so a refresh only sends
+new or changed documents to the LLM.
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from ai_prompt import meeting_notes_prompt, beckers_web_scrape
+from prompt_serializer import count_tokens
+
+DEFAULT_STORE_PATH = os.path.join("cache", "extractions.sqlite3")
+DEFAULT_MAX_CHUNK_TOKENS = 6000
+DOCUMENT_EXTENSIONS = (".md", ".txt")
+
+Document = namedtuple("Document", ["doc_id", "text"])
+
+REDUCE_PROMPT = """
+You are combining several partial extractions of the same kind, each taken
+from a different document or a different part of one long document.
+
+Merge them into a single extraction in the same format: keep every distinct
+point, drop repeats, and keep it concise.
+"""
+
+
+class StaticSource:
+    """A single document held in memory, e.g. the sample text in ai_prompt."""
+
+    def __init__(self, doc_id, text):
+        self.doc_id = doc_id
+        self.text = text
+
+    def load(self):
+        return [Document(self.doc_id, self.text)]
+
+
+class FileSource:
+    """A single text or markdown file, re-read on every load."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [Document(os.path.basename(self.path), f.read())]
+
+
+class DirectorySource:
+    """Every text or markdown file under a directory, e.g. a Notion export."""
+
+    def __init__(self, path, extensions=DOCUMENT_EXTENSIONS):
+        self.path = path
+        self.extensions = extensions
+
+    def load(self):
+        documents = []
+        for root, _, files in os.walk(self.path):
+            for filename in files:
+                if not filename.lower().endswith(self.extensions):
+                    continue
+                file_path = os.path.join(root, filename)
+                with open(file_path, encoding="utf-8") as f:
+                    text = f.read()
+                if text.strip():
+                    doc_id = os.path.relpath(file_path, self.path)
+                    documents.append(Document(doc_id, text))
+
+        # Stable order so combined prompts (and their cache keys) don't churn
+        return sorted(documents)
+
+
+def make_source(path, default_doc_id, default_text):
+    """Return a directory or file adapter for path, or the built-in sample."""
+    if not path:
+        return StaticSource(default_doc_id, default_text)
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    return FileSource(path)
+
+
+def get_meeting_notes_source():
+    """Meeting notes from MEETING_NOTES_DIR, or the sample notes."""
+    return make_source(
+        os.getenv("MEETING_NOTES_DIR"), "meeting_notes", meeting_notes_prompt
+    )
+
+
+def get_beckers_news_source():
+    """Becker's articles from BECKERS_NEWS_DIR, or the sample article."""
+    return make_source(
+        os.getenv("BECKERS_NEWS_DIR"), "beckers_news", beckers_web_scrape
+    )
+
+
+def fingerprint(text, prompt):
+    """Hash a document together with the prompt used to extract it."""
+    digest = hashlib.sha256()
+    digest.update(prompt.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def split_into_chunks(text, max_tokens):
+    """Split text on paragraph boundaries into pieces of at most max_tokens."""
+    chunks = []
+    current = []
+    used = 0
+    for paragraph in text.split("\n\n"):
+        tokens = count_tokens(paragraph)
+        if current and used + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+
+        # A single oversized paragraph is cut at ~4 characters a token
+        while tokens > max_tokens:
+            chunks.append(paragraph[: max_tokens * 4])
+            paragraph = paragraph[max_tokens * 4 :]
+            tokens = count_tokens(paragraph)
+
+        current.append(paragraph)
+        used += tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class ExtractionStore:
+    """SQLite store of per-document extractions keyed by source and fingerprint."""
+
+    def __init__(self, db_path=DEFAULT_STORE_PATH):
+        self.db_path = db_path
+
+        store_dir = os.path.dirname(self.db_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    source TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    extraction TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (source, doc_id)
+                )
+                """)
+        conn.close()
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the store thread-safe."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, source, doc_id, doc_fingerprint):
+        """Return the stored extraction if the document is unchanged, else None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT extraction FROM extractions "
+                "WHERE source = ? AND doc_id = ? AND fingerprint = ?",
+                (source, doc_id, doc_fingerprint),
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def set(self, source, doc_id, doc_fingerprint, extraction):
+        """Store (or replace) a document's extraction."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extractions "
+                    "(source, doc_id, fingerprint, extraction, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (source, doc_id, doc_fingerprint, extraction, time.time()),
+                )
+        finally:
+            conn.close()
+
+    def prune(self, source, doc_ids):
+        """Forget extractions of documents no longer in the source."""
+        conn = self._connect()
+        try:
+            with conn:
+                placeholders = ",".join("?" * len(doc_ids))
+                conn.execute(
+                    f"DELETE FROM extractions WHERE source = ? "
+                    f"AND doc_id NOT IN ({placeholders})",
+                    (source, *doc_ids),
+                )
+        finally:
+            conn.close()
+
+
+def get_default_extraction_store():
+    """Build the store at EXTRACTION_STORE_PATH, or None if LLM caching is off."""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return ExtractionStore(os.getenv("EXTRACTION_STORE_PATH", DEFAULT_STORE_PATH))
+
+
+class SourceExtractor:
+    """
+    Extracts insights from every document in a source.
+
+    complete(system_prompt, text) runs one LLM call and store, when given,
+    keeps each document's extraction between refreshes. Documents too large for
+    one call are split into chunks, extracted chunk by chunk (map) and then
+    merged (reduce); a source with several documents is merged the same way.
+    """
+
+    def __init__(
+        self,
+        name,
+        source,
+        complete,
+        store=None,
+        max_chunk_tokens=DEFAULT_MAX_CHUNK_TOKENS,
+        max_workers=4,
+    ):
+        self.name = name
+        self.source = source
+        self.complete = complete
+        self.store = store
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_workers = max_workers
+        self.documents = None
+        self.stats = {}
+
+    def load(self):
+        """Load (or reload) the source's documents."""
+        self.documents = self.source.load()
+        return self.documents
+
+    def raw_text(self):
+        """Return every document's text, labelled when there is more than one."""
+        documents = self.documents if self.documents is not None else self.load()
+        if len(documents) == 1:
+            return documents[0].text
+        return "\n\n".join(f"### {doc.doc_id}\n\n{doc.text}" for doc in documents)
+
+    def _reduce(self, extractions):
+        """Merge extractions, in batches that fit a single call if necessary."""
+        while len(extractions) > 1:
+            # Greedy batches of at least two so every round makes progress
+            batches, current, used = [], [], 0
+            for extraction in extractions:
+                tokens = count_tokens(extraction)
+                if len(current) >= 2 and used + tokens > self.max_chunk_tokens:
+                    batches.append(current)
+                    current, used = [], 0
+                current.append(extraction)
+                used += tokens
+            batches.append(current)
+
+            def merge(batch):
+                if len(batch) == 1:
+                    return batch[0]
+                return self.complete(REDUCE_PROMPT, "\n\n---\n\n".join(batch))
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                extractions = list(executor.map(merge, batches))
+        return extractions[0] if extractions else ""
+
+    def extract_document(self, document, prompt):
+        """Extract one document, map-reducing over chunks if it is too large."""
+        chunks = split_into_chunks(document.text, self.max_chunk_tokens)
+        if len(chunks) == 1:
+            return self.complete(prompt, document.text)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            partials = list(
+                executor.map(lambda chunk: self.complete(prompt, chunk), chunks)
+            )
+        return self._reduce(partials)
+
+    def refresh(self, prompt):
+        """
+        Return the combined extraction of the source with the given system
+        prompt, re-extracting only the documents whose text (or the prompt)
+        changed since the last refresh. Counts of reused and extracted
+        documents go in self.stats.
+        """
+        documents = self.load()
+        if not documents:
+            raise ValueError(f"No documents found for {self.name}")
+
+        extractions = {}
+        stale = []
+        for doc in documents:
+            doc_fingerprint = fingerprint(doc.text, prompt)
+            stored = (
+                self.store.get(self.name, doc.doc_id, doc_fingerprint)
+                if self.store
+                else None
+            )
+            if stored is None:
+                stale.append((doc, doc_fingerprint))
+            else:
+                extractions[doc.doc_id] = stored
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(
+                lambda item: self.extract_document(item[0], prompt), stale
+            )
+            for (doc, doc_fingerprint), extraction in zip(stale, results):
+                extractions[doc.doc_id] = extraction
+                if self.store:
+                    self.store.set(self.name, doc.doc_id, doc_fingerprint, extraction)
+
+        if self.store:
+            self.store.prune(self.name, [doc.doc_id for doc in documents])
+
+        self.stats = {
+            "documents": len(documents),
+            "extracted": len(stale),
+            "reused": len(documents) - len(stale),
+        }
+        return self._reduce([extractions[doc.doc_id] for doc in documents])
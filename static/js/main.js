@@ -37,20 +37,10 @@ document.addEventListener('DOMContentLoaded', function () {
 
     // Update progress status
     uploadStatus.textContent = 'Gathering customer data...';
+    progressBar.style.width = '50%';
 
-    // Simulate loading progress
-    let progress = 0;
-    const progressInterval = setInterval(() => {
-      progress += 5;
-      progressBar.style.width = `${Math.min(progress, 100)}%`;
-
-      if (progress >= 100) {
-        clearInterval(progressInterval);
-
-        // After simulated loading, fetch sample data and directly start analysis
-        startAnalysisWithCustomerData(customerId);
-      }
-    }, 50);
+    // Fetch sample data and directly start analysis
+    startAnalysisWithCustomerData(customerId);
   }
 
   // Fetch sample data and start analysis directly
@@ -67,6 +57,7 @@ document.addEventListener('DOMContentLoaded', function () {
         if (data.success) {
           const customerName =
             customerSelect.options[customerSelect.selectedIndex].text;
+          progressBar.style.width = '100%';
           showSuccess(`Loaded data for ${customerName}`);
 
           // Start analysis immediately instead of showing file info
@@ -90,7 +81,7 @@ document.addEventListener('DOMContentLoaded', function () {
     modal.innerHTML = `
         <div class="analysis-modal-content">
             <h2><i class="fas fa-robot"></i> Analyzing Data</h2>
-            <p>Please wait while we process your data and generate insights. This may take a minute or two.</p>
+            <p>Please wait while we process your data and generate insights. The summary will appear below as it is written.</p>
             <div class="analysis-progress">
                 <div class="analysis-progress-bar"></div>
             </div>
@@ -99,8 +90,8 @@ document.addEventListener('DOMContentLoaded', function () {
                     <span class="step-label">Data Collection</span>
                     <div class="sub-steps">
                         <span class="sub-step active">Gathering metric data (from application)</span>
-                        <span class="sub-step">Gathering meeting notes (from Notion)</span>
-                        <span class="sub-step">Gathering Becker's news (from Web/Aurora)</span>
+                        <span class="sub-step active">Gathering meeting notes (from Notion)</span>
+                        <span class="sub-step active">Gathering Becker's news (from Web/Aurora)</span>
                     </div>
                 </div>
                 <div class="main-step">
@@ -110,179 +101,208 @@ document.addEventListener('DOMContentLoaded', function () {
                     <span class="step-label">Creating executive report</span>
                 </div>
             </div>
+            <div class="analysis-preview"></div>
         </div>
     `;
     document.body.appendChild(modal);
 
-    // Simulate progress for better UX
     const progressBar = modal.querySelector('.analysis-progress-bar');
     const mainSteps = modal.querySelectorAll('.main-step');
     const subSteps = modal.querySelectorAll('.sub-step');
+    const preview = modal.querySelector('.analysis-preview');
     let progress = 0;
+    let summaryText = '';
+    let draftText = '';
 
-    const progressInterval = setInterval(() => {
-      progress += 1;
-      progressBar.style.width = `${Math.min(progress, 95)}%`;
-
-      // Update sub-steps during the data collection phase (0-40%)
-      if (progress <= 40) {
-        if (progress <= 10) {
-          // First sub-step is active
-          subSteps[0].classList.add('active');
-        } else if (progress > 10 && progress <= 25) {
-          // First sub-step is completed, second is active
-          subSteps[0].classList.remove('active');
-          subSteps[0].classList.add('completed');
-          subSteps[1].classList.add('active');
-        } else if (progress > 25 && progress <= 40) {
-          // Second sub-step is completed, third is active
-          subSteps[1].classList.remove('active');
-          subSteps[1].classList.add('completed');
-          subSteps[2].classList.add('active');
-        }
+    function setProgress(value) {
+      progress = Math.max(progress, value);
+      progressBar.style.width = `${Math.min(progress, 100)}%`;
+    }
+
+    function completeSubStep(index) {
+      subSteps[index].classList.remove('active');
+      subSteps[index].classList.add('completed');
+    }
+
+    function activateMainStep(index) {
+      mainSteps.forEach((step) => step.classList.remove('active'));
+      mainSteps[index].classList.add('active');
+    }
+
+    function closeStream() {
+      source.close();
+      if (modal.parentNode) {
+        document.body.removeChild(modal);
       }
+    }
 
-      // Update main steps
-      if (progress > 40 && progress <= 75) {
-        // Mark all data collection sub-steps as completed
-        mainSteps[0].classList.remove('active');
-        subSteps[2].classList.remove('active');
-        subSteps[2].classList.add('completed');
-
-        // Move to the AI synthesis step
-        mainSteps[1].classList.add('active');
-      } else if (progress > 75) {
-        // Move to the report creation step
-        mainSteps[1].classList.remove('active');
-        mainSteps[2].classList.add('active');
+    // Stream stage events and summary tokens from the server
+    const source = new EventSource('/analyze/stream');
+
+    source.addEventListener('stage', (event) => {
+      const data = JSON.parse(event.data);
+
+      switch (data.stage) {
+        case 'data_processed':
+          completeSubStep(0);
+          setProgress(15);
+          break;
+        case 'meeting_extracted':
+          completeSubStep(1);
+          setProgress(progress + 15);
+          break;
+        case 'beckers_extracted':
+          completeSubStep(2);
+          setProgress(progress + 15);
+          break;
+        case 'baseline_analyzed':
+          setProgress(progress + 10);
+          break;
+        case 'synthesis':
+          activateMainStep(1);
+          setProgress(60);
+          break;
+        case 'pdf_ready':
+          setProgress(100);
+          break;
       }
+    });
 
-      if (progress >= 95) {
-        clearInterval(progressInterval);
+    // Show the baseline analysis as a draft until the final summary streams
+    source.addEventListener('baseline_token', (event) => {
+      if (summaryText) {
+        return;
       }
-    }, 300);
+      draftText += JSON.parse(event.data).text;
+      preview.style.display = 'block';
+      preview.innerHTML =
+        typeof marked === 'undefined'
+          ? draftText.replace(/</g, '&lt;')
+          : marked.parse(draftText);
+      preview.scrollTop = preview.scrollHeight;
+    });
 
-    // Send the analysis request
-    fetch('/analyze', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-    })
-      .then((response) => response.json())
-      .then((data) => {
-        // Clear the progress interval
-        clearInterval(progressInterval);
+    source.addEventListener('token', (event) => {
+      const data = JSON.parse(event.data);
+      summaryText += data.text;
+      preview.style.display = 'block';
+      preview.innerHTML =
+        typeof marked === 'undefined'
+          ? summaryText.replace(/</g, '&lt;')
+          : marked.parse(summaryText);
+      preview.scrollTop = preview.scrollHeight;
+
+      // Creep towards the report step while tokens arrive
+      if (progress < 85) {
+        setProgress(progress + 0.2);
+      } else if (!mainSteps[2].classList.contains('active')) {
+        activateMainStep(2);
+      }
+    });
 
-        // Remove the modal
-        document.body.removeChild(modal);
+    source.addEventListener('complete', (event) => {
+      closeStream();
+      showResults(JSON.parse(event.data));
+      showSuccess('Analysis completed successfully!');
+    });
 
-        if (data.success) {
-          // Create a results modal
-          const resultsModal = document.createElement('div');
-          resultsModal.className = 'results-modal';
-          resultsModal.innerHTML = `
-                <div class="results-modal-content">
-                    <span class="close-modal">&times;</span>
-                    <h2>Analysis Results</h2>
-                    <div class="results-tabs">
-                        <button class="tab-btn active" data-tab="insights">Insights</button>
-                        <button class="tab-btn" data-tab="meeting">Meeting Notes</button>
-                        <button class="tab-btn" data-tab="beckers">Industry News</button>
-                        <button class="tab-btn" data-tab="download">Download Report</button>
-                    </div>
-                    <div class="tab-content active" id="insights-tab">
-                        <div class="insights-content"></div>
-                    </div>
-                    <div class="tab-content" id="meeting-tab">
-                        <h3>Meeting Notes Analysis</h3>
-                        <p class="meeting-note">These insights were extracted from recent meeting notes and heavily prioritized in the executive summary.</p>
-                        <div class="meeting-insights-content"></div>
-                    </div>
-                    <div class="tab-content" id="beckers-tab">
-                        <h3>Industry News Analysis</h3>
-                        <p class="beckers-note">These insights were extracted from a recent Becker's Hospital Review article and heavily prioritized in the executive summary.</p>
-                        <div class="beckers-insights-content"></div>
-                    </div>
-                    <div class="tab-content" id="download-tab">
-                        <p>Your executive summary report is ready for download.</p>
-                        <a href="/download/${data.pdf_path}" class="download-btn" target="_blank">
-                            <i class="fas fa-file-pdf"></i> Download PDF Report
-                        </a>
-                    </div>
-                </div>
-            `;
-          document.body.appendChild(resultsModal);
-
-          // Render markdown content using Marked.js
-          const insightsContainer =
-            resultsModal.querySelector('.insights-content');
-          const meetingInsightsContainer = resultsModal.querySelector(
-            '.meeting-insights-content'
-          );
-          const beckersInsightsContainer = resultsModal.querySelector(
-            '.beckers-insights-content'
-          );
-
-          // Wait for Marked.js to load if it's not already loaded
-          if (typeof marked === 'undefined') {
-            markedScript.onload = function () {
-              insightsContainer.innerHTML = marked.parse(data.insights);
-              meetingInsightsContainer.innerHTML = data.meeting_insights
-                ? marked.parse(data.meeting_insights)
-                : '<p>No meeting notes analysis available.</p>';
-              beckersInsightsContainer.innerHTML = data.beckers_insights
-                ? marked.parse(data.beckers_insights)
-                : '<p>No industry news analysis available.</p>';
-            };
-          } else {
-            insightsContainer.innerHTML = marked.parse(data.insights);
-            meetingInsightsContainer.innerHTML = data.meeting_insights
-              ? marked.parse(data.meeting_insights)
-              : '<p>No meeting notes analysis available.</p>';
-            beckersInsightsContainer.innerHTML = data.beckers_insights
-              ? marked.parse(data.beckers_insights)
-              : '<p>No industry news analysis available.</p>';
-          }
-
-          // Add event listeners for the modal
-          const closeBtn = resultsModal.querySelector('.close-modal');
-          closeBtn.addEventListener('click', () => {
-            document.body.removeChild(resultsModal);
-          });
-
-          // Tab functionality
-          const tabBtns = resultsModal.querySelectorAll('.tab-btn');
-          const tabContents = resultsModal.querySelectorAll('.tab-content');
-
-          tabBtns.forEach((btn) => {
-            btn.addEventListener('click', () => {
-              // Remove active class from all buttons and contents
-              tabBtns.forEach((b) => b.classList.remove('active'));
-              tabContents.forEach((c) => c.classList.remove('active'));
-
-              // Add active class to clicked button and corresponding content
-              btn.classList.add('active');
-              const tabId = btn.getAttribute('data-tab');
-              document.getElementById(`${tabId}-tab`).classList.add('active');
-            });
-          });
-
-          // Show success message
-          showSuccess('Analysis completed successfully!');
-        } else {
-          showError(data.error || 'An error occurred during analysis');
-        }
-      })
-      .catch((error) => {
-        // Clear the progress interval
-        clearInterval(progressInterval);
+    source.addEventListener('error', (event) => {
+      // Server-sent error events carry a payload; connection failures don't
+      let message = 'Connection to the analysis stream was lost';
+      if (event.data) {
+        message = JSON.parse(event.data).error || 'An error occurred during analysis';
+      }
+      closeStream();
+      showError(message);
+    });
+  }
 
-        // Remove the modal
-        document.body.removeChild(modal);
+  // Show the analysis results in a tabbed modal
+  function showResults(data) {
+    // Create a results modal
+    const resultsModal = document.createElement('div');
+    resultsModal.className = 'results-modal';
+    resultsModal.innerHTML = `
+          <div class="results-modal-content">
+              <span class="close-modal">&times;</span>
+              <h2>Analysis Results</h2>
+              <div class="results-tabs">
+                  <button class="tab-btn active" data-tab="insights">Insights</button>
+                  <button class="tab-btn" data-tab="meeting">Meeting Notes</button>
+                  <button class="tab-btn" data-tab="beckers">Industry News</button>
+                  <button class="tab-btn" data-tab="download">Download Report</button>
+              </div>
+              <div class="tab-content active" id="insights-tab">
+                  <div class="insights-content"></div>
+              </div>
+              <div class="tab-content" id="meeting-tab">
+                  <h3>Meeting Notes Analysis</h3>
+                  <p class="meeting-note">These insights were extracted from recent meeting notes and heavily prioritized in the executive summary.</p>
+                  <div class="meeting-insights-content"></div>
+              </div>
+              <div class="tab-content" id="beckers-tab">
+                  <h3>Industry News Analysis</h3>
+                  <p class="beckers-note">These insights were extracted from a recent Becker's Hospital Review article and heavily prioritized in the executive summary.</p>
+                  <div class="beckers-insights-content"></div>
+              </div>
+              <div class="tab-content" id="download-tab">
+                  <p>Your executive summary report is ready for download.</p>
+                  <a href="/download/${data.pdf_path}" class="download-btn" target="_blank">
+                      <i class="fas fa-file-pdf"></i> Download PDF Report
+                  </a>
+              </div>
+          </div>
+      `;
+    document.body.appendChild(resultsModal);
+
+    // Render markdown content using Marked.js
+    const insightsContainer = resultsModal.querySelector('.insights-content');
+    const meetingInsightsContainer = resultsModal.querySelector(
+      '.meeting-insights-content'
+    );
+    const beckersInsightsContainer = resultsModal.querySelector(
+      '.beckers-insights-content'
+    );
+
+    function renderResults() {
+      insightsContainer.innerHTML = marked.parse(data.insights);
+      meetingInsightsContainer.innerHTML = data.meeting_insights
+        ? marked.parse(data.meeting_insights)
+        : '<p>No meeting notes analysis available.</p>';
+      beckersInsightsContainer.innerHTML = data.beckers_insights
+        ? marked.parse(data.beckers_insights)
+        : '<p>No industry news analysis available.</p>';
+    }
+
+    // Wait for Marked.js to load if it's not already loaded
+    if (typeof marked === 'undefined') {
+      markedScript.onload = renderResults;
+    } else {
+      renderResults();
+    }
+
+    // Add event listeners for the modal
+    const closeBtn = resultsModal.querySelector('.close-modal');
+    closeBtn.addEventListener('click', () => {
+      document.body.removeChild(resultsModal);
+    });
 
-        showError('Error during analysis: ' + error.message);
+    // Tab functionality
+    const tabBtns = resultsModal.querySelectorAll('.tab-btn');
+    const tabContents = resultsModal.querySelectorAll('.tab-content');
+
+    tabBtns.forEach((btn) => {
+      btn.addEventListener('click', () => {
+        // Remove active class from all buttons and contents
+        tabBtns.forEach((b) => b.classList.remove('active'));
+        tabContents.forEach((c) => c.classList.remove('active'));
+
+        // Add active class to clicked button and corresponding content
+        btn.classList.add('active');
+        const tabId = btn.getAttribute('data-tab');
+        document.getElementById(`${tabId}-tab`).classList.add('active');
       });
+    });
   }
 
   // Reset the selection UI
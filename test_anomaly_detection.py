@@ -0,0 +1,65 @@
+import math
+import numpy as np
+import pandas as pd
+from anomaly_detection import detect_anomalies, robust_z_scores
+from data_processor import DataProcessor
+from processed_cache import ProcessedResultCache, load_processed_data
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def test_robust_z_scores_match_hand_calculation():
+    nan = np.nan
+    values = np.array(
+        [
+            [1.0, 2.0, 3.0, 4.0, 100.0, nan, 2.0],
+            # More than half the months equal the median, so the MAD is zero
+            [5.0, 5.0, 5.0, 5.0, 5.0, 9.0, 5.0],
+            [1.0, 2.0, nan, nan, nan, nan, 50.0],
+        ]
+    )
+    z_scores, medians = robust_z_scores(values, min_months=6)
+
+    # Median 2.5, absolute deviations 1.5 0.5 0.5 1.5 97.5 0.5 -> MAD 1.0
+    np.testing.assert_allclose(medians, [2.5, 5.0, 2.0])
+    assert math.isclose(z_scores[0, 4], 97.5 / 1.4826)
+    assert math.isnan(z_scores[0, 5])
+    # Falls back to the mean absolute deviation, 4 / 7
+    assert math.isclose(z_scores[1, 5], 4.0 / (1.2533 * 4.0 / 7))
+    # Too few months to judge
+    assert np.isnan(z_scores[2]).all()
+
+
+def test_single_month_collapse_is_flagged(tmp_path):
+    df = pd.read_csv(SAMPLE_CSV)
+    collapse = (df["region_name"] == "Sacramento") & (df["dt_month"] == "11/1/24")
+    df.loc[collapse, "fcots_num"] = (df.loc[collapse, "fcots_num"] * 0.2).round()
+    csv_path = tmp_path / "extract.csv"
+    df.to_csv(csv_path, index=False)
+
+    processor = DataProcessor(str(csv_path))
+    customer_df, region_df = processor.process_frames()
+    anomalies = detect_anomalies(processor.monthly_sums)
+
+    top = anomalies.iloc[0]
+    assert (top["region_name"], top["metric"], top["month"]) == (
+        "Sacramento",
+        "fcots_pct",
+        "2024-11",
+    )
+    assert top["quarter_year"] == "Q4 2024" and top["direction"] == "declined"
+    assert top["robust_z"] < -10
+    # The quarter's FCOTS drop is much smaller than the month's
+    sacramento = region_df[region_df["region_name"] == "Sacramento"]
+    q4_change = sacramento.loc[sacramento["quarter_year"] == "Q4 2024"]
+    assert abs(q4_change["fcots_pct_qoq"].iloc[0]) < 100 * (
+        top["median"] - top["value"]
+    )
+
+    # Streamed (categorical) monthly sums and the cached result match
+    streamed = DataProcessor(str(csv_path), chunksize=50)
+    streamed.build_cube()
+    pd.testing.assert_frame_equal(detect_anomalies(streamed.monthly_sums), anomalies)
+    cache = ProcessedResultCache(str(tmp_path / "cache"))
+    cached = load_processed_data(str(csv_path), cache)[3]
+    assert cached == anomalies.to_dict(orient="records")
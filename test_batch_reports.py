@@ -0,0 +1,66 @@
+"""
+Test script for the multi-tenant batch report runner.
+"""
+
+import os
+import asyncio
+import pandas as pd
+from batch_reports import load_manifest, run_batch, tenant_slug
+from rollup import RollupCube
+
+SAMPLE_CSV = os.path.join("static", "samples", "sample_data.csv")
+
+
+def create_multi_tenant_csv(path):
+    """Duplicate the sample data under a second tenant name."""
+    df = pd.read_csv(SAMPLE_CSV)
+    other = df.assign(tenant_name="St. Mary's Medical Center")
+    pd.concat([df, other]).to_csv(path, index=False)
+    return str(path)
+
+
+def fake_report(
+    tenant_name, customer_dict, region_dict, output_dir, cube=None, anomalies=None
+):
+    """Stand-in for the LLM + PDF step that writes a placeholder file."""
+    # Each tenant gets its own cube and anomaly records
+    assert isinstance(cube, RollupCube)
+    assert cube.customer_name() == tenant_name
+    assert isinstance(anomalies, list)
+    if tenant_name == "St. Mary's Medical Center" and not os.environ.get("FIXED"):
+        raise RuntimeError("API unavailable")
+    pdf_path = os.path.join(output_dir, f"{tenant_slug(tenant_name)}.pdf")
+    with open(pdf_path, "w") as f:
+        f.write(f"{len(customer_dict)} quarters, {len(region_dict)} region rows")
+    return pdf_path, {"pdf_rendering": 0.0}
+
+
+def test_batch_writes_one_report_per_tenant_and_resumes(tmp_path, monkeypatch):
+    """Failed tenants are retried on resume while finished ones are skipped."""
+    input_file = create_multi_tenant_csv(tmp_path / "extract.csv")
+    output_dir = str(tmp_path / "reports")
+
+    summary = asyncio.run(
+        run_batch(input_file, output_dir, workers=2, report_func=fake_report)
+    )
+    assert summary["tenants"] == 2
+    assert summary["succeeded"] == 1
+    assert summary["failed"] == 1
+
+    manifest = load_manifest(output_dir)
+    assert manifest["Sacred Heart Hospital"]["status"] == "succeeded"
+    assert manifest["St. Mary's Medical Center"]["error"] == "API unavailable"
+    with open(manifest["Sacred Heart Hospital"]["pdf_path"]) as f:
+        assert f.read() == "9 quarters, 18 region rows"
+
+    monkeypatch.setenv("FIXED", "1")
+    summary = asyncio.run(
+        run_batch(
+            input_file, output_dir, workers=2, resume=True, report_func=fake_report
+        )
+    )
+    assert summary["skipped"] == 1
+    assert summary["succeeded"] == 1
+    assert load_manifest(output_dir)["St. Mary's Medical Center"]["status"] == (
+        "succeeded"
+    )
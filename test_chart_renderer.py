@@ -0,0 +1,55 @@
+from data_processor import DataProcessor
+from chart_renderer import ChartRenderer, build_chart_specs, chart_key
+from pdf_generator import PDFGenerator
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def sample_specs(metrics=None):
+    customer_data, region_data = DataProcessor(SAMPLE_CSV).process_file()
+    return build_chart_specs(
+        customer_data, region_data, quarter="Q4 2024", metrics=metrics
+    )
+
+
+def test_chart_specs_from_processed_data():
+    specs = sample_specs(["fcots_pct", "turnover_time"])
+
+    assert [(s["kind"], s["metric"]) for s in specs] == [
+        ("trend", "fcots_pct"),
+        ("trend", "turnover_time"),
+        ("comparison", "fcots_pct"),
+        ("comparison", "turnover_time"),
+    ]
+    trend, comparison = specs[0], specs[2]
+    # The partial quarter after the focus quarter is left out
+    assert trend["quarters"][-1] == "Q4 2024"
+    assert set(trend["series"]) == {"All regions", "Los Angeles", "Sacramento"}
+    # Ratios are plotted as percentages
+    assert trend["percent"] and 40 < trend["series"]["All regions"][-1] < 80
+    assert comparison["previous_quarter"] == "Q3 2024"
+    assert comparison["values"] == sorted(comparison["values"], reverse=True)
+
+    changed = dict(trend, series={"All regions": [1.0]})
+    assert chart_key(changed) != chart_key(trend)
+
+
+def test_charts_are_cached_and_respect_budget(tmp_path):
+    specs = sample_specs(["fcots_pct"])
+    renderer = ChartRenderer(str(tmp_path), max_workers=1)
+    try:
+        # Nothing is cached yet, so a zero budget skips every chart...
+        assert renderer.render(specs, budget_seconds=0) == []
+        assert renderer.last_stats["over_budget"] == 2
+
+        # ...but the renders finish in the background and are cached
+        charts = renderer.render(specs, budget_seconds=30)
+        assert len(charts) == 2
+        assert renderer.render(specs, budget_seconds=0) == charts
+        assert renderer.last_stats["cached"] == 2
+    finally:
+        renderer.shutdown()
+
+    assert all(chart.png.startswith(b"\x89PNG") for chart in charts)
+    pdf_bytes = PDFGenerator(str(tmp_path)).render_pdf_bytes("# Summary", charts)
+    assert b"/Subtype /Image" in pdf_bytes
@@ -0,0 +1,83 @@
+import pytest
+from context_builder import (
+    TRUNCATION_MARKER,
+    assemble_context,
+    parse_context_modes,
+    truncate_to_tokens,
+)
+from prompt_serializer import count_tokens
+
+SHORT_DOC = "Short meeting notes."
+LONG_DOC = "\n\n".join(f"Paragraph {i}: " + "word " * 100 for i in range(20))
+SUMMARY = "Summary of the long document."
+
+
+def test_truncate_keeps_whole_paragraphs_within_budget():
+    text = truncate_to_tokens(LONG_DOC, 300)
+
+    assert count_tokens(text) <= 300
+    assert text.startswith("Paragraph 0:")
+    assert text.endswith(TRUNCATION_MARKER)
+    assert truncate_to_tokens(SHORT_DOC, 300) == SHORT_DOC
+
+
+def test_mixed_mode_sends_raw_only_when_it_fits():
+    sources = {"meeting_notes": (SHORT_DOC, "Summary of short notes.")}
+    contexts, accounting = assemble_context(sources, {"meeting_notes": "mixed"}, 1000)
+
+    assert contexts["meeting_notes"] == SHORT_DOC
+    assert accounting["meeting_notes"]["mode"] == "raw"
+
+
+def test_mixed_mode_stays_within_budget_and_shares_leftover():
+    sources = {
+        "meeting_notes": (SHORT_DOC, "Summary of short notes."),
+        "beckers_news": (LONG_DOC, SUMMARY),
+    }
+    modes = {"meeting_notes": "mixed", "beckers_news": "mixed"}
+    contexts, accounting = assemble_context(sources, modes, 1000)
+
+    assert contexts["meeting_notes"] == SHORT_DOC
+    assert accounting["beckers_news"]["mode"] == "mixed"
+    assert contexts["beckers_news"].startswith(SUMMARY)
+    # The long document gets what the short one didn't use
+    assert accounting["beckers_news"]["sent_tokens"] > 500
+    assert accounting["total"]["sent_tokens"] <= 1000
+    assert accounting["total"]["raw_tokens"] == count_tokens(SHORT_DOC) + count_tokens(
+        LONG_DOC
+    )
+
+
+def test_mixed_mode_truncates_a_summary_larger_than_the_budget():
+    long_summary = "\n\n".join(f"Finding {i}: " + "detail " * 40 for i in range(10))
+    sources = {"beckers_news": (LONG_DOC, long_summary)}
+    contexts, accounting = assemble_context(sources, {"beckers_news": "mixed"}, 200)
+
+    assert accounting["beckers_news"]["mode"] == "summary"
+    assert contexts["beckers_news"].startswith("Finding 0:")
+    assert contexts["beckers_news"].endswith(TRUNCATION_MARKER)
+    assert accounting["total"]["sent_tokens"] <= 200
+
+
+def test_summary_mode_falls_back_to_raw_without_a_summary():
+    sources = {"meeting_notes": (LONG_DOC, SUMMARY), "beckers_news": (SHORT_DOC, None)}
+    modes = {"meeting_notes": "summary", "beckers_news": "summary"}
+    contexts, accounting = assemble_context(sources, modes, 100)
+
+    assert contexts == {"meeting_notes": SUMMARY, "beckers_news": SHORT_DOC}
+    assert accounting["beckers_news"]["mode"] == "raw"
+
+
+def test_parse_context_modes():
+    names = ["meeting_notes", "beckers_news"]
+
+    assert parse_context_modes(None, names) == {
+        "meeting_notes": "mixed",
+        "beckers_news": "mixed",
+    }
+    assert parse_context_modes("summary,meeting_notes:raw", names) == {
+        "meeting_notes": "raw",
+        "beckers_news": "summary",
+    }
+    with pytest.raises(ValueError):
+        parse_context_modes("everything", names)
@@ -4,7 +4,8 @@ Test script for the simplified DataProcessor class.
 
 import os
 import sys
-from data_processor import DataProcessor
+from data_processor import DataProcessor, add_qoq_changes
+from prompt_serializer import serialize_records
 import pandas as pd
 import json
 
@@ -136,6 +137,134 @@ def test_data_processor():
         return False
 
 
+def create_multi_year_csv(path, months):
+    """Create a CSV with every column DataProcessor reads for the given months."""
+    rows = []
+    for i, month in enumerate(months):
+        for region in ["East", "West"]:
+            rows.append(
+                {
+                    "tenant_name": "Test Hospital",
+                    "location_name": f"{region} Campus",
+                    "region_name": region,
+                    "dt_month": month,
+                    "add_on_num": 10 + i,
+                    "add_on_den": 100,
+                    "case_volume": 100 + 10 * i,
+                    "case_minutes": 1000 + 100 * i,
+                    "turnover_num": 300,
+                    "turnover_den": 10,
+                    "fcots_num": 50 + i,
+                    "fcots_den": 100,
+                    "release_minutes": 30,
+                    "cancel_rate_num": 5,
+                    "cancel_rate_den": 100,
+                    "total_request_minutes": 300,
+                    "ptu_num": 70,
+                    "ptu_den": 100,
+                }
+            )
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_quarters_are_chronological_across_years(tmp_path):
+    """QoQ changes compare consecutive quarters, not lexicographic neighbours."""
+    months = ["2023-05-01", "2023-11-01", "2024-02-01", "2024-05-01"]
+    test_file = create_multi_year_csv(tmp_path / "multi_year.csv", months)
+
+    customer_dict, region_dict = DataProcessor(str(test_file)).process_file()
+
+    assert [row["quarter_year"] for row in customer_dict] == [
+        "Q2 2023",
+        "Q4 2023",
+        "Q1 2024",
+        "Q2 2024",
+    ]
+    # Q1 2024 follows Q4 2023: (240 - 220) / 220
+    assert abs(customer_dict[2]["case_volume_qoq"] - 100 * 20 / 220) < 1e-9
+    # Q3 2023 is missing, so Q4 2023 has no previous quarter to compare with
+    assert pd.isna(customer_dict[1]["case_volume_qoq"])
+
+    east = [row for row in region_dict if row["region_name"] == "East"]
+    assert [row["quarter_year"] for row in east][-1] == "Q2 2024"
+    assert abs(east[3]["fcots_pct_qoq"] - 1.0) < 1e-9
+
+
+def test_chunked_ingestion_matches_eager(tmp_path):
+    """Streaming the CSV in small chunks gives the same aggregates."""
+    months = ["2023-01-01", "2023-02-01", "2023-04-01", "2023-07-01", "2023-08-01"]
+    test_file = str(create_multi_year_csv(tmp_path / "chunks.csv", months))
+
+    eager = DataProcessor(test_file)
+    streaming = DataProcessor(test_file, chunksize=3)
+    assert streaming.raw_data is None
+
+    for eager_rows, streaming_rows in zip(
+        eager.process_file(), streaming.process_file()
+    ):
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(eager_rows), pd.DataFrame(streaming_rows)
+        )
+
+
+def test_parquet_input_with_tenant_and_date_filters(tmp_path):
+    """Parquet input with pushed-down filters matches the filtered CSV path."""
+    months = ["2023-01-01", "2023-04-01", "2023-07-01", "2023-10-01"]
+    csv_file = create_multi_year_csv(tmp_path / "extract.csv", months)
+
+    df = pd.read_csv(csv_file)
+    other_tenant = df.assign(tenant_name="Other Hospital", case_volume=999)
+    df = pd.concat([df, other_tenant], ignore_index=True)
+    df["dt_month"] = pd.to_datetime(df["dt_month"])
+    parquet_file = str(tmp_path / "extract.parquet")
+    df.to_parquet(parquet_file)
+
+    filters = {"tenants": ["Test Hospital"], "start_date": "2023-04-01"}
+    csv_rows = DataProcessor(str(csv_file), start_date="2023-04-01").process_file()
+    parquet_rows = DataProcessor(parquet_file, **filters).process_file()
+
+    assert [row["quarter_year"] for row in parquet_rows[0]] == [
+        "Q2 2023",
+        "Q3 2023",
+        "Q4 2023",
+    ]
+    for expected, actual in zip(csv_rows, parquet_rows):
+        pd.testing.assert_frame_equal(pd.DataFrame(expected), pd.DataFrame(actual))
+
+
+def test_change_from_a_zero_quarter_is_empty():
+    """A pct_change metric with a zero previous quarter has no QoQ change."""
+    df = add_qoq_changes(
+        pd.DataFrame({"quarter_key": [0, 1, 2], "case_volume": [0.0, 10.0, 15.0]})
+    )
+    assert pd.isna(df["case_volume_qoq"].iloc[1])
+    assert df["case_volume_qoq"].iloc[2] == 50.0
+    assert serialize_records(df.to_dict(orient="records")).splitlines()[2] == "1,10,"
+
+
+def test_lazy_processor_reads_only_when_needed(tmp_path, monkeypatch):
+    """A lazy processor reads nothing up front and the whole file only to aggregate."""
+    months = ["2023-01-01", "2023-04-01", "2023-07-01"]
+    test_file = str(create_multi_year_csv(tmp_path / "lazy.csv", months))
+
+    reads = []
+    read_all = DataProcessor._read_all
+    monkeypatch.setattr(
+        DataProcessor, "_read_all", lambda self: reads.append(1) or read_all(self)
+    )
+
+    processor = DataProcessor(test_file, lazy=True)
+    assert processor.raw_data is None
+    frame = processor.read_columns(extra_columns=["tenant_name"])
+    assert len(frame) == len(pd.read_csv(test_file)) and reads == []
+
+    lazy_rows = processor.process_file()
+    assert reads == [1]
+    for lazy, eager in zip(lazy_rows, DataProcessor(test_file).process_file()):
+        pd.testing.assert_frame_equal(pd.DataFrame(lazy), pd.DataFrame(eager))
+
+
 if __name__ == "__main__":
     print("Testing DataProcessor...")
     success = test_data_processor()
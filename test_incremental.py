@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from data_processor import DataProcessor
+from incremental import IncrementalAggregator, delivered_months
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def test_monthly_appends_match_full_processing(tmp_path):
+    df = pd.read_csv(SAMPLE_CSV)
+    months = list(pd.unique(df["dt_month"]))
+
+    aggregator = IncrementalAggregator(str(tmp_path))
+    aggregator.append(data=df[df["dt_month"].isin(months[:-3])])
+    for month in months[-3:]:
+        aggregator.append(data=df[df["dt_month"] == month])
+        # Only the new month's quarter and the one after it are recomputed
+        assert aggregator.last_stats["quarters_recomputed"] == 2
+
+    customer_df, region_df = DataProcessor(data=df).process_frames()
+    # The stored state is reloaded from disk
+    reloaded = IncrementalAggregator(str(tmp_path))
+    assert_frame_equal(reloaded.customer_df, customer_df)
+    assert_frame_equal(reloaded.region_df, region_df)
+
+
+def test_overlapping_delivery_is_rejected(tmp_path):
+    df = pd.read_csv(SAMPLE_CSV)
+    aggregator = IncrementalAggregator(str(tmp_path))
+    aggregator.append(data=df[df["dt_month"] != "2/1/25"])
+    before = aggregator.customer_df.copy()
+
+    redelivery = df[df["dt_month"].isin(["1/1/25", "2/1/25"])]
+    assert delivered_months(redelivery) == {
+        "Sacred Heart Hospital": {"2025-01", "2025-02"}
+    }
+    with pytest.raises(ValueError, match="Sacred Heart Hospital 2025-01"):
+        aggregator.append(data=redelivery)
+
+    assert_frame_equal(IncrementalAggregator(str(tmp_path)).customer_df, before)
+    assert "2025-02" not in aggregator.months["Sacred Heart Hospital"]
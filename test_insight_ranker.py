@@ -0,0 +1,74 @@
+import math
+from insight_ranker import rank_findings
+
+
+def make_data():
+    """Four quarters where the last one has a few large movements."""
+    quarters = ["Q1 2024", "Q2 2024", "Q3 2024", "Q4 2024"]
+    customer_changes = {
+        "case_volume_qoq": [None, 1.0, -1.0, 8.0],
+        "turnover_time_qoq": [None, 0.5, -0.5, 6.0],
+        "fcots_pct_qoq": [None, 1.0, 2.0, -3.0],
+    }
+    region_changes = {
+        "North": {"case_volume_qoq": [None, 2.0, 1.0, 15.0]},
+        "South": {"case_volume_qoq": [None, -1.0, 1.0, -6.0]},
+    }
+
+    def record(i, quarter, changes):
+        row = {"quarter_year": quarter}
+        for column, values in changes.items():
+            metric = column[: -len("_qoq")]
+            row[metric] = 100.0 + i
+            row[column] = float("nan") if values[i] is None else values[i]
+        return row
+
+    customer_data = [
+        record(i, quarter, customer_changes) for i, quarter in enumerate(quarters)
+    ]
+    region_data = [
+        {"region_name": region, **record(i, quarter, changes)}
+        for region, changes in region_changes.items()
+        for i, quarter in enumerate(quarters)
+    ]
+    return customer_data, region_data
+
+
+def test_ranks_movements_past_level_thresholds():
+    findings = rank_findings(*make_data())
+
+    assert [(f["level"], f["region_name"], f["metric"]) for f in findings] == [
+        ("customer", "All regions", "case_volume"),
+        ("customer", "All regions", "turnover_time"),
+        ("region", "North", "case_volume"),
+    ]
+    top = findings[0]
+    assert top["quarter_year"] == "Q4 2024"
+    assert top["previous_quarter"] == "Q3 2024"
+    assert top["previous_value"] == 102.0
+    assert top["value"] == 103.0
+    assert top["change"] == 8.0
+    assert top["unit"] == "%"
+
+
+def test_direction_follows_metric_goal():
+    findings = {f["metric"]: f for f in rank_findings(*make_data())}
+
+    # Higher case volume is better, longer turnover time is worse
+    assert findings["case_volume"]["direction"] == "improved"
+    assert findings["turnover_time"]["direction"] == "declined"
+
+
+def test_z_score_against_prior_quarters():
+    findings = rank_findings(*make_data())
+    north = next(f for f in findings if f["region_name"] == "North")
+
+    # Prior changes 2.0 and 1.0: mean 1.5, sample std ~0.707
+    assert math.isclose(north["z_score"], (15.0 - 1.5) / math.sqrt(0.5))
+
+
+def test_focus_quarter_and_top_k():
+    customer_data, region_data = make_data()
+
+    assert rank_findings(customer_data, region_data, quarter="Q3 2024") == []
+    assert len(rank_findings(customer_data, region_data, top_k=1)) == 1
@@ -0,0 +1,97 @@
+"""
+Test script for the JobQueue class.
+"""
+
+import time
+import threading
+import job_queue
+from job_queue import JobQueue, RUNNING, SUCCEEDED, FAILED
+
+
+def wait_for(queue, job_id, timeout=5):
+    """Poll a job until it finishes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(db_path=str(tmp_path / "sessions.sqlite3"), **kwargs)
+
+
+def test_duplicate_input_shares_in_flight_job(tmp_path):
+    """A second submission with the same key reuses the running job."""
+    queue = make_queue(tmp_path, max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def work(value, on_stage):
+        calls.append(value)
+        release.wait(5)
+        on_stage("work", 0.5)
+        return {"value": value}
+
+    first, created_first = queue.submit("same-input", work, 1)
+    second, created_second = queue.submit("same-input", work, 2)
+    assert created_first and not created_second
+    assert first["id"] == second["id"]
+
+    release.set()
+    job = wait_for(queue, first["id"])
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"value": 1}
+    assert job["stages"] == {"work": 0.5}
+    assert calls == [1]
+
+    # Once finished, the same input starts a fresh job
+    third, created_third = queue.submit("same-input", work, 3)
+    assert created_third and third["id"] != first["id"]
+    wait_for(queue, third["id"])
+
+
+def test_failed_job_records_error_and_stats(tmp_path):
+    """Exceptions mark the job failed and are counted in the stats."""
+    queue = make_queue(tmp_path, max_workers=1)
+
+    def work(on_stage):
+        raise ValueError("bad input")
+
+    job, _ = queue.submit("broken", work)
+    job = wait_for(queue, job["id"])
+    assert job["status"] == FAILED
+    assert job["error"] == "bad input"
+
+    stats = queue.get_stats()
+    assert stats["failed"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_jobs_are_shared_between_workers(tmp_path, monkeypatch):
+    """Another worker's queue on the same database sees and dedupes jobs."""
+    queue, other_worker = make_queue(tmp_path), make_queue(tmp_path)
+    release = threading.Event()
+
+    def work(on_stage):
+        release.wait(5)
+        return {"done": True}
+
+    job, _ = queue.submit("same-input", work)
+    shared, created = other_worker.submit("same-input", work)
+    assert not created and shared["id"] == job["id"]
+
+    release.set()
+    assert wait_for(other_worker, job["id"])["result"] == {"done": True}
+    assert other_worker.get_stats()["succeeded"] == 1
+
+    # A job left running by a worker that exited is failed, not waited on
+    job, _ = queue.submit("stuck", lambda on_stage: release.wait(5))
+    wait_for(queue, job["id"])
+    queue._update(job["id"], status=RUNNING)
+    monkeypatch.setattr(job_queue, "_worker_alive", lambda pid: False)
+    assert other_worker.get(job["id"])["status"] == FAILED
+    _, created = other_worker.submit("stuck", work)
+    assert created
@@ -0,0 +1,87 @@
+"""
+Test script for the LLMResponseCache class.
+"""
+
+import os
+import time
+from llm_cache import LLMResponseCache, make_cache_key
+
+
+def make_messages(text):
+    return [
+        {"role": "system", "content": "You are a helpful analyst."},
+        {"role": "user", "content": text},
+    ]
+
+
+def test_cache_key_covers_request_parameters():
+    """Any change to model, temperature, max_tokens or messages changes the key."""
+    base = make_cache_key("gpt-4o", 0.25, 2000, make_messages("hello"))
+
+    assert base == make_cache_key("gpt-4o", 0.25, 2000, make_messages("hello"))
+    assert base != make_cache_key("gpt-4o-mini", 0.25, 2000, make_messages("hello"))
+    assert base != make_cache_key("gpt-4o", 0.5, 2000, make_messages("hello"))
+    assert base != make_cache_key("gpt-4o", 0.25, 1000, make_messages("hello"))
+    assert base != make_cache_key("gpt-4o", 0.25, 2000, make_messages("hello!"))
+
+
+def test_get_or_create_only_calls_api_once(tmp_path):
+    """A second identical request is served from disk, even by a new instance."""
+    db_path = os.path.join(tmp_path, "cache.sqlite3")
+    calls = []
+
+    def create():
+        calls.append(1)
+        return "summary"
+
+    cache = LLMResponseCache(db_path)
+    args = ("gpt-4o", 0.25, 2000, make_messages("hello"))
+    assert cache.get_or_create(*args, create) == "summary"
+
+    # A separate instance (e.g. another worker) sees the same entry
+    other_cache = LLMResponseCache(db_path)
+    assert other_cache.get_or_create(*args, create) == "summary"
+
+    assert len(calls) == 1
+    stats = other_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    """Entries older than the TTL are dropped and treated as misses."""
+    cache = LLMResponseCache(os.path.join(tmp_path, "cache.sqlite3"), ttl_seconds=1)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    time.sleep(1.1)
+    assert cache.get("key") is None
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_lru_eviction_by_entries_and_bytes(tmp_path):
+    """The least recently used entries are evicted first."""
+    cache = LLMResponseCache(os.path.join(tmp_path, "cache.sqlite3"), max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")  # "a" is now more recently used than "b"
+    time.sleep(0.01)
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+
+    byte_cache = LLMResponseCache(
+        os.path.join(tmp_path, "bytes.sqlite3"), max_entries=None, max_bytes=10
+    )
+    byte_cache.set("a", "x" * 6)
+    time.sleep(0.01)
+    byte_cache.set("b", "y" * 6)
+
+    assert byte_cache.get("a") is None
+    assert byte_cache.get("b") == "y" * 6
+    assert byte_cache.get_stats()["size_bytes"] == 6
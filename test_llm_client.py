@@ -0,0 +1,110 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from openai import OpenAI
+from llm_client import RateLimiter, TokenBucket
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers the first chat completion with a 429, then with a completion."""
+
+    requests_seen = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        FakeOpenAIHandler.requests_seen += 1
+
+        if FakeOpenAIHandler.requests_seen == 1:
+            body = json.dumps({"error": {"message": "Rate limit reached"}})
+            self.send_response(429)
+            self.send_header("Retry-After-Ms", "50")
+        else:
+            body = json.dumps(
+                {
+                    "id": "chatcmpl-test",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "gpt-4o",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "Hello"},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 5,
+                        "completion_tokens": 1,
+                        "total_tokens": 6,
+                    },
+                }
+            )
+            self.send_response(200)
+
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_retries_rate_limited_request_after_retry_after():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = OpenAI(
+            api_key="test",
+            base_url=f"http://127.0.0.1:{server.server_port}/v1",
+            max_retries=0,
+        )
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+
+        response = limiter.call(
+            client.chat.completions.create,
+            model="gpt-4o",
+            messages=[{"role": "user", "content": "Hi"}],
+            max_tokens=10,
+        )
+    finally:
+        server.shutdown()
+
+    assert response.choices[0].message.content == "Hello"
+    metrics = limiter.get_metrics()
+    assert metrics["retries"] == 1
+    assert metrics["rate_limited"] == 1
+    assert metrics["attempts"] == 2
+    assert metrics["failures"] == 0
+    assert 0.05 <= metrics["backoff_seconds"] < 1
+
+
+def test_caps_in_flight_calls():
+    limiter = RateLimiter(
+        requests_per_minute=6000, tokens_per_minute=1000000, max_in_flight=2
+    )
+
+    def slow_create(**kwargs):
+        time.sleep(0.05)
+        return "done"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda _: limiter.call(slow_create, messages=[]), range(8))
+        )
+
+    assert results == ["done"] * 8
+    metrics = limiter.get_metrics()
+    assert metrics["peak_in_flight"] == 2
+    assert metrics["in_flight"] == 0
+    assert metrics["queue_wait_seconds"] > 0
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)  # 10 per second
+
+    assert bucket.acquire() < 0.01
+    waited = bucket.acquire()
+    assert 0.05 < waited < 0.5
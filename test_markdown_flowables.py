@@ -0,0 +1,67 @@
+from reportlab.platypus import ListFlowable, Paragraph, Preformatted, Table
+from pdf_generator import PDFGenerator
+
+REPORT = """# Executive Summary
+
+Intro with **bold**, *italic*, `a<b` & an escaped \\*star\\*.
+
+## Key Findings
+
+### Turnover
+
+| Metric | Q3 2024 | Q4 2024 |
+|---|---:|---:|
+| Turnover Time | 31.2 | **29.8** |
+
+1. Improvements
+   - Region A
+   - Region B
+2. Risks
+
+```
+raw <code> block
+```
+"""
+
+
+def convert(md_text):
+    return PDFGenerator("reports")._convert_markdown_to_reportlab(md_text)
+
+
+def test_converts_headings_tables_and_nested_lists():
+    flowables = convert(REPORT)
+    paragraphs = [f for f in flowables if isinstance(f, Paragraph)]
+
+    assert [p.style.name for p in paragraphs[:4]] == [
+        "Title",
+        "BodyText",
+        "Heading2",
+        "Heading3",
+    ]
+
+    [table] = [f for f in flowables if isinstance(f, Table)]
+    assert table._cellvalues[0] == ["Metric", "Q3 2024", "Q4 2024"]
+    assert table._cellvalues[1][0] == "Turnover Time"
+    # Cells with inline markup keep it
+    assert table._cellvalues[1][2].text == "<b>29.8</b>"
+
+    [numbered] = [f for f in flowables if isinstance(f, ListFlowable)]
+    first_item = numbered._flowables[0]
+    assert isinstance(first_item._flowables[1], ListFlowable)
+    assert len(first_item._flowables[1]._flowables) == 2
+
+    [code] = [f for f in flowables if isinstance(f, Preformatted)]
+    assert code.lines == ["raw <code> block"]
+
+
+def test_inline_markup_is_escaped_for_reportlab():
+    [intro] = [p for p in convert(REPORT) if getattr(p, "text", "").startswith("Intro")]
+    assert intro.text == (
+        'Intro with <b>bold</b>, <i>italic</i>, <font face="Courier">a&lt;b</font> '
+        "&amp; an escaped *star*."
+    )
+
+
+def test_renders_long_report():
+    pdf_bytes = PDFGenerator("reports").render_pdf_bytes(REPORT * 20)
+    assert pdf_bytes.startswith(b"%PDF")
@@ -0,0 +1,83 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from data_processor import METRIC_COLUMNS, DataProcessor
+from metric_definitions import METRIC_DEFINITIONS, load_metric_definitions
+from metric_engine import MetricEngine, compile_formula
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def test_formulas_are_compiled_and_validated():
+    engine = MetricEngine(METRIC_DEFINITIONS, METRIC_COLUMNS)
+    assert engine.ratio_inputs()["primetime_utilization_pct"] == ("ptu_num", "ptu_den")
+    assert engine.qoq_changes()["turnover_time"] == "pct_change"
+    assert engine.qoq_changes()["fcots_pct"] == "diff"
+    assert engine.inputs(["fcots_pct", "case_volume"]) == [
+        "case_volume",
+        "fcots_num",
+        "fcots_den",
+    ]
+
+    values = engine.evaluate(
+        {"fcots_num": [1.0, 3.0, 0.0], "fcots_den": [2.0, 4.0, 0.0]}, ["fcots_pct"]
+    )
+    np.testing.assert_allclose(values["fcots_pct"], [0.5, 0.75, np.nan])
+
+    metric = compile_formula("weighted", "(a + 2 * b) / -c")
+    assert metric.inputs == ["a", "b", "c"] and metric.ratio is None
+
+    for formula in ["__import__('os')", "a.real", "a ** 2", "a if b else c", "1"]:
+        with pytest.raises(ValueError):
+            compile_formula("bad", formula)
+    with pytest.raises(ValueError, match="denial_rate_pct"):
+        MetricEngine(
+            {"denial_rate_pct": {"formula": "denial_rate_num / denial_rate_den"}},
+            METRIC_COLUMNS,
+        )
+
+
+def test_definitions_file_adds_and_removes_metrics(tmp_path):
+    path = tmp_path / "metrics.json"
+    path.write_text(
+        json.dumps(
+            {
+                "release_pct": None,
+                "minutes_per_case": {"formula": "case_minutes / case_volume"},
+            }
+        )
+    )
+    definitions = load_metric_definitions(str(path))
+    assert "release_pct" not in definitions
+    assert definitions["minutes_per_case"]["format"] == "decimal"
+
+    engine = MetricEngine(definitions, METRIC_COLUMNS)
+    df = pd.read_csv(SAMPLE_CSV)
+    values = engine.evaluate(df, ["minutes_per_case"])
+    np.testing.assert_allclose(
+        values["minutes_per_case"], df["case_minutes"] / df["case_volume"]
+    )
+
+
+def test_processor_reads_only_the_requested_metrics():
+    processor = DataProcessor(SAMPLE_CSV, metrics=["fcots_pct"], chunksize=10)
+    customer_df, region_df = processor.process_frames()
+    assert processor.metric_columns == ["fcots_num", "fcots_den"]
+    assert list(customer_df.columns) == [
+        "quarter_year",
+        "fcots_pct",
+        "fcots_pct_qoq",
+        "fcots_pct_yoy",
+        "fcots_pct_rolling4",
+        "fcots_pct_qoq_sa",
+    ]
+
+    full_df, _ = DataProcessor(SAMPLE_CSV).process_frames()
+    pd.testing.assert_series_equal(customer_df["fcots_pct"], full_df["fcots_pct"])
+
+    df = pd.read_csv(SAMPLE_CSV).drop(columns=["release_minutes"])
+    with pytest.raises(
+        ValueError, match="release_minutes needed for metrics release_pct"
+    ):
+        DataProcessor(data=df).process_frames()
@@ -0,0 +1,193 @@
+import os
+import re
+import threading
+from types import SimpleNamespace
+from data_processor import DataProcessor
+from llm_client import RateLimiter
+from context_builder import get_context_settings
+from openai_analyzer import OpenAIAnalyzer
+from vector_index import get_customer_index
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def call_name(messages):
+    """Name the analyzer call a request belongs to from its system prompt."""
+    system = messages[0]["content"]
+    if "integrates multiple sources" in system:
+        return "synthesis"
+    if "meeting notes from a customer meeting" in system:
+        return "meeting"
+    if "article from Becker's" in system:
+        return "beckers"
+    return "baseline"
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, answering each call by name."""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.requests = []
+
+    def create(self, messages, stream=False, **kwargs):
+        self.requests.append((call_name(messages), messages))
+        text = self.handlers[call_name(messages)]()
+        if not stream:
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+                usage=None,
+            )
+        return (
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))])
+            for t in re.findall(r"\S+\s*", text)
+        )
+
+
+def make_analyzer(monkeypatch, handlers, cube=None, customer=None):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.invalid")
+    monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.delenv("VECTOR_INDEX_DIR", raising=False)
+    monkeypatch.delenv("REPORT_FOCUS_QUARTER", raising=False)
+
+    analyzer = OpenAIAnalyzer(customer=customer, cube=cube)
+    analyzer.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=FakeCompletions(handlers))
+    )
+    analyzer.rate_limiter = RateLimiter(max_in_flight=4, max_retries=0)
+    return analyzer
+
+
+def test_baseline_tokens_stream_before_extractions_finish(monkeypatch):
+    release = threading.Event()
+
+    def extraction():
+        assert release.wait(5)
+        return "extracted"
+
+    processor = DataProcessor(SAMPLE_CSV)
+    data = processor.process_file()
+
+    analyzer = make_analyzer(
+        monkeypatch,
+        {
+            "baseline": lambda: "baseline draft",
+            "meeting": extraction,
+            "beckers": extraction,
+            "synthesis": lambda: "final summary",
+        },
+        cube=processor.cube,
+    )
+    events = []
+    for event, payload in analyzer.stream_insights(data):
+        events.append((event, payload.get("text") or payload.get("stage")))
+        if event == "baseline_token":
+            # The extractions are still blocked
+            assert not release.is_set()
+            assert ("stage", "meeting_extracted") not in events
+        if event == "stage" and payload["stage"] == "baseline_analyzed":
+            release.set()
+
+    assert events[:3] == [
+        ("baseline_token", "baseline "),
+        ("baseline_token", "draft"),
+        ("stage", "baseline_analyzed"),
+    ]
+    assert [text for event, text in events if event == "token"] == ["final ", "summary"]
+    assert events[-1] == ("insights", None)
+    assert analyzer.cached_insights == "final summary"
+    # The report focuses on the latest complete quarter in the data
+    assert analyzer.focus_quarter == "Q4 2024"
+
+
+def test_source_calls_overlap_and_survive_a_failed_extraction(monkeypatch):
+    # Each source call waits until all three are in flight at once
+    in_flight = threading.Barrier(3, timeout=5)
+
+    def respond(text):
+        def handler():
+            in_flight.wait()
+            return text
+
+        return handler
+
+    def failing_extraction():
+        in_flight.wait()
+        raise RuntimeError("meeting notes extraction failed")
+
+    analyzer = make_analyzer(
+        monkeypatch,
+        {
+            "baseline": respond("baseline"),
+            "meeting": failing_extraction,
+            "beckers": respond("beckers"),
+            "synthesis": lambda: "final summary",
+        },
+    )
+    success, insights = analyzer.generate_insights(
+        DataProcessor(SAMPLE_CSV).process_file()
+    )
+
+    assert success and insights == "final summary"
+    assert set(analyzer.get_stage_timings()) == {
+        "baseline_analysis",
+        "meeting_extraction",
+        "beckers_extraction",
+        "synthesis",
+        "total",
+    }
+    # The failed extraction's raw notes stand in for its summary
+    completions = analyzer.client.chat.completions
+    [(_, synthesis)] = [r for r in completions.requests if r[0] == "synthesis"]
+    assert analyzer.meeting_extractor.raw_text() in synthesis[1]["content"]
+    assert analyzer.context_accounting["meeting_notes"]["summary_tokens"] == 0
+    assert analyzer.context_accounting["beckers_news"]["summary_tokens"] > 0
+
+
+def test_index_is_per_customer_and_skipped_for_summaries(tmp_path, monkeypatch):
+    handlers = {
+        "baseline": lambda: "baseline",
+        "meeting": lambda: "meeting summary",
+        "beckers": lambda: "beckers summary",
+        "synthesis": lambda: "final summary",
+    }
+    data = DataProcessor(SAMPLE_CSV).process_file()
+    monkeypatch.setenv("VECTOR_EMBEDDER", "hashing")
+    monkeypatch.setenv("SYNTHESIS_CONTEXT_MODE", "summary")
+
+    # Summary mode sends no raw text, so nothing is embedded
+    analyzer = make_analyzer(monkeypatch, handlers, customer="Sacred Heart Hospital")
+    monkeypatch.setenv("VECTOR_INDEX_DIR", str(tmp_path))
+    analyzer.vector_index = get_customer_index(analyzer.customer)
+    assert analyzer.generate_insights(data)[0]
+    assert analyzer.vector_index.path == os.path.join(
+        str(tmp_path), "sacred_heart_hospital"
+    )
+    assert len(analyzer.vector_index) == 0
+
+    monkeypatch.setenv("SYNTHESIS_CONTEXT_MODE", "raw")
+    analyzer.context_modes, _ = get_context_settings(["meeting_notes", "beckers_news"])
+    analyzer.cached_insights = None
+    assert analyzer.generate_insights(data)[0]
+    assert len(analyzer.vector_index) > 0
+
+
+def test_region_table_keeps_to_the_focus_quarter_without_findings(monkeypatch):
+    monkeypatch.setenv("PROMPT_FINDINGS_TOP_K", "0")
+    processor = DataProcessor(SAMPLE_CSV)
+    data = processor.process_file()
+    analyzer = make_analyzer(
+        monkeypatch,
+        dict.fromkeys(["baseline", "meeting", "beckers", "synthesis"], lambda: "ok"),
+        cube=processor.cube,
+    )
+    assert analyzer.generate_insights(data)[0]
+
+    completions = analyzer.client.chat.completions
+    [(_, baseline)] = [r for r in completions.requests if r[0] == "baseline"]
+    content = baseline[1]["content"]
+    region_table = content.split("region data for context:\n\n")[1].split("\n\n")[0]
+    quarters = {row.split(",")[0] for row in region_table.splitlines()[1:]}
+    assert quarters == {"Q4 2024"}
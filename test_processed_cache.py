@@ -0,0 +1,99 @@
+import shutil
+import pandas as pd
+import data_processor
+import processed_cache
+from processed_cache import (
+    ProcessedResultCache,
+    file_preview,
+    load_processed_data,
+)
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def test_repeat_processing_is_served_from_cache(tmp_path, monkeypatch):
+    csv_path = tmp_path / "extract.csv"
+    shutil.copy(SAMPLE_CSV, csv_path)
+    cache = ProcessedResultCache(str(tmp_path / "cache"))
+
+    expected = data_processor.DataProcessor(str(csv_path)).process_file()
+    first = load_processed_data(str(csv_path), cache)[:2]
+
+    def fail(self):
+        raise AssertionError("file was processed again")
+
+    monkeypatch.setattr(data_processor.DataProcessor, "process_frames", fail)
+    second = load_processed_data(str(csv_path), cache)[:2]
+
+    for result in (first, second):
+        # repr compares NaN (the first quarter's QoQ) as equal
+        assert repr(result) == repr(expected)
+
+
+def test_changed_content_or_options_are_processed_again(tmp_path):
+    csv_path = tmp_path / "extract.csv"
+    shutil.copy(SAMPLE_CSV, csv_path)
+    cache = ProcessedResultCache(str(tmp_path / "cache"))
+
+    full_customer = cache.get_processed(str(csv_path))[0]
+    filtered_customer = cache.get_processed(str(csv_path), start_date="2024-01-01")[0]
+    assert len(filtered_customer) < len(full_customer)
+
+    # Drop the last month of data; the file hash changes with its content
+    df = pd.read_csv(SAMPLE_CSV)
+    df[df["dt_month"] != "2/1/25"].to_csv(csv_path, index=False)
+    trimmed_customer = cache.get_processed(str(csv_path))[0]
+    assert (
+        trimmed_customer["case_volume"].iloc[-1] < full_customer["case_volume"].iloc[-1]
+    )
+
+
+def test_preview_matches_pandas(tmp_path):
+    df = pd.read_csv(SAMPLE_CSV)
+    parquet_path = tmp_path / "extract.parquet"
+    df.to_parquet(parquet_path)
+    cache = ProcessedResultCache(str(tmp_path / "cache"))
+
+    for path in (SAMPLE_CSV, str(parquet_path)):
+        expected = {
+            "rows": len(df),
+            "columns": len(df.columns),
+            "column_names": df.columns.tolist(),
+        }
+        assert file_preview(path) == expected
+        assert cache.get_preview(path) == expected
+        assert cache.get_preview(path) == expected
+
+
+def test_frames_and_cube_come_from_one_processing_pass(tmp_path, monkeypatch):
+    csv_path = tmp_path / "extract.csv"
+    shutil.copy(SAMPLE_CSV, csv_path)
+    cache = ProcessedResultCache(str(tmp_path / "cache"))
+
+    processed = []
+    process_frames = data_processor.DataProcessor.process_frames
+
+    def counting_process_frames(self, *args, **kwargs):
+        processed.append(self.file_path)
+        return process_frames(self, *args, **kwargs)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("just-written results were read back")
+
+    monkeypatch.setattr(
+        data_processor.DataProcessor, "process_frames", counting_process_frames
+    )
+    for use_cache in (None, cache):
+        with monkeypatch.context() as m:
+            m.setattr(processed_cache.pd, "read_parquet", fail)
+            customer_dict, region_dict, cube, anomalies = load_processed_data(
+                str(csv_path), use_cache
+            )
+    assert len(processed) == 2
+
+    # A hit reads the stored results without processing
+    cached = load_processed_data(str(csv_path), cache)
+    assert len(processed) == 2
+    assert repr(cached[:2]) == repr((customer_dict, region_dict))
+    assert cached[3] == anomalies
+    assert cached[2].quarter_keys.tolist() == cube.quarter_keys.tolist()
@@ -0,0 +1,81 @@
+from prompt_serializer import (
+    count_tokens,
+    format_value,
+    latest_quarter,
+    select_rows,
+    serialize_metric_data,
+    serialize_records,
+)
+
+
+def make_records():
+    records = []
+    for i, quarter in enumerate(["Q3 2023", "Q4 2023", "Q1 2024"]):
+        for region, change in [("North", 1.0), ("South", 12.5)]:
+            records.append(
+                {
+                    "quarter_year": quarter,
+                    "region_name": region,
+                    "case_volume": 1000.0 + i,
+                    "fcots_pct": 0.53219,
+                    "case_volume_qoq": float("nan") if i == 0 else change,
+                }
+            )
+    return records
+
+
+def test_format_value_rounds_and_omits_missing():
+    assert format_value(618176.4) == "618176"
+    assert format_value(0.53219) == "0.5322"
+    assert format_value(4.0) == "4"
+    assert format_value(float("nan")) == ""
+    assert format_value(float("inf")) == ""
+    assert format_value(float("-inf")) == ""
+    assert format_value(None) == ""
+    assert format_value("Q4 2024") == "Q4 2024"
+
+
+def test_serialize_records_writes_one_header_row():
+    table = serialize_records(make_records()[:2])
+    assert table.splitlines() == [
+        "quarter_year,region_name,case_volume,fcots_pct,case_volume_qoq",
+        "Q3 2023,North,1000,0.5322,",
+        "Q3 2023,South,1000,0.5322,",
+    ]
+
+    markdown = serialize_records(make_records()[:1], table_format="markdown")
+    assert markdown.splitlines()[2] == "| Q3 2023 | North | 1000 | 0.5322 |  |"
+
+
+def test_select_rows_by_quarter_and_qoq_threshold():
+    records = make_records()
+    # Labels sort by year, then quarter
+    assert latest_quarter(records) == "Q1 2024"
+    assert latest_quarter([]) is None
+
+    last_two = select_rows(records, last_n_quarters=2)
+    assert {r["quarter_year"] for r in last_two} == {"Q4 2023", "Q1 2024"}
+
+    # The quarter list still applies within the last N quarters
+    both = select_rows(records, last_n_quarters=2, quarters=["Q4 2023", "Q3 2023"])
+    assert {r["quarter_year"] for r in both} == {"Q4 2023"}
+
+    significant = select_rows(records, min_qoq_change=5)
+    assert [(r["quarter_year"], r["region_name"]) for r in significant] == [
+        ("Q4 2023", "South"),
+        ("Q1 2024", "South"),
+    ]
+
+
+def test_serialize_metric_data_reports_token_savings():
+    records = make_records()
+    customer_table, region_table, stats = serialize_metric_data(
+        records, records, min_qoq_change=5
+    )
+
+    assert stats["customer_rows"] == 6
+    assert stats["region_rows"] == 2
+    assert stats["compact_tokens"] == count_tokens(customer_table) + count_tokens(
+        region_table
+    )
+    assert stats["compact_tokens"] < stats["raw_tokens"] / 2
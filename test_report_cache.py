@@ -0,0 +1,61 @@
+import os
+from pdf_generator import PDFGenerator
+from report_cache import ReportCache, parse_report_filename, report_id_for
+
+SUMMARY = "# Executive Summary\n\nTurnover time improved by **4.2%**.\n"
+
+
+def test_identical_markdown_is_rendered_once(tmp_path):
+    cache = ReportCache()
+    generator = PDFGenerator(str(tmp_path))
+    rendered = []
+
+    def render(markdown_content):
+        rendered.append(markdown_content)
+        return generator.render_pdf_bytes(markdown_content)
+
+    first_id, pdf_bytes = cache.get_or_render(SUMMARY, render)
+    second_id, cached_bytes = cache.get_or_render(SUMMARY, render)
+
+    assert first_id == second_id == report_id_for(SUMMARY)
+    assert cached_bytes is pdf_bytes
+    assert pdf_bytes.startswith(b"%PDF")
+    assert rendered == [SUMMARY]
+    assert cache.get_stats()["hits"] == 1
+
+    success, filename = generator.generate_pdf_to_cache(
+        SUMMARY, cache, "executive_summary.pdf"
+    )
+    assert success
+    assert parse_report_filename(filename) == first_id
+    # The report is in the reports folder too, so other workers can serve it
+    assert os.listdir(tmp_path) == [filename]
+    with open(tmp_path / filename, "rb") as f:
+        assert f.read() == pdf_bytes
+
+
+def test_least_recently_used_reports_are_evicted():
+    cache = ReportCache(max_entries=2, max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == b"1234"
+
+    # The byte budget evicts too, but the newest report is always kept
+    cache.put("d", b"12345678901")
+    assert len(cache) == 1
+    assert cache.get("d") is not None
+    assert cache.get_stats()["evictions"] == 3
+
+
+def test_disk_reports_get_unique_names(tmp_path):
+    generator = PDFGenerator(str(tmp_path))
+    paths = {
+        generator.generate_pdf_from_markdown(SUMMARY, "executive_summary.pdf")[1]
+        for _ in range(3)
+    }
+    assert len(paths) == 3
+    assert all(os.path.exists(path) for path in paths)
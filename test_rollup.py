@@ -0,0 +1,125 @@
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import data_processor
+from data_processor import METRIC_COLUMNS, DataProcessor, quarter_key
+from processed_cache import ProcessedResultCache
+from rollup import RollupCube, location_drivers, parse_quarter_label
+from trends import location_trends
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+TENANT = "Sacred Heart Hospital"
+
+
+def sample_cube():
+    processor = DataProcessor(SAMPLE_CSV)
+    customer_data, region_data = processor.process_file()
+    return processor.cube, customer_data, region_data
+
+
+def test_cube_matches_groupby_at_every_level():
+    cube, customer_data, region_data = sample_cube()
+
+    df = pd.read_csv(SAMPLE_CSV)
+    df["quarter_key"] = quarter_key(pd.to_datetime(df["dt_month"], format="%m/%d/%y"))
+    expected = (
+        df.groupby(["quarter_key", "tenant_name", "region_name", "location_name"])[
+            METRIC_COLUMNS
+        ]
+        .sum()
+        .reset_index()
+    )
+    locations = cube.level_frame("location").sort_values(list(expected.columns[:4]))
+    np.testing.assert_allclose(
+        locations[METRIC_COLUMNS].to_numpy(), expected[METRIC_COLUMNS].to_numpy()
+    )
+
+    # Region and total nodes give the same metrics as process_file
+    for record in region_data:
+        path = (TENANT, record["region_name"])
+        metrics = cube.metrics(path, parse_quarter_label(record["quarter_year"]))
+        assert metrics["fcots_pct"] == pytest.approx(record["fcots_pct"])
+    latest = customer_data[-1]
+    metrics = cube.metrics((), parse_quarter_label(latest["quarter_year"]))
+    assert metrics["case_volume"] == pytest.approx(latest["case_volume"])
+
+    assert parse_quarter_label("Q1 2025") == 2025 * 4
+    for label in ("Q0 2024", "Q9 2024", "X4 2024"):
+        with pytest.raises(ValueError):
+            parse_quarter_label(label)
+
+
+def test_location_contributions_add_up_to_region_change():
+    cube, _, region_data = sample_cube()
+    region = ("Q4 2024", "Sacramento")
+    record = next(
+        r for r in region_data if (r["quarter_year"], r["region_name"]) == region
+    )
+
+    for metric in ["fcots_pct", "turnover_time", "case_volume"]:
+        contributions = cube.contributions(
+            (TENANT, "Sacramento"), parse_quarter_label("Q4 2024"), metric
+        )
+        assert contributions
+        assert sum(contributions.values()) == pytest.approx(record[f"{metric}_qoq"])
+
+    result = cube.drilldown(
+        [TENANT, "Sacramento"], parse_quarter_label("Q4 2024"), "fcots_pct"
+    )
+    assert result["node"]["level"] == "region"
+    assert result["node"]["qoq"]["fcots_pct"] == pytest.approx(record["fcots_pct_qoq"])
+    shares = [abs(child["contribution"]) for child in result["children"]]
+    assert shares == sorted(shares, reverse=True)
+    assert {child["level"] for child in result["children"]} == {"location"}
+
+    finding = {
+        "level": "region",
+        "region_name": "Sacramento",
+        "quarter_year": "Q4 2024",
+        "metric": "fcots_pct",
+        "unit": "pp",
+    }
+    drivers = location_drivers(cube, [finding], top_n=1)
+    assert [d["location_name"] for d in drivers] == [result["children"][0]["name"]]
+
+    # With location trends, each driver carries its own YoY and seasonal change
+    trends = location_trends(cube, ["fcots_pct"])
+    (driver,) = location_drivers(cube, [finding], top_n=1, trends=trends)
+    trend = trends[
+        (trends["quarter_year"] == "Q4 2024")
+        & (trends["region_name"] == "Sacramento")
+        & (trends["location_name"] == driver["location_name"])
+    ].iloc[0]
+    assert driver["yoy_change"] == pytest.approx(trend["fcots_pct_yoy"])
+    assert driver["seasonal_change"] == pytest.approx(trend["fcots_pct_qoq_sa"])
+
+
+def test_cube_is_stored_in_processed_cache(tmp_path, monkeypatch):
+    csv_path = tmp_path / "extract.csv"
+    shutil.copy(SAMPLE_CSV, csv_path)
+    cache = ProcessedResultCache(str(tmp_path / "cache"))
+
+    cache.get_processed(str(csv_path))
+
+    def fail(self):
+        raise AssertionError("file was processed again")
+
+    monkeypatch.setattr(data_processor.DataProcessor, "process_frames", fail)
+    cube = cache.get_cube(str(csv_path))
+    assert isinstance(cube, RollupCube)
+    monkeypatch.undo()
+
+    expected = DataProcessor(SAMPLE_CSV).build_cube()
+    assert cube.paths == expected.paths
+    np.testing.assert_array_equal(cube.sums, expected.sums)
+    np.testing.assert_array_equal(cube.present, expected.present)
+
+    # The sample's Q1 2025 only has two months, so Q4 2024 is the latest
+    # complete quarter
+    np.testing.assert_array_equal(cube.month_masks, expected.month_masks)
+    assert cube.latest_complete_quarter() == parse_quarter_label("Q4 2024")
+    assert cube.customer_name() == TENANT
+    assert expected.add(cube).latest_complete_quarter() == parse_quarter_label(
+        "Q4 2024"
+    )
@@ -0,0 +1,58 @@
+import os
+import time
+from session_store import SessionStore
+
+
+def make_store(tmp_path, **kwargs):
+    return SessionStore(
+        str(tmp_path / "uploads"),
+        str(tmp_path / "reports"),
+        db_path=str(tmp_path / "sessions.sqlite3"),
+        **kwargs,
+    )
+
+
+def test_sessions_have_independent_datasets(tmp_path):
+    store = make_store(tmp_path)
+    first, second = store.create_session(), store.create_session()
+
+    paths = {}
+    for session_id, name in ((first, "a.csv"), (second, "b.csv")):
+        paths[session_id] = os.path.join(store.upload_dir(session_id), name)
+        with open(paths[session_id], "w") as f:
+            f.write("x\n1\n")
+        store.set_dataset(session_id, paths[session_id], name)
+
+    assert store.get_dataset(first) == (paths[first], "a.csv")
+    assert store.get_dataset(second) == (paths[second], "b.csv")
+    assert store.get_dataset("0" * 32) is None
+
+    # A dataset whose file was removed is no longer returned
+    os.remove(paths[first])
+    assert store.get_dataset(first) is None
+
+
+def test_cleanup_removes_expired_session_directories(tmp_path):
+    store = make_store(tmp_path, ttl_seconds=60)
+    expired, active = store.create_session(), store.create_session()
+    for session_id in (expired, active):
+        store.upload_dir(session_id)
+        store.reports_dir(session_id)
+    # Unrelated files in the folders are left alone
+    open(tmp_path / "reports" / "keep.pdf", "w").close()
+
+    old = time.time() - 3600
+    conn = store._connect()
+    with conn:
+        conn.execute(
+            "UPDATE sessions SET last_seen = ? WHERE session_id = ?", (old, expired)
+        )
+    conn.close()
+    for folder in ("uploads", "reports"):
+        os.utime(tmp_path / folder / expired, (old, old))
+
+    assert store.cleanup_expired() == 2
+    assert not store.is_active(expired)
+    assert store.is_active(active)
+    assert sorted(os.listdir(tmp_path / "reports")) == [active, "keep.pdf"]
+    assert os.listdir(tmp_path / "uploads") == [active]
@@ -0,0 +1,94 @@
+from sources import (
+    REDUCE_PROMPT,
+    DirectorySource,
+    Document,
+    ExtractionStore,
+    SourceExtractor,
+    split_into_chunks,
+)
+from prompt_serializer import count_tokens
+
+
+class RecordingLLM:
+    """Stand-in for the LLM that records the texts it was asked about."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, system_prompt, text):
+        self.calls.append((system_prompt, text))
+        if system_prompt == REDUCE_PROMPT:
+            return "merged(" + " + ".join(text.split("\n\n---\n\n")) + ")"
+        headings = [line for line in text.splitlines() if line.startswith("Note")]
+        headings += [line for line in text.splitlines() if line.startswith("Section")]
+        return "summary of " + ", ".join(headings)
+
+
+class ListSource:
+    """Minimal adapter, e.g. what a Notion or news feed client would provide."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def load(self):
+        return list(self.documents)
+
+
+def test_directory_source_reads_text_and_markdown(tmp_path):
+    (tmp_path / "b.md").write_text("Note B")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "a.txt").write_text("Note A")
+    (tmp_path / "ignored.csv").write_text("x,y")
+
+    documents = DirectorySource(str(tmp_path)).load()
+
+    assert documents == [
+        Document("b.md", "Note B"),
+        Document("nested/a.txt", "Note A"),
+    ]
+
+
+def test_refresh_only_re_extracts_changed_documents(tmp_path):
+    store = ExtractionStore(str(tmp_path / "extractions.sqlite3"))
+    source = ListSource([Document("a", "Note A"), Document("b", "Note B")])
+    llm = RecordingLLM()
+    extractor = SourceExtractor("meeting_notes", source, llm, store)
+
+    combined = extractor.refresh("extract")
+    assert combined == "merged(summary of Note A + summary of Note B)"
+    assert extractor.stats == {"documents": 2, "extracted": 2, "reused": 0}
+
+    source.documents = [Document("a", "Note A"), Document("b", "Note B, revised")]
+    llm.calls.clear()
+    extractor = SourceExtractor("meeting_notes", source, llm, store)
+    extractor.refresh("extract")
+
+    assert extractor.stats == {"documents": 2, "extracted": 1, "reused": 1}
+    assert [text for prompt, text in llm.calls if prompt == "extract"] == [
+        "Note B, revised"
+    ]
+
+    # A different extraction prompt invalidates every stored extraction
+    extractor.refresh("extract differently")
+    assert extractor.stats["extracted"] == 2
+
+
+def test_large_documents_are_map_reduced():
+    text = "\n\n".join(f"Section {i}\n" + "detail " * 50 for i in range(6))
+    llm = RecordingLLM()
+    extractor = SourceExtractor(
+        "beckers_news",
+        ListSource([Document("article", text)]),
+        llm,
+        max_chunk_tokens=200,
+    )
+
+    combined = extractor.refresh("extract")
+
+    chunks = split_into_chunks(text, 200)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 200 for chunk in chunks)
+    assert sum(prompt == "extract" for prompt, _ in llm.calls) == len(chunks)
+    assert combined.startswith("merged(")
+    for i in range(6):
+        assert f"Section {i}" in combined
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+import pandas as pd
+from data_processor import DataProcessor, add_qoq_changes
+from insight_ranker import rank_findings
+from trends import add_trend_columns, location_trends
+
+SAMPLE_CSV = "static/samples/sample_data.csv"
+
+
+def make_frame(region_values):
+    """Region frame with quarter keys 0.. per region; None leaves a gap."""
+    rows = [
+        {"region_name": region, "quarter_key": key, "case_volume": value}
+        for region, values in region_values.items()
+        for key, value in enumerate(values)
+        if value is not None
+    ]
+    return add_qoq_changes(pd.DataFrame(rows), ["region_name"])
+
+
+def test_yoy_and_rolling_match_hand_calculation():
+    df = add_trend_columns(
+        make_frame(
+            {
+                "North": [100.0, 110.0, 120.0, 130.0, 150.0, 165.0],
+                "South": [50.0, None, 60.0, 70.0, 80.0, 90.0],
+            }
+        ),
+        ["region_name"],
+    )
+    north = df[df["region_name"] == "North"]
+    south = df[df["region_name"] == "South"]
+
+    np.testing.assert_allclose(
+        north["case_volume_yoy"], [np.nan] * 4 + [50.0, 50.0], equal_nan=True
+    )
+    np.testing.assert_allclose(
+        north["case_volume_rolling4"],
+        [np.nan] * 3 + [115.0, 127.5, 141.25],
+        equal_nan=True,
+    )
+    # South has no quarter 1, so windows and comparisons that need it are
+    # empty rather than reaching into North's rows or the wrong quarter
+    np.testing.assert_allclose(
+        south["case_volume_yoy"], [np.nan] * 3 + [60.0, np.nan], equal_nan=True
+    )
+    np.testing.assert_allclose(
+        south["case_volume_rolling4"], [np.nan] * 4 + [75.0], equal_nan=True
+    )
+
+
+def test_seasonal_pattern_is_not_a_finding():
+    # Every Q4 dips by 20%, and the latest Q4 is no different
+    pattern = [100.0, 100.0, 100.0, 80.0] * 3
+    df = add_trend_columns(make_frame({"North": pattern}), ["region_name"])
+    assert math.isclose(df["case_volume_qoq"].iloc[-1], -20.0)
+    assert abs(df["case_volume_qoq_sa"].iloc[-1]) < 1e-9
+    assert math.isnan(df["case_volume_qoq_sa"].iloc[3])
+
+    df.insert(0, "quarter_year", [f"Q{k % 4 + 1} {2022 + k // 4}" for k in range(12)])
+    region_data = df.drop(columns="quarter_key").to_dict(orient="records")
+    assert rank_findings([], region_data) == []
+
+    # A dip twice the usual size is reported, judged on the adjusted change
+    region_data[-1]["case_volume_qoq"] = -40.0
+    region_data[-1]["case_volume_qoq_sa"] = -20.0
+    (finding,) = rank_findings([], region_data)
+    assert finding["change"] == -40.0 and finding["seasonal_change"] == -20.0
+
+    # A smaller dip than usual is an improvement on the seasonal pattern
+    region_data[-1]["case_volume_qoq"] = -5.0
+    region_data[-1]["case_volume_qoq_sa"] = 15.0
+    (finding,) = rank_findings([], region_data)
+    assert finding["direction"] == "improved"
+
+
+def test_location_trends_from_cube():
+    processor = DataProcessor(SAMPLE_CSV)
+    frame = location_trends(processor.build_cube(), ["case_volume"])
+    assert list(frame.columns) == [
+        "quarter_year",
+        "tenant_name",
+        "region_name",
+        "location_name",
+        "case_volume",
+        "case_volume_qoq",
+        "case_volume_yoy",
+        "case_volume_rolling4",
+        "case_volume_qoq_sa",
+    ]
+
+    raw = pd.read_csv(SAMPLE_CSV)
+    location = frame["location_name"].iloc[0]
+    rows = frame[frame["location_name"] == location].set_index("quarter_year")
+    q4 = raw[
+        (raw["location_name"] == location)
+        & raw["dt_month"].isin(["10/1/24", "11/1/24", "12/1/24"])
+    ]
+    q4_prior = raw[
+        (raw["location_name"] == location)
+        & raw["dt_month"].isin(["10/1/23", "11/1/23", "12/1/23"])
+    ]
+    expected = (q4["case_volume"].sum() / q4_prior["case_volume"].sum() - 1) * 100
+    assert math.isclose(rows.loc["Q4 2024", "case_volume_yoy"], expected)
@@ -0,0 +1,90 @@
+import os
+from sources import Document
+from vector_index import HashingEmbedder, VectorIndex, retrieve_context
+
+NOTES = [
+    Document("2024-q3.md", "Staffing shortages in Sacramento delayed first cases."),
+    Document("2024-q4.md", "Turnover time in Los Angeles rose after the EHR go-live."),
+    Document("2025-q1.md", "Block release policy review for underused rooms."),
+]
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=256)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def test_search_returns_relevant_chunks(tmp_path):
+    index = VectorIndex(str(tmp_path), HashingEmbedder())
+    index.add_documents("meeting_notes", NOTES)
+    index.add_documents("beckers_news", [Document("article", "EHR go-live news.")])
+
+    [hits] = index.search(["Los Angeles turnover time"], k=2, source="meeting_notes")
+
+    assert len(hits) == 2
+    assert hits[0][1]["doc_id"] == "2024-q4.md"
+    assert hits[0][0] >= hits[1][0]
+    assert all(chunk["source"] == "meeting_notes" for _, chunk in hits)
+
+    context = retrieve_context(
+        index, ["first case delays staffing"], "meeting_notes", k=1
+    )
+    assert context == f"[2024-q3.md]\n{NOTES[0].text}"
+
+
+def test_add_documents_is_incremental_and_persistent(tmp_path):
+    embedder = CountingEmbedder()
+    index = VectorIndex(str(tmp_path), embedder)
+    assert index.add_documents("meeting_notes", NOTES) == 3
+
+    # Reopening from disk keeps the vectors and skips unchanged documents
+    index = VectorIndex(str(tmp_path), embedder)
+    assert len(index) == 3
+    embedder.embedded.clear()
+    revised = Document("2025-q1.md", "Block release policy approved by surgeons.")
+    assert index.add_documents("meeting_notes", NOTES[:1] + [revised]) == 1
+    assert embedder.embedded == [revised.text]
+
+    # The changed and the removed document's old chunks no longer match
+    assert len(index) == 2
+    [hits] = index.search(["block release policy"], k=5)
+    assert [chunk["text"] for _, chunk in hits].count(revised.text) == 1
+    assert NOTES[1].text not in [chunk["text"] for _, chunk in hits]
+    # Tombstoned rows were compacted away once they passed the threshold
+    assert len(index.chunks) == len(index)
+
+
+def test_switching_embedder_rebuilds_index(tmp_path):
+    VectorIndex(str(tmp_path), HashingEmbedder(dim=64)).add_documents(
+        "meeting_notes", NOTES
+    )
+
+    index = VectorIndex(str(tmp_path), HashingEmbedder(dim=128))
+
+    assert len(index) == 0
+    assert index.add_documents("meeting_notes", NOTES) == 3
+    assert index.vectors().shape == (3, 128)
+
+
+def test_adds_from_separate_workers_are_kept(tmp_path):
+    first = VectorIndex(str(tmp_path), HashingEmbedder(dim=64))
+    second = VectorIndex(str(tmp_path), HashingEmbedder(dim=64))
+    first.add_documents("meeting_notes", NOTES)
+    # second was opened before first's add and must not overwrite it
+    second.add_documents("beckers_news", [Document("article", "EHR go-live news.")])
+    assert len(second) == 4
+
+    # Vectors appended by an add that died before saving its metadata are
+    # dropped when the index is next opened
+    with open(second.vectors_path, "ab") as f:
+        f.write(b"\0" * 64 * 4 * 2)
+    index = VectorIndex(str(tmp_path), HashingEmbedder(dim=64))
+    assert os.path.getsize(index.vectors_path) == 4 * 64 * 4
+    assert index.vectors().shape == (4, 64)
+    [hits] = index.search(["EHR go-live"], k=1, source="beckers_news")
+    assert hits[0][1]["doc_id"] == "article"
@@ -0,0 +1,137 @@
+"""
+Trends module for ROI Automation Dashboard.
+This module handles the trend columns computed alongside the QoQ changes:
+year-over-year changes, trailing 4-quarter rolling means and seasonally
+adjusted QoQ changes, for every group and metric in one vectorized pass.
+"""
+
+import numpy as np
+import pandas as pd
+from data_processor import (
+    HIERARCHY_COLUMNS,
+    METRIC_ENGINE,
+    QOQ_METRICS,
+    add_qoq_changes,
+    format_quarter_key,
+)
+from rollup import parse_quarter_label
+
+# Quarters in a year and in the trailing rolling window
+SEASON_LENGTH = 4
+ROLLING_WINDOW = 4
+
+# Suffixes of the columns add_trend_columns adds for each metric
+TREND_SUFFIXES = ("_yoy", "_rolling4", "_qoq_sa")
+
+
+def _change(metric, values, previous):
+    """Change from previous to values in the metric's QoQ units."""
+    if QOQ_METRICS[metric] == "pct_change":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = (values / previous - 1) * 100
+        # A change from zero is undefined, as in rollup.qoq_change
+        return np.where(np.isinf(change), np.nan, change)
+    return (values - previous) * 100
+
+
+def add_trend_columns(
+    data: pd.DataFrame, group_cols=None, key_col="quarter_key"
+) -> pd.DataFrame:
+    """
+    Add trend columns for every metric in QOQ_METRICS that data has:
+
+      <metric>_yoy       change against the same quarter a year earlier, in
+                         the same units as <metric>_qoq
+      <metric>_rolling4  mean of the trailing 4 quarters, including this one
+      <metric>_qoq_sa    <metric>_qoq minus the average QoQ change into the
+                         same calendar quarter in the group's earlier years,
+                         so a normal seasonal move comes out near zero
+
+    Quarters are matched by key_col, so gaps in the data leave the affected
+    values empty rather than comparing the wrong quarters. Rows must already
+    be sorted chronologically within each group and <metric>_qoq columns
+    (see add_qoq_changes) must be present for the seasonal adjustment.
+    """
+    metrics = [m for m in QOQ_METRICS if m in data.columns]
+    keys = data[key_col].to_numpy(dtype=np.int64)
+    if group_cols:
+        group_ids = data.groupby(group_cols, sort=False).ngroup().to_numpy()
+    else:
+        group_ids = np.zeros(len(data), dtype=np.int64)
+
+    # Row positions of each row's quarter N quarters back in the same group,
+    # or -1 where that quarter isn't in the data. Each group gets its own
+    # range of IDs, padded so looking back never reaches the previous group
+    offsets = keys - (keys.min() if len(keys) else 0) + SEASON_LENGTH
+    span = (offsets.max() if len(keys) else 0) + 1
+    row_ids = pd.Index(group_ids * span + offsets)
+
+    def lag_positions(lag):
+        return row_ids.get_indexer(row_ids - lag)
+
+    values = data[metrics].to_numpy(dtype=np.float64)
+
+    def lagged(positions):
+        out = np.full_like(values, np.nan)
+        found = positions >= 0
+        out[found] = values[positions[found]]
+        return out
+
+    year_ago = lagged(lag_positions(SEASON_LENGTH))
+    window = values.copy()
+    for lag in range(1, ROLLING_WINDOW):
+        window += lagged(lag_positions(lag))
+    rolling = window / ROLLING_WINDOW
+
+    # Average earlier-year QoQ change for each group and calendar quarter,
+    # from cumulative sums so every series is done in one pass
+    qoq = data[[f"{m}_qoq" for m in metrics]].to_numpy(dtype=np.float64)
+    season_keys = [group_ids, keys % SEASON_LENGTH]
+    prior = pd.DataFrame(qoq, index=data.index).groupby(season_keys).shift()
+    count = prior.notna().groupby(season_keys).cumsum().to_numpy()
+    total = prior.fillna(0).groupby(season_keys).cumsum().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seasonal = np.where(count > 0, total / count, np.nan)
+
+    data = data.copy()
+    for i, metric in enumerate(metrics):
+        data[f"{metric}_yoy"] = _change(metric, values[:, i], year_ago[:, i])
+        data[f"{metric}_rolling4"] = rolling[:, i]
+        data[f"{metric}_qoq_sa"] = qoq[:, i] - seasonal[:, i]
+
+    return data
+
+
+def refresh_trend_columns(frame: pd.DataFrame, group_cols=None) -> pd.DataFrame:
+    """
+    Recompute the trend columns of a processed frame (quarter_year labels,
+    sorted like DataProcessor.process_frames output), e.g. after some of
+    its quarters were replaced.
+    """
+    stale = [f"{m}{suffix}" for m in QOQ_METRICS for suffix in TREND_SUFFIXES]
+    frame = frame.drop(columns=[col for col in stale if col in frame.columns])
+    # Only the distinct labels are parsed
+    codes, labels = pd.factorize(frame["quarter_year"])
+    keys = np.array([parse_quarter_label(q) for q in labels], dtype=np.int64)
+    frame = frame.assign(quarter_key=keys[codes])
+    return add_trend_columns(frame, group_cols).drop(columns="quarter_key")
+
+
+def location_trends(cube, metrics=None):
+    """
+    Return one row per location and quarter in a RollupCube with the
+    location's metrics, QoQ changes and trend columns.
+    """
+    metrics = [m for m in METRIC_ENGINE.resolve(metrics) if m in cube.metric_names]
+    frame = cube.level_frame("location")
+    for metric, values in METRIC_ENGINE.evaluate(frame, metrics).items():
+        frame[metric] = values
+
+    frame = frame[["quarter_key", *HIERARCHY_COLUMNS, *metrics]].sort_values(
+        [*HIERARCHY_COLUMNS, "quarter_key"]
+    )
+    frame = add_qoq_changes(frame, HIERARCHY_COLUMNS)
+    frame = add_trend_columns(frame, HIERARCHY_COLUMNS)
+
+    frame.insert(0, "quarter_year", format_quarter_key(frame.pop("quarter_key")))
+    return frame.reset_index(drop=True)
@@ -0,0 +1,340 @@
+"""
+Vector index module for ROI Automation Dashboard.
+This module handles embedding chunked meeting notes and news articles into a
+per-customer, memory-mapped vector index, so synthesis can retrieve only the
+passages relevant to the metric findings instead of sending every document.
+"""
+
+import os
+import re
+import json
+import zlib
+import fcntl
+import numpy as np
+from contextlib import contextmanager
+from sources import fingerprint, split_into_chunks
+
+DEFAULT_CHUNK_TOKENS = 300
+DEFAULT_HASHING_DIM = 512
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+VECTORS_FILENAME = "vectors.f32"
+METADATA_FILENAME = "chunks.json"
+LOCK_FILENAME = "index.lock"
+
+# Rewrite the vector file once this share of rows belongs to removed chunks
+COMPACT_THRESHOLD = 0.25
+
+
+def _normalize(vectors):
+    """L2-normalize rows so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+class HashingEmbedder:
+    """
+    Local, deterministic embedder using signed feature hashing of words and
+    word pairs. A stand-in for a real embedding model in tests and offline
+    runs; it matches on shared vocabulary rather than meaning.
+    """
+
+    def __init__(self, dim=DEFAULT_HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"[a-z0-9]+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if hashed & 1 else -1.0
+                vectors[row, (hashed >> 1) % self.dim] += sign
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder:
+    """Embeds texts with an OpenAI/Azure embedding deployment."""
+
+    def __init__(
+        self, client, model=DEFAULT_EMBEDDING_MODEL, rate_limiter=None, batch_size=64
+    ):
+        self.client = client
+        self.model = model
+        self.rate_limiter = rate_limiter
+        self.batch_size = batch_size
+        self.name = model
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            kwargs = {
+                "model": self.model,
+                "input": texts[start : start + self.batch_size],
+            }
+            if self.rate_limiter is not None:
+                response = self.rate_limiter.call(
+                    self.client.embeddings.create, **kwargs
+                )
+            else:
+                response = self.client.embeddings.create(**kwargs)
+            vectors.extend(item.embedding for item in response.data)
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+class VectorIndex:
+    """
+    Flat (exact) cosine-similarity index stored in a directory.
+
+    Vectors are appended to a float32 file that is memory-mapped for search,
+    so the index doesn't have to fit in memory and opening it is instant.
+    Chunk text and document fingerprints live in a JSON file next to it.
+    Documents are added incrementally: unchanged documents are skipped and
+    changed ones have their old chunks tombstoned. Adds hold a file lock so
+    workers sharing the directory don't interleave their writes.
+    """
+
+    def __init__(self, path, embedder, chunk_tokens=DEFAULT_CHUNK_TOKENS):
+        self.path = path
+        self.embedder = embedder
+        self.chunk_tokens = chunk_tokens
+        self.vectors_path = os.path.join(path, VECTORS_FILENAME)
+        self.metadata_path = os.path.join(path, METADATA_FILENAME)
+        self.lock_path = os.path.join(path, LOCK_FILENAME)
+        os.makedirs(path, exist_ok=True)
+
+        with self._locked():
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the index directory across processes."""
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """
+        Read the index state from disk. Call with the lock held. Vector rows
+        past the ones the metadata describes, left by an add that stopped
+        before saving it, are truncated away.
+        """
+        self.chunks = []  # one dict per vector row
+        self.documents = {}  # "source/doc_id" -> fingerprint
+        self.dim = None
+        self._vectors = None
+        self._excluded = {}  # source -> cached boolean mask of rows to skip
+
+        if os.path.exists(self.metadata_path):
+            with open(self.metadata_path) as f:
+                metadata = json.load(f)
+            if metadata.get("embedder") == self.embedder.name:
+                self.chunks = metadata["chunks"]
+                self.documents = metadata["documents"]
+                self.dim = metadata["dim"]
+            else:
+                # Vectors from a different model aren't comparable; start over
+                self._reset_files()
+
+        row_size = (self.dim or 0) * np.dtype(np.float32).itemsize
+        expected_size = len(self.chunks) * row_size
+        if (
+            os.path.exists(self.vectors_path)
+            and os.path.getsize(self.vectors_path) > expected_size
+        ):
+            os.truncate(self.vectors_path, expected_size)
+
+    def __len__(self):
+        return sum(not chunk["deleted"] for chunk in self.chunks)
+
+    def _reset_files(self):
+        for file_path in (self.vectors_path, self.metadata_path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def _save_metadata(self):
+        tmp_path = self.metadata_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "embedder": self.embedder.name,
+                    "dim": self.dim,
+                    "documents": self.documents,
+                    "chunks": self.chunks,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.metadata_path)
+
+    def vectors(self):
+        """Return the memory-mapped (rows, dim) vector matrix."""
+        if self._vectors is None and self.chunks:
+            self._excluded = {}
+            self._vectors = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.chunks), self.dim),
+            )
+        return self._vectors
+
+    def add_documents(self, source, documents):
+        """
+        Index new and changed documents from a source and drop the chunks of
+        documents that are no longer in it. Returns the number of documents
+        (re-)embedded.
+        """
+        with self._locked():
+            # Pick up whatever other workers added since this index was read
+            self._load()
+            return self._add_documents(source, documents)
+
+    def _add_documents(self, source, documents):
+        current = {f"{source}/{doc.doc_id}": doc for doc in documents}
+        prefix = f"{source}/"
+
+        changed = [
+            (key, doc)
+            for key, doc in current.items()
+            if self.documents.get(key) != fingerprint(doc.text, "")
+        ]
+        removed = {
+            key
+            for key in self.documents
+            if key.startswith(prefix) and key not in current
+        }
+        stale = removed | {key for key, _ in changed}
+        if not stale:
+            return 0
+
+        for chunk in self.chunks:
+            if chunk["doc_key"] in stale:
+                chunk["deleted"] = True
+        for key in removed:
+            del self.documents[key]
+
+        new_chunks = []
+        for key, doc in changed:
+            for position, text in enumerate(
+                split_into_chunks(doc.text, self.chunk_tokens)
+            ):
+                if text.strip():
+                    new_chunks.append(
+                        {
+                            "doc_key": key,
+                            "source": source,
+                            "doc_id": doc.doc_id,
+                            "position": position,
+                            "text": text,
+                            "deleted": False,
+                        }
+                    )
+            self.documents[key] = fingerprint(doc.text, "")
+
+        if new_chunks:
+            vectors = self.embedder.embed([chunk["text"] for chunk in new_chunks])
+            self.dim = vectors.shape[1]
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            self.chunks.extend(new_chunks)
+
+        self._vectors = None
+        self._save_metadata()
+        self._maybe_compact()
+        return len(changed)
+
+    def _maybe_compact(self):
+        """Rewrite the vector file without tombstoned rows once they pile up."""
+        deleted = sum(chunk["deleted"] for chunk in self.chunks)
+        if not self.chunks or deleted / len(self.chunks) < COMPACT_THRESHOLD:
+            return
+
+        keep = np.array([not chunk["deleted"] for chunk in self.chunks])
+        live_vectors = np.array(self.vectors()[keep])
+        tmp_path = self.vectors_path + ".tmp"
+        live_vectors.tofile(tmp_path)
+        self._vectors = None
+        os.replace(tmp_path, self.vectors_path)
+
+        self.chunks = [chunk for chunk in self.chunks if not chunk["deleted"]]
+        self._save_metadata()
+
+    def search(self, queries, k=5, source=None):
+        """
+        Return the k best chunks for each query text as lists of
+        (score, chunk) pairs, optionally restricted to one source.
+        """
+        vectors = self.vectors()
+        if vectors is None:
+            return [[] for _ in queries]
+
+        excluded = self._excluded.get(source)
+        if excluded is None:
+            excluded = np.array(
+                [
+                    chunk["deleted"]
+                    or (source is not None and chunk["source"] != source)
+                    for chunk in self.chunks
+                ]
+            )
+            self._excluded[source] = excluded
+
+        scores = self.embedder.embed(queries) @ vectors.T
+        scores[:, excluded] = -np.inf
+
+        k = min(k, int((~excluded).sum()))
+        if k == 0:
+            return [[] for _ in queries]
+
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([(float(row[i]), self.chunks[i]) for i in top])
+        return results
+
+
+def retrieve_context(index, queries, source, k=4, max_chunks=8):
+    """
+    Return the text of the chunks most relevant to any of the queries, best
+    first and in document order within each document, for one source.
+    """
+    best = {}
+    for hits in index.search(queries, k=k, source=source):
+        for score, chunk in hits:
+            key = (chunk["doc_id"], chunk["position"])
+            best[key] = max(score, best.get(key, (-np.inf, None))[0]), chunk
+
+    ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)
+    selected = sorted(
+        (chunk for _, chunk in ranked[:max_chunks]),
+        key=lambda chunk: (chunk["doc_id"], chunk["position"]),
+    )
+    return "\n\n".join(f"[{chunk['doc_id']}]\n{chunk['text']}" for chunk in selected)
+
+
+def get_customer_index(customer, client=None, rate_limiter=None):
+    """
+    Open the customer's index under VECTOR_INDEX_DIR, or return None when
+    retrieval is off. VECTOR_EMBEDDER selects "openai" (the default, using
+    VECTOR_EMBEDDING_MODEL) or the local "hashing" stand-in.
+    """
+    index_dir = os.getenv("VECTOR_INDEX_DIR")
+    if not index_dir:
+        return None
+
+    if os.getenv("VECTOR_EMBEDDER", "openai") == "hashing" or client is None:
+        embedder = HashingEmbedder()
+    else:
+        embedder = OpenAIEmbedder(
+            client,
+            os.getenv("VECTOR_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+            rate_limiter,
+        )
+
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", customer or "default").strip("_").lower()
+    return VectorIndex(os.path.join(index_dir, slug or "default"), embedder)